@@ -1,5 +1,8 @@
 import os
-from .game import Colour
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .game import Colour
 
 
 def get_board_asset_path():
@@ -13,7 +16,7 @@ def get_board_asset_path():
     return os.path.join(base_path, "gui", "assets", "boards", "board_plain_01.png")
 
 
-def get_piece_asset_path(colour: Colour, piece: str):
+def get_piece_asset_path(colour: "Colour", piece: str):
     """
     Grabs png asset for given piece.
     :param colour: (str) Colour of piece (WHITE or BLACK)
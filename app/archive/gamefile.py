@@ -0,0 +1,306 @@
+"""
+Compact binary game archive, run with ``python -m app.archive.gamefile``.
+
+Layout, all integers little-endian:
+
+- File header: magic ``CHGA``, version (u16), reserved (u16), game count (u64), index offset (u64),
+  string table offset (u64).
+- One record per game: result (u8), FEN length (u8, 0 for the initial position), white and black Elo (u16 each),
+  ply count (u16), tag count (u8), then the FEN, one (name, value) pair of string ids (u32 each) per remaining
+  PGN tag and one u16 per move as packed by Move.encode().
+- Index: one u64 record offset per game, so game N is found in O(1).
+- String table: count (u32), then the length (u16) and UTF-8 bytes of every tag name and value. Player names,
+  events and sites repeat across games, so each is stored once.
+
+The reader memory-maps the file; moves are decoded only when they are replayed.
+"""
+import argparse
+import array
+import mmap
+import os
+import struct
+import sys
+from typing import Iterator
+
+from app.game.move import Move
+
+MAGIC = b"CHGA"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHQQQ")
+RECORD_HEADER = struct.Struct("<BBHHHB")
+TAG_ENTRY = struct.Struct("<II")
+INDEX_ENTRY = struct.Struct("<Q")
+STRING_COUNT = struct.Struct("<I")
+STRING_LENGTH = struct.Struct("<H")
+
+RESULT_CODES = {"*": 0, "1-0": 1, "0-1": 2, "1/2-1/2": 3}
+RESULTS = {code: result for result, code in RESULT_CODES.items()}
+
+# Tags stored in the fixed part of the record rather than as string pairs
+FIXED_TAGS = ("Result", "WhiteElo", "BlackElo", "FEN", "SetUp")
+
+
+def _to_int(text) -> int:
+    try:
+        return max(0, min(int(text), 65535))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _read_strings(data: bytes) -> list:
+    """Reads a string table written by GameWriter.close()."""
+    (count,), offset, strings = STRING_COUNT.unpack_from(data, 0), STRING_COUNT.size, []
+    for _ in range(count):
+        (length,) = STRING_LENGTH.unpack_from(data, offset)
+        offset += STRING_LENGTH.size
+        strings.append(bytes(data[offset:offset + length]).decode("utf-8"))
+        offset += length
+    return strings
+
+
+class GameRecord:
+    def __init__(self, game_id: int, result: str, white_elo: int, black_elo: int, fen, headers: dict,
+                 moves: array.array):
+        """
+        A game read from the archive.
+
+        :param game_id: Position of the game in the archive.
+        :param result: '1-0', '0-1', '1/2-1/2' or '*'.
+        :param white_elo: Rating of the white player, 0 if unknown.
+        :param black_elo: Rating of the black player, 0 if unknown.
+        :param fen: Starting position, None for the initial position.
+        :param headers: Remaining PGN tags.
+        :param moves: Encoded moves, see Move.encode().
+        """
+        self.game_id = game_id
+        self.result = result
+        self.white_elo = white_elo
+        self.black_elo = black_elo
+        self.fen = fen
+        self.headers = headers
+        self.moves = moves
+
+    def __len__(self):
+        return len(self.moves)
+
+    def iter_moves(self) -> Iterator[Move]:
+        return map(Move.decode, self.moves)
+
+    def replay(self, board=None) -> Iterator:
+        """
+        Plays the game through on a board, yielding the board after every move.
+
+        :param board: Board to reuse, a new one is created if not given.
+        """
+        from app.game.board import Board, START_FEN
+
+        if board is None:
+            board = Board(fen=self.fen or START_FEN)
+        else:
+            board.set_fen(self.fen or START_FEN)
+        for code in self.moves:
+            board.make_move(Move.decode(code))
+            yield board
+
+
+class GameWriter:
+    def __init__(self, path: str, append: bool = False):
+        """
+        Writes games to a binary archive. Use as a context manager; the index is written on close.
+
+        :param path: Archive file.
+        :param append: Add games to an existing archive instead of replacing it.
+        """
+        self.path = path
+        self._offsets = []
+        self._strings = {}
+        if append and os.path.exists(path):
+            self._file = open(path, "r+b")
+            magic, version, _, count, index_offset, strings_offset = FILE_HEADER.unpack(
+                self._file.read(FILE_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} game archive")
+            self._file.seek(index_offset)
+            self._offsets = [INDEX_ENTRY.unpack(self._file.read(INDEX_ENTRY.size))[0] for _ in range(count)]
+            self._file.seek(strings_offset)
+            for string in _read_strings(self._file.read()):
+                self._strings[string] = len(self._strings)
+            # New records overwrite the old index and string table, which are rewritten on close
+            self._file.seek(index_offset)
+            self._file.truncate()
+        else:
+            self._file = open(path, "wb")
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0))
+
+    def _string_id(self, string: str) -> int:
+        if string not in self._strings:
+            self._strings[string] = len(self._strings)
+        return self._strings[string]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def add_game(self, moves, result: str = "*", headers: dict = None, fen: str = None) -> int:
+        """
+        Appends a game.
+
+        :param moves: Moves as Move tuples or encoded integers.
+        :param result: Game result.
+        :param headers: PGN tags; WhiteElo and BlackElo are stored as numbers.
+        :param fen: Starting position, None for the initial position.
+        :return: Id of the new game.
+        """
+        headers = headers or {}
+        codes = array.array("H", (move if isinstance(move, int) else move.encode() for move in moves))
+        if sys.byteorder != "little":
+            codes.byteswap()
+        fen_bytes = fen.encode("ascii") if fen else b""
+        tags = [(key, value) for key, value in headers.items() if key not in FIXED_TAGS][:255]
+
+        self._offsets.append(self._file.tell())
+        self._file.write(RECORD_HEADER.pack(
+            RESULT_CODES.get(result, 0), len(fen_bytes), _to_int(headers.get("WhiteElo")),
+            _to_int(headers.get("BlackElo")), len(codes), len(tags),
+        ))
+        self._file.write(fen_bytes)
+        for key, value in tags:
+            self._file.write(TAG_ENTRY.pack(self._string_id(key), self._string_id(value)))
+        self._file.write(codes.tobytes())
+        return len(self._offsets) - 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        for offset in self._offsets:
+            self._file.write(INDEX_ENTRY.pack(offset))
+
+        strings_offset = self._file.tell()
+        self._file.write(STRING_COUNT.pack(len(self._strings)))
+        for string in self._strings:
+            encoded = string.encode("utf-8")[:65535]
+            self._file.write(STRING_LENGTH.pack(len(encoded)) + encoded)
+
+        self._file.seek(0)
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, len(self._offsets), index_offset, strings_offset))
+        self._file.close()
+
+
+class GameArchive:
+    def __init__(self, path: str):
+        """
+        Memory-mapped reader for a binary game archive.
+
+        :param path: Archive file.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self._count, self._index_offset, strings_offset = FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} game archive")
+        self._strings = _read_strings(self._map[strings_offset:])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for game_id in range(self._count):
+            yield self[game_id]
+
+    def offset(self, game_id: int) -> int:
+        return INDEX_ENTRY.unpack_from(self._map, self._index_offset + INDEX_ENTRY.size * game_id)[0]
+
+    def __getitem__(self, game_id: int) -> GameRecord:
+        if not 0 <= game_id < self._count:
+            raise IndexError(f"Game {game_id} out of range")
+        offset = self.offset(game_id)
+        result, fen_length, white_elo, black_elo, plies, tag_count = RECORD_HEADER.unpack_from(self._map, offset)
+        offset += RECORD_HEADER.size
+        fen = self._map[offset:offset + fen_length].decode("ascii") if fen_length else None
+        offset += fen_length
+        headers = {}
+        for _ in range(tag_count):
+            key, value = TAG_ENTRY.unpack_from(self._map, offset)
+            headers[self._strings[key]] = self._strings[value]
+            offset += TAG_ENTRY.size
+        moves = array.array("H")
+        moves.frombytes(self._map[offset:offset + 2 * plies])
+        if sys.byteorder != "little":
+            moves.byteswap()
+        return GameRecord(game_id, RESULTS[result], white_elo, black_elo, fen, headers, moves)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def convert_pgn(pgn_path: str, archive_path: str, append: bool = False) -> tuple[int, int]:
+    """
+    Converts a PGN file to a binary archive, checking every move against the rules.
+
+    :return: Number of games written and number skipped because of illegal or unreadable moves.
+    """
+    from app.game.board import Board, START_FEN
+    from app.game.pgn import read_games, parse_san
+
+    board = Board()
+    written = skipped = 0
+    with open(pgn_path, encoding="utf-8", errors="replace") as pgn, GameWriter(archive_path, append) as writer:
+        for game in read_games(pgn):
+            try:
+                board.set_fen(game.fen or START_FEN)
+                moves = []
+                for san in game.moves:
+                    move = parse_san(board, san)
+                    board.make_move(move)
+                    moves.append(move)
+            except ValueError as e:
+                print(f"Skipping game: {e}")
+                skipped += 1
+                continue
+            writer.add_game(moves, game.result, game.headers, game.fen)
+            written += 1
+    return written, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert and inspect binary game archives.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="convert a PGN file to a binary archive")
+    convert.add_argument("pgn")
+    convert.add_argument("archive")
+    convert.add_argument("--append", action="store_true", help="add to an existing archive")
+    info = commands.add_parser("info", help="print the number of games and a game's moves")
+    info.add_argument("archive")
+    info.add_argument("--game", type=int, help="game to print")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        written, skipped = convert_pgn(args.pgn, args.archive, args.append)
+        pgn_size, archive_size = os.path.getsize(args.pgn), os.path.getsize(args.archive)
+        print(f"{written} games written, {skipped} skipped; {pgn_size} -> {archive_size} bytes "
+              f"({pgn_size / max(archive_size, 1):.1f}x smaller)")
+    else:
+        with GameArchive(args.archive) as archive:
+            print(f"{len(archive)} games")
+            if args.game is not None:
+                game = archive[args.game]
+                print(game.result, game.headers, game.fen or "")
+                print(" ".join(move.uci() for move in game.iter_moves()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Opening tree with aggregated move statistics, run with ``python -m app.archive.opening_tree``.
+
+The games of a PGN file or binary archive (see app.archive.gamefile) are split into batches that worker
+processes replay up to a maximum ply, counting for every (position, move) pair how often it was played, the
+results of those games and the rating of the player who chose it. The partial counts are merged and written
+as a sorted-array file, all little-endian:
+
+- Header: magic ``CHOT``, version (u16), maximum ply (u16), entry count (u64) and number of games (u64).
+- Position keys (u64 each), sorted, one per entry; a position with several moves has consecutive entries.
+- One record per entry: encoded move (u16), games, white wins, draws and black wins (u32 each), the sum of
+  the movers' ratings (u64) and the number of rated games (u32).
+
+The reader memory-maps the file and binary-searches the key array, see OpeningTree.
+"""
+import argparse
+import bisect
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+from typing import List
+
+from app.archive.position_index import _array_view
+from app.game import Colour
+from app.game.move import Move
+
+MAGIC = b"CHOT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQ")
+RECORD = struct.Struct("<HIIIIQI")
+
+DEFAULT_MAX_PLY = 20
+# Games replayed by a worker process per task
+DEFAULT_BATCH_SIZE = 2000
+
+# Index of the result counter incremented for each game result, see _count_game()
+RESULT_SLOTS = {"1-0": 1, "1/2-1/2": 2, "0-1": 3}
+
+
+class BookMove:
+    def __init__(self, move: Move, games: int, white_wins: int, draws: int, black_wins: int,
+                 average_rating: float = None):
+        """
+        Statistics of a move played from a position.
+
+        :param move: The move.
+        :param games: Number of games it was played in.
+        :param white_wins: Games won by white after the move.
+        :param draws: Games drawn after the move.
+        :param black_wins: Games won by black after the move.
+        :param average_rating: Average rating of the players who chose it, None if no game was rated.
+        """
+        self.move = move
+        self.games = games
+        self.white_wins = white_wins
+        self.draws = draws
+        self.black_wins = black_wins
+        self.average_rating = average_rating
+
+    @property
+    def weight(self) -> int:
+        """Relative probability of playing the move when choosing from the book, see choose_book_move()."""
+        return self.games
+
+    def score(self, colour: Colour) -> float:
+        """Returns the average score, 0 to 1, of the given side in the decided and drawn games."""
+        decided = self.white_wins + self.draws + self.black_wins
+        if not decided:
+            return 0.5
+        wins = self.white_wins if colour == Colour.WHITE else self.black_wins
+        return (wins + 0.5 * self.draws) / decided
+
+    def __repr__(self):
+        return (f"BookMove({self.move.uci()}, games={self.games}, "
+                f"+{self.white_wins} ={self.draws} -{self.black_wins})")
+
+
+class OpeningTree:
+    def __init__(self, path: str):
+        """
+        Memory-mapped reader for an opening tree.
+
+        :param path: Tree file.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_ply, self._count, self.games = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening tree")
+        self._records_offset = HEADER.size + 8 * self._count
+        self._keys = _array_view(memoryview(self._map)[HEADER.size:self._records_offset], "Q")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def lookup(self, key: int) -> List[BookMove]:
+        """
+        Returns the moves played from a position, most popular first.
+
+        :param key: Zobrist key of the position, see Board.zobrist_key.
+        """
+        moves = []
+        for entry in range(bisect.bisect_left(self._keys, key), bisect.bisect_right(self._keys, key)):
+            code, games, white, draws, black, rating_sum, rated = RECORD.unpack_from(
+                self._map, self._records_offset + RECORD.size * entry)
+            moves.append(BookMove(Move.decode(code), games, white, draws, black,
+                                  rating_sum / rated if rated else None))
+        moves.sort(key=lambda book_move: book_move.games, reverse=True)
+        return moves
+
+    def moves(self, board) -> List[BookMove]:
+        """Returns the moves played from the position on a board, most popular first."""
+        return self.lookup(board.zobrist_key)
+
+    def close(self):
+        if isinstance(self._keys, memoryview):
+            self._keys.release()
+        self._map.close()
+        self._file.close()
+
+
+def _count_game(stats: dict, plies: list, result: str, ratings: dict):
+    """
+    Adds a game's moves to the statistics.
+
+    :param stats: Statistics keyed by (position key << 16 | move code). Each value is a list of games, white wins,
+                  draws, black wins, rating sum and rated games.
+    :param plies: (position key, side to move, move) for every move counted.
+    :param result: Game result.
+    :param ratings: Rating of each side, 0 if unknown.
+    """
+    slot = RESULT_SLOTS.get(result)
+    for key, turn, move in plies:
+        entry_key = (key << 16) | move.encode()
+        counts = stats.get(entry_key)
+        if counts is None:
+            counts = stats[entry_key] = [0, 0, 0, 0, 0, 0]
+        counts[0] += 1
+        if slot is not None:
+            counts[slot] += 1
+        if ratings[turn]:
+            counts[4] += ratings[turn]
+            counts[5] += 1
+
+
+def count_archive_games(task: tuple) -> tuple[dict, int]:
+    """
+    Counts a range of games from a binary archive. Runs inside a worker process.
+
+    :param task: Archive path, first game, end game and maximum ply.
+    :return: Statistics keyed by (position key << 16 | move code), and the number of games counted.
+    """
+    from app.archive.gamefile import GameArchive
+    from app.game.board import Board, START_FEN
+
+    path, first, end, max_ply = task
+    stats, board = {}, Board()
+    with GameArchive(path) as archive:
+        for game_id in range(first, end):
+            game = archive[game_id]
+            board.set_fen(game.fen or START_FEN)
+            plies = []
+            for code in game.moves[:max_ply]:
+                move = Move.decode(code)
+                plies.append((board.zobrist_key, board.turn, move))
+                board.make_move(move)
+            _count_game(stats, plies, game.result, {Colour.WHITE: game.white_elo, Colour.BLACK: game.black_elo})
+    return stats, end - first
+
+
+def count_pgn_games(task: tuple) -> tuple[dict, int]:
+    """
+    Counts a batch of PGN games, checking their moves against the rules. Runs inside a worker process.
+
+    :param task: List of (headers, SAN moves, result) and the maximum ply.
+    :return: Statistics as for count_archive_games() and the number of games counted.
+    """
+    from app.archive.gamefile import _to_int
+    from app.game.board import Board, START_FEN
+    from app.game.pgn import parse_san
+
+    games, max_ply = task
+    stats, board, counted = {}, Board(), 0
+    for headers, sans, result in games:
+        try:
+            board.set_fen(headers.get("FEN") or START_FEN)
+            plies = []
+            for san in sans[:max_ply]:
+                move = parse_san(board, san)
+                plies.append((board.zobrist_key, board.turn, move))
+                board.make_move(move)
+        except ValueError:
+            continue
+        ratings = {Colour.WHITE: _to_int(headers.get("WhiteElo")), Colour.BLACK: _to_int(headers.get("BlackElo"))}
+        _count_game(stats, plies, result, ratings)
+        counted += 1
+    return stats, counted
+
+
+def _merge(total: dict, partial: dict):
+    for entry_key, counts in partial.items():
+        existing = total.get(entry_key)
+        if existing is None:
+            total[entry_key] = counts
+        else:
+            for slot, count in enumerate(counts):
+                existing[slot] += count
+
+
+def _pgn_batches(path: str, max_ply: int, batch_size: int):
+    from app.game.pgn import read_games
+
+    batch = []
+    with open(path, encoding="utf-8", errors="replace") as pgn:
+        for game in read_games(pgn):
+            batch.append((game.headers, game.moves[:max_ply], game.result))
+            if len(batch) >= batch_size:
+                yield batch, max_ply
+                batch = []
+    if batch:
+        yield batch, max_ply
+
+
+def write_tree(path: str, stats: dict, games: int, max_ply: int):
+    """Writes merged statistics as a sorted-array tree file."""
+    entry_keys = sorted(stats)
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, max_ply, len(entry_keys), games))
+        output.write(struct.pack(f"<{len(entry_keys)}Q", *(entry_key >> 16 for entry_key in entry_keys)))
+        for entry_key in entry_keys:
+            output.write(RECORD.pack(entry_key & 0xFFFF, *stats[entry_key]))
+
+
+def build_tree(source: str, tree_path: str, max_ply: int = DEFAULT_MAX_PLY, concurrency: int = None,
+               batch_size: int = DEFAULT_BATCH_SIZE) -> tuple[int, int]:
+    """
+    Builds an opening tree from a PGN file or binary game archive.
+
+    :param source: PGN file or binary archive, told apart by the archive's magic number.
+    :param tree_path: Tree file to write.
+    :param max_ply: Depth of the tree in plies.
+    :param concurrency: Number of worker processes, defaults to the number of CPUs; 1 counts in this process.
+    :param batch_size: Number of games per worker task.
+    :return: Number of games counted and number of tree entries.
+    """
+    from app.archive.gamefile import GameArchive, MAGIC as ARCHIVE_MAGIC
+
+    with open(source, "rb") as file:
+        is_archive = file.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+    if is_archive:
+        with GameArchive(source) as archive:
+            count = len(archive)
+        tasks = ((source, first, min(first + batch_size, count), max_ply) for first in range(0, count, batch_size))
+        worker = count_archive_games
+    else:
+        tasks = _pgn_batches(source, max_ply, batch_size)
+        worker = count_pgn_games
+
+    stats, games = {}, 0
+    concurrency = concurrency or os.cpu_count()
+    if concurrency == 1:
+        for partial, counted in map(worker, tasks):
+            _merge(stats, partial)
+            games += counted
+    else:
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(concurrency) as pool:
+            for partial, counted in pool.imap_unordered(worker, tasks):
+                _merge(stats, partial)
+                games += counted
+    write_tree(tree_path, stats, games, max_ply)
+    return games, len(stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query opening trees.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a tree from a PGN file or binary game archive")
+    build.add_argument("source")
+    build.add_argument("tree")
+    build.add_argument("--max-ply", type=int, default=DEFAULT_MAX_PLY, help="depth of the tree in plies")
+    build.add_argument("--concurrency", type=int, default=os.cpu_count(), help="number of worker processes")
+    build.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="games per worker task")
+    show = commands.add_parser("show", help="print the book moves of a position")
+    show.add_argument("tree")
+    show.add_argument("fen", nargs="?", help="position, defaults to the start position")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        games, entries = build_tree(args.source, args.tree, args.max_ply, args.concurrency, args.batch_size)
+        print(f"{games} games, {entries} entries in {time.perf_counter() - start:.1f}s")
+    else:
+        from app.game.board import Board
+
+        board = Board(fen=args.fen) if args.fen else Board()
+        with OpeningTree(args.tree) as tree:
+            for book_move in board.book_moves(tree):
+                rating = f"{book_move.average_rating:.0f}" if book_move.average_rating else "-"
+                print(f"{book_move.move.uci():6} {book_move.games:8} games  "
+                      f"+{book_move.white_wins} ={book_move.draws} -{book_move.black_wins}  "
+                      f"score {100 * book_move.score(board.turn):.1f}%  rating {rating}")
+
+
+if __name__ == "__main__":
+    main()
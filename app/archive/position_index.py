@@ -0,0 +1,275 @@
+"""
+Index from position to the games reaching it, run with ``python -m app.archive.position_index``.
+
+Every game of a binary archive (see app.archive.gamefile) is replayed and each position's Zobrist key is
+recorded with the game id and ply, ply 0 being the starting position. The entries are sorted by key with an
+external merge sort, so building needs little memory, and written as three parallel arrays, all little-endian:
+
+- Header: magic ``CHPI``, version (u16), maximum ply (u16, 0 for no limit), entry count (u64) and the number
+  of archive games indexed (u64).
+- Keys (u64 each), sorted.
+- Game ids (u32 each) and plies (u16 each) of the entries, in the same order.
+
+The reader memory-maps the file and finds a key with a binary search, so lookups take microseconds whatever
+the size of the archive. Appending merges the entries of new games into a fresh copy of the index.
+"""
+import argparse
+import array
+import bisect
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from typing import Iterator, List
+
+MAGIC = b"CHPI"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQ")
+RUN_ENTRY = struct.Struct("<QQ")
+
+# Entries sorted in memory before being written to a temporary run file
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+class PositionIndex:
+    def __init__(self, path: str):
+        """
+        Memory-mapped reader for a position index.
+
+        :param path: Index file.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_ply, self._count, self.games = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} position index")
+
+        view = memoryview(self._map)
+        keys_end = HEADER.size + 8 * self._count
+        games_end = keys_end + 4 * self._count
+        self._keys = _array_view(view[HEADER.size:keys_end], "Q")
+        self._game_ids = _array_view(view[keys_end:games_end], "I")
+        self._plies = _array_view(view[games_end:games_end + 2 * self._count], "H")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _range(self, key: int) -> range:
+        return range(bisect.bisect_left(self._keys, key), bisect.bisect_right(self._keys, key))
+
+    def count(self, key: int) -> int:
+        """Returns the number of times a position occurs in the indexed games."""
+        return len(self._range(key))
+
+    def lookup(self, key: int, limit: int = None) -> List[tuple[int, int]]:
+        """
+        Finds the games reaching a position.
+
+        :param key: Zobrist key of the position, see Board.zobrist_key.
+        :param limit: Maximum number of results.
+        :return: (game id, ply) pairs in game order.
+        """
+        entries = self._range(key)
+        if limit is not None:
+            entries = entries[:limit]
+        return [(self._game_ids[entry], self._plies[entry]) for entry in entries]
+
+    def find(self, board, limit: int = None) -> List[tuple[int, int]]:
+        """Finds the games reaching the position on a board."""
+        return self.lookup(board.zobrist_key, limit)
+
+    def entries(self) -> Iterator[int]:
+        """Yields every entry packed as in the run files, see _pack()."""
+        for entry in range(self._count):
+            yield _pack(self._keys[entry], self._game_ids[entry], self._plies[entry])
+
+    def close(self):
+        # Views into the map must be released before it can be closed
+        for view in (self._keys, self._game_ids, self._plies):
+            if isinstance(view, memoryview):
+                view.release()
+        self._map.close()
+        self._file.close()
+
+
+def _array_view(view: memoryview, typecode: str):
+    """Reads a little-endian array in place, or copies it with the bytes swapped on big-endian machines."""
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    values = array.array(typecode, view.tobytes())
+    values.byteswap()
+    return values
+
+
+def _pack(key: int, game_id: int, ply: int) -> int:
+    """Packs an entry into one integer that sorts by key, then game, then ply."""
+    return (key << 48) | (game_id << 16) | ply
+
+
+def _position_entries(archive, first_game: int, max_ply: int) -> Iterator[int]:
+    """Replays the archive from a game onwards, yielding a packed entry for every position."""
+    from app.game.board import Board, START_FEN
+    from app.game.move import Move
+
+    board = Board()
+    for game_id in range(first_game, len(archive)):
+        game = archive[game_id]
+        board.set_fen(game.fen or START_FEN)
+        yield _pack(board.zobrist_key, game_id, 0)
+        for ply, code in enumerate(game.moves[:max_ply] if max_ply else game.moves, 1):
+            board.make_move(Move.decode(code))
+            yield _pack(board.zobrist_key, game_id, ply)
+
+
+def _write_run(entries: list, directory: str) -> str:
+    """Sorts a chunk of entries and writes it to a temporary run file."""
+    entries.sort()
+    handle, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(handle, "wb") as run:
+        for entry in entries:
+            run.write(RUN_ENTRY.pack(entry >> 48, entry & 0xFFFF_FFFF_FFFF))
+    return path
+
+
+def _read_run(path: str) -> Iterator[int]:
+    with open(path, "rb") as run:
+        while True:
+            data = run.read(RUN_ENTRY.size * 4096)
+            if not data:
+                return
+            for key, posting in RUN_ENTRY.iter_unpack(data):
+                yield (key << 48) | posting
+
+
+def _write_index(path: str, entries: Iterator[int], count: int, games: int, max_ply: int):
+    """Writes sorted packed entries as the key, game id and ply arrays of an index file."""
+    keys_offset = HEADER.size
+    games_offset = keys_offset + 8 * count
+    plies_offset = games_offset + 4 * count
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, max_ply, count, games))
+        output.truncate(plies_offset + 2 * count)
+
+    sections = []
+    for offset, typecode in ((keys_offset, "Q"), (games_offset, "I"), (plies_offset, "H")):
+        section = open(path, "r+b")
+        section.seek(offset)
+        sections.append((section, array.array(typecode)))
+
+    def flush():
+        for section, values in sections:
+            if sys.byteorder != "little":
+                values.byteswap()
+            section.write(values.tobytes())
+            del values[:]
+
+    try:
+        for entry in entries:
+            sections[0][1].append(entry >> 48)
+            sections[1][1].append((entry >> 16) & 0xFFFF_FFFF)
+            sections[2][1].append(entry & 0xFFFF)
+            if len(sections[0][1]) >= 65536:
+                flush()
+        flush()
+    finally:
+        for section, _ in sections:
+            section.close()
+
+
+def build_index(archive_path: str, index_path: str, max_ply: int = 0, append: bool = False,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Builds a position index for a game archive, or adds the archive's new games to an existing index.
+
+    :param archive_path: Binary game archive.
+    :param index_path: Index file to write.
+    :param max_ply: Only index positions up to this ply, 0 for every position. Ignored when appending,
+                    where the existing index's limit is kept.
+    :param append: Index only the games added to the archive since the index was built.
+    :param chunk_size: Number of entries sorted in memory at a time.
+    :return: Number of entries added.
+    """
+    from app.archive.gamefile import GameArchive
+
+    existing = None
+    if append and os.path.exists(index_path):
+        existing = PositionIndex(index_path)
+        max_ply = existing.max_ply
+    first_game = existing.games if existing is not None else 0
+
+    directory = os.path.dirname(os.path.abspath(index_path))
+    runs, chunk, added = [], [], 0
+    try:
+        with GameArchive(archive_path) as archive:
+            games = len(archive)
+            for entry in _position_entries(archive, first_game, max_ply):
+                chunk.append(entry)
+                if len(chunk) >= chunk_size:
+                    runs.append(_write_run(chunk, directory))
+                    added += len(chunk)
+                    chunk = []
+        if chunk:
+            runs.append(_write_run(chunk, directory))
+            added += len(chunk)
+
+        sources = [_read_run(run) for run in runs]
+        count = added
+        if existing is not None:
+            sources.append(existing.entries())
+            count += len(existing)
+        # The old index stays readable until the merged copy replaces it
+        handle, merged_path = tempfile.mkstemp(suffix=".idx", dir=directory)
+        os.close(handle)
+        _write_index(merged_path, heapq.merge(*sources), count, games, max_ply)
+    finally:
+        if existing is not None:
+            existing.close()
+        for run in runs:
+            os.remove(run)
+    os.replace(merged_path, index_path)
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query position indexes of game archives.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index the positions of a binary game archive")
+    build.add_argument("archive")
+    build.add_argument("index")
+    build.add_argument("--max-ply", type=int, default=0, help="only index positions up to this ply")
+    build.add_argument("--append", action="store_true", help="add the archive's new games to an existing index")
+    find = commands.add_parser("find", help="list the games reaching a position")
+    find.add_argument("index")
+    find.add_argument("fen")
+    find.add_argument("--limit", type=int, default=20, help="maximum number of games to list")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        added = build_index(args.archive, args.index, args.max_ply, args.append)
+        print(f"{added} positions indexed in {time.perf_counter() - start:.1f}s")
+    else:
+        from app.game.board import Board
+
+        board = Board(fen=args.fen)
+        with PositionIndex(args.index) as index:
+            start = time.perf_counter()
+            results = index.find(board, args.limit)
+            elapsed = time.perf_counter() - start
+            print(f"{index.count(board.zobrist_key)} occurrences, lookup took {1e6 * elapsed:.0f}us")
+            for game_id, ply in results:
+                print(f"Game {game_id}, ply {ply}")
+
+
+if __name__ == "__main__":
+    main()
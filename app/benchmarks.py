@@ -0,0 +1,315 @@
+"""
+Micro-benchmarks of the core Board operations and rendering, run with ``python -m app.benchmarks``.
+
+Every benchmark times one call of an operation, taking the best of several repeats of a loop long enough to
+measure. Results can be saved as a JSON baseline and later runs compared with it: a benchmark more than the
+threshold slower than its baseline is reported as a regression and the run exits with status 1. Baselines
+only compare meaningfully on the machine that recorded them.
+
+Rendering uses the SDL dummy video driver, so no window is opened.
+
+The suite also measures how long the modules used by the engine, its worker processes and the command line tools
+take to import, with ``python -X importtime`` in a fresh interpreter, and checks them against IMPORT_BUDGETS.
+Those modules must not import pygame, which only the GUI and the rendering methods need.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from app.game import Colour
+from app.game.board import Board
+from app.game.move import Move
+
+# Position with every piece type on the board and many moves for each
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_REPEAT = 3
+# Relative slowdown reported as a regression
+DEFAULT_THRESHOLD = 0.2
+
+# Modules imported by short-lived processes -> the most seconds their import may take
+IMPORT_BUDGETS = {
+    "app.game.board": 0.3,
+    "app.engine.search": 0.4,
+    "app.engine.worker": 0.5,
+    "app.uci": 0.6,
+}
+# Directory holding the app package, where the import measurements run
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _construction():
+    return Board
+
+
+def _setup_board():
+    board = Board()
+
+    def run():
+        board.board.clear()
+        board.setup_board()
+
+    return run
+
+
+def _update_piece_move_list():
+    return Board(fen=KIWIPETE).update_piece_move_list
+
+
+def _move_piece():
+    board = Board()
+    pawn = board.board[(6, 4)]
+
+    def run():
+        board.move_piece(pawn, (4, 4))
+        board.undo_move()
+
+    return run
+
+
+def _is_check():
+    board = Board(fen=KIWIPETE)
+    return lambda: board.is_check(Colour.WHITE)
+
+
+def _is_checkmate():
+    return Board(fen=KIWIPETE).is_checkmate
+
+
+def _valid_moves(symbol: str):
+    def factory():
+        board = Board(fen=KIWIPETE)
+        piece = next(piece for piece in board.board.values()
+                     if piece.symbol == symbol and piece.colour == Colour.WHITE)
+        return lambda: piece._valid_moves(board.board, board.en_passant_target)
+
+    return factory
+
+
+def _screen():
+    if not pygame.display.get_init():
+        pygame.init()
+    return pygame.display.set_mode((800, 800))
+
+
+def _render_full():
+    screen, board = _screen(), Board()
+    return lambda: board.render_full(screen)
+
+
+def _render_move():
+    screen, board = _screen(), Board()
+    board.render(screen)
+    move = Move.from_uci("e2e4")
+
+    def run():
+        board.make_move(move)
+        board.render(screen)
+        board.unmake_move()
+        board.render(screen)
+
+    return run
+
+
+# Name -> function returning the zero-argument callable to time
+BENCHMARKS = {
+    "board_construction": _construction,
+    "setup_board": _setup_board,
+    "update_piece_move_list": _update_piece_move_list,
+    "move_piece": _move_piece,
+    "is_check": _is_check,
+    "is_checkmate": _is_checkmate,
+    **{f"valid_moves_{name}": _valid_moves(symbol) for name, symbol in
+       [("pawn", "p"), ("knight", "n"), ("bishop", "b"), ("rook", "r"), ("queen", "q"), ("king", "k")]},
+    "render_full": _render_full,
+    "render_move": _render_move,
+}
+
+
+def time_call(function, min_time: float = DEFAULT_MIN_TIME, repeat: int = DEFAULT_REPEAT) -> tuple[float, int]:
+    """
+    Times a function.
+
+    :param function: Zero-argument callable.
+    :param min_time: Seconds each repeat should run for at least; the loop count grows until it does.
+    :param repeat: Number of timed loops, the fastest is kept.
+    :return: (seconds per call, calls per loop).
+    """
+    timer = timeit.Timer(function)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = min([elapsed] + timer.repeat(repeat - 1, loops))
+    return best / loops, loops
+
+
+def run_benchmarks(names: list = None, min_time: float = DEFAULT_MIN_TIME, repeat: int = DEFAULT_REPEAT,
+                   on_result=None) -> dict:
+    """
+    Runs benchmarks.
+
+    :param names: Benchmarks to run, all of BENCHMARKS by default.
+    :param min_time: See time_call().
+    :param repeat: See time_call().
+    :param on_result: Optional callback receiving the name and result of each benchmark.
+    :return: Report with the Python version, machine and a {"seconds", "loops"} result per benchmark.
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        seconds, loops = time_call(BENCHMARKS[name](), min_time, repeat)
+        results[name] = {"seconds": seconds, "loops": loops}
+        if on_result is not None:
+            on_result(name, results[name])
+    return {"python": platform.python_version(), "machine": platform.machine(), "benchmarks": results}
+
+
+def _imported(code: str) -> list:
+    """Runs code in a fresh interpreter and returns (module, cumulative seconds, top level) per module imported."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=_ROOT, capture_output=True,
+                            text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        entries.append((name.strip(), int(cumulative) / 1e6, len(name) - len(name.lstrip())))
+    top = min((indent for _, _, indent in entries), default=0)
+    return [(name, seconds, indent == top) for name, seconds, indent in entries]
+
+
+def import_time(module: str, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Measures the import of a module with ``python -X importtime``, leaving out the interpreter's own start-up.
+
+    :param module: Module to import.
+    :param repeat: Number of fresh interpreters to measure in, the fastest is kept.
+    :return: Dict with the seconds the import took and whether it imported pygame.
+    """
+    startup = {name for name, _, _ in _imported("pass")}
+    best, pygame_imported = None, False
+    for _ in range(repeat):
+        entries = [entry for entry in _imported(f"import {module}") if entry[0] not in startup]
+        seconds = sum(seconds for _, seconds, top in entries if top)
+        best = seconds if best is None else min(best, seconds)
+        pygame_imported = any(name.split(".")[0] == "pygame" for name, _, _ in entries)
+    return {"seconds": best, "pygame": pygame_imported}
+
+
+def run_import_checks(budgets: dict = None, repeat: int = DEFAULT_REPEAT, on_result=None) -> dict:
+    """
+    Measures the imports of the modules of IMPORT_BUDGETS.
+
+    :param budgets: Module -> seconds, IMPORT_BUDGETS by default.
+    :param repeat: See import_time().
+    :param on_result: Optional callback receiving the name and result of each module.
+    :return: Result of import_time() with the budget added, per module.
+    """
+    results = {}
+    for module, budget in (budgets or IMPORT_BUDGETS).items():
+        results[module] = dict(import_time(module, repeat), budget=budget)
+        if on_result is not None:
+            on_result(module, results[module])
+    return results
+
+
+def check_imports(imports: dict) -> list:
+    """Returns a message per module of a run_import_checks() result over its budget or importing pygame."""
+    failures = []
+    for module, result in imports.items():
+        if result["seconds"] > result["budget"]:
+            failures.append(f"importing {module} took {1000 * result['seconds']:.1f}ms, over its budget of "
+                            f"{1000 * result['budget']:.0f}ms")
+        if result["pygame"]:
+            failures.append(f"importing {module} imports pygame")
+    return failures
+
+
+def compare(report: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """
+    Compares a run with a baseline.
+
+    :param report: Report of the new run.
+    :param baseline: Report of the baseline run.
+    :param threshold: Relative slowdown allowed before it counts as a regression.
+    :return: A message per benchmark slower than the threshold allows, empty if there is none.
+    """
+    regressions = []
+    for section, prefix in (("benchmarks", ""), ("imports", "import ")):
+        for name, result in report.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if before is None or not before["seconds"]:
+                continue
+            change = result["seconds"] / before["seconds"] - 1
+            if change > threshold:
+                regressions.append(f"{prefix}{name} slowed from {1e6 * before['seconds']:.2f}us to "
+                                   f"{1e6 * result['seconds']:.2f}us (+{change:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the core Board operations and compare with a baseline.")
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help=f"benchmarks to run, all by default: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="seconds per timed loop")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--save", help="write the results to this JSON file as a baseline")
+    parser.add_argument("--baseline", help="JSON baseline to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression")
+    parser.add_argument("--imports", action="store_true",
+                        help="also check the import budgets when benchmarks are named; always done otherwise")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    def report(name, result):
+        line = f"{name:<24} {1e6 * result['seconds']:>12.2f}us"
+        before = baseline["benchmarks"].get(name) if baseline else None
+        if before:
+            line += f" {result['seconds'] / before['seconds'] - 1:>+8.1%}"
+        print(line)
+
+    def report_import(module, result):
+        line = f"import {module:<17} {1e6 * result['seconds']:>12.2f}us"
+        before = baseline.get("imports", {}).get(module) if baseline else None
+        if before:
+            line += f" {result['seconds'] / before['seconds'] - 1:>+8.1%}"
+        print(line)
+
+    results = run_benchmarks(args.names, args.min_time, args.repeat, on_result=report)
+    failures = []
+    if args.imports or not args.names:
+        results["imports"] = run_import_checks(repeat=args.repeat, on_result=report_import)
+        failures = check_imports(results["imports"])
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+    if baseline is not None:
+        failures += [f"Regression: {regression}" for regression in compare(results, baseline, args.threshold)]
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
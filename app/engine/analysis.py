@@ -0,0 +1,152 @@
+"""
+Streaming multi-PV analysis, run with ``python -m app.engine.analysis`` to print it or record it as JSONL.
+
+An Analysis searches a position in a background thread and hands out an AnalysisInfo for every line of every
+completed depth as soon as it is found, through a plain iterator or an async one, so a consumer can show the
+best K moves while the search deepens. Records carry the fields of a UCI ``info`` line and format as one.
+Leaving the loop early, or calling stop(), ends the search.
+"""
+import argparse
+import asyncio
+import json
+import queue
+import threading
+from typing import List, NamedTuple
+
+from app.engine.search import Search, SearchLimits, SearchOptions
+from app.uci import format_info
+
+
+class AnalysisInfo(NamedTuple):
+    depth: int
+    multipv: int
+    score: int
+    pv: List[str]
+    nodes: int
+    nps: int
+    time: float = 0.0
+
+    @classmethod
+    def from_info(cls, info: dict) -> "AnalysisInfo":
+        """Converts a Search progress record."""
+        return cls(info["depth"], info.get("multipv", 1), info["score"], info["pv"], info["nodes"], info["nps"],
+                   info["time"])
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+    def uci(self) -> str:
+        """Formats the record as a UCI 'info' line."""
+        return format_info(self._asdict())
+
+
+class Analysis:
+    def __init__(self, fen: str, limits: SearchLimits = None, multipv: int = 1, options: SearchOptions = None,
+                 evaluator=None, tablebase=None):
+        """
+        Analysis of one position, started by iterating over it.
+
+        :param fen: Position to analyse.
+        :param limits: Limits of the search; without any it deepens until stopped.
+        :param multipv: Number of best moves to report at every depth.
+        :param options: Search techniques to use, all by default.
+        :param evaluator: Static evaluation for the search, see Search.
+        :param tablebase: Endgame tablebase for the search to probe.
+        """
+        self.fen = fen
+        self.limits = limits or SearchLimits()
+        self.multipv = multipv
+        self.options = options
+        self.evaluator = evaluator
+        self.tablebase = tablebase
+        self.best_move = None
+        self.score = None
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stops the search; the iteration ends after the records already found."""
+        self._stop.set()
+
+    def _run(self, put):
+        """Searches in the background thread, passing each record to put and None once it is done."""
+        from app.game.board import Board
+
+        try:
+            search = Search(Board(fen=self.fen), self.limits, should_stop=self._stop.is_set,
+                            on_info=lambda info: put(AnalysisInfo.from_info(info)), tablebase=self.tablebase,
+                            evaluator=self.evaluator, options=self.options, multipv=self.multipv)
+            move, self.score = search.run()
+            self.best_move = move.uci() if move else None
+        except Exception as error:
+            put(error)
+        put(None)
+
+    def _start(self, put) -> threading.Thread:
+        self._stop = threading.Event()
+        thread = threading.Thread(target=self._run, args=(put,), daemon=True)
+        thread.start()
+        return thread
+
+    def __iter__(self):
+        records = queue.Queue()
+        thread = self._start(records.put)
+        try:
+            while True:
+                record = records.get()
+                if record is None:
+                    break
+                if isinstance(record, Exception):
+                    raise record
+                yield record
+        finally:
+            self._stop.set()
+            thread.join()
+
+    async def _stream(self):
+        loop = asyncio.get_running_loop()
+        records = asyncio.Queue()
+        thread = self._start(lambda record: loop.call_soon_threadsafe(records.put_nowait, record))
+        try:
+            while True:
+                record = await records.get()
+                if record is None:
+                    break
+                if isinstance(record, Exception):
+                    raise record
+                yield record
+        finally:
+            self._stop.set()
+            await asyncio.to_thread(thread.join)
+
+    def __aiter__(self):
+        return self._stream()
+
+
+def main(argv=None):
+    from app.game.board import START_FEN
+
+    parser = argparse.ArgumentParser(description="Analyse a position, printing the best lines at every depth.")
+    parser.add_argument("fen", nargs="?", default=START_FEN)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--movetime", type=float, help="seconds to analyse for")
+    parser.add_argument("--multipv", type=int, default=3, help="number of best moves to report")
+    parser.add_argument("--jsonl", help="append the records to this JSONL file instead of printing info lines")
+    args = parser.parse_args(argv)
+
+    analysis = Analysis(args.fen, SearchLimits(depth=args.depth, movetime=args.movetime), multipv=args.multipv)
+    output = open(args.jsonl, "a") if args.jsonl else None
+    try:
+        for record in analysis:
+            if output is None:
+                print(record.uci(), flush=True)
+            else:
+                output.write(json.dumps(record.to_dict()) + "\n")
+                output.flush()
+    finally:
+        if output is not None:
+            output.close()
+    print(f"bestmove {analysis.best_move}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Vectorised evaluation of many positions at once, run with ``python -m app.engine.batch_eval``.
+
+Positions are packed into an (N, 64) int8 array of piece codes, square index row * 8 + col with row 0 the eighth
+rank, and an (N,) array that is 1 where black is to move. Code 0 is an empty square, 1 to 6 white pawn, knight,
+bishop, rook, queen and king, 7 to 12 the black pieces in the same order; to_planes() expands this into the
+(N, 12, 64) one-hot layout used for training data.
+
+evaluate_batch() computes the same material, piece-square, mobility and pawn structure terms as
+app.engine.evaluation with NumPy array operations and returns exactly the scores evaluate() gives one board at a
+time. Mobility gathers the rays of every knight, bishop, rook and queen in the batch at once and keeps the
+squares before the first blocker; pawn structure works on (N, 8, 8) pawn masks. The few positions whose material
+has an endgame handler (see app.engine.endgames) are set up on a board and evaluated one at a time.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.game import Colour
+from app.game.board import KNIGHT_JUMPS, ROOK_DIRECTIONS, BISHOP_DIRECTIONS
+from app.game.psqt import SQUARE_SCORES, PHASE_WEIGHTS, MAX_PHASE, unpack_score
+from app.engine import evaluation
+from app.engine.endgames import handlers as endgame_handlers
+from app.engine.pawns import PAWN_WEIGHTS
+from app.game.material import MATERIAL_UNITS
+
+PIECE_SYMBOLS = "pnbrqk"
+FEN_CODES = {symbol: code for code, symbol in enumerate("PNBRQK" + PIECE_SYMBOLS, 1)}
+EMPTY = 0
+# Padding square appended to every position, neither empty nor an enemy piece so rays and jumps stop there
+OFF_BOARD = 64
+
+# Material key unit of each piece code
+MATERIAL_KEY_UNITS = np.array([0] + [MATERIAL_UNITS[colour, symbol] for colour in (Colour.WHITE, Colour.BLACK)
+                                     for symbol in PIECE_SYMBOLS], dtype=np.int64)
+CODE_SYMBOLS = " " + "".join(FEN_CODES)
+
+# Positions evaluated per block, bounding the size of the intermediate ray arrays
+DEFAULT_BLOCK_SIZE = 2048
+
+
+def _piece_tables():
+    """Middlegame and endgame score tables indexed by [piece code, square], plus phase weights per code."""
+    middlegame = np.zeros((13, 64), dtype=np.int32)
+    endgame = np.zeros((13, 64), dtype=np.int32)
+    phase = np.zeros(13, dtype=np.int32)
+    for code in range(1, 13):
+        colour = Colour.WHITE if code <= 6 else Colour.BLACK
+        symbol = PIECE_SYMBOLS[(code - 1) % 6]
+        for square, score in enumerate(SQUARE_SCORES[colour, symbol]):
+            middlegame[code, square], endgame[code, square] = unpack_score(score)
+        phase[code] = PHASE_WEIGHTS[symbol]
+    return middlegame, endgame, phase
+
+
+def _targets(steps, sliding: bool) -> np.ndarray:
+    """Target squares of each step (or ray, for sliding pieces) from every square, padded with OFF_BOARD."""
+    length = 7 if sliding else 1
+    targets = np.full((64, len(steps), length), OFF_BOARD, dtype=np.int64)
+    for square in range(64):
+        for step, (row_step, col_step) in enumerate(steps):
+            row, col = square // 8 + row_step, square % 8 + col_step
+            distance = 0
+            while 0 <= row < 8 and 0 <= col < 8 and distance < length:
+                targets[square, step, distance] = row * 8 + col
+                row, col, distance = row + row_step, col + col_step, distance + 1
+    return targets
+
+
+def _mobility_tables():
+    """
+    Targets and weights of the mobile pieces, indexed by white piece code: (7, 64, 8, 7) targets padded with
+    OFF_BOARD, and the middlegame weight, endgame weight and average square count of each piece type.
+    """
+    targets = np.full((7, 64, 8, 7), OFF_BOARD, dtype=np.intp)
+    targets[2, :, :, :1] = _targets(KNIGHT_JUMPS, sliding=False)
+    targets[3, :, :4] = _targets(BISHOP_DIRECTIONS, sliding=True)
+    targets[4, :, :4] = _targets(ROOK_DIRECTIONS, sliding=True)
+    targets[5] = _targets(BISHOP_DIRECTIONS + ROOK_DIRECTIONS, sliding=True)
+    middlegame, endgame, average = (np.zeros(7, dtype=np.int64) for _ in range(3))
+    for code, symbol in enumerate(MOBILE_SYMBOLS, 2):
+        weight, average[code] = evaluation.MOBILITY_WEIGHTS[symbol]
+        middlegame[code], endgame[code] = unpack_score(weight)
+    return targets, middlegame, endgame, average
+
+
+def _pawn_tables():
+    """Middlegame and endgame weights of the pawn_counts() columns."""
+    weights = [PAWN_WEIGHTS["doubled"], PAWN_WEIGHTS["isolated"]] + PAWN_WEIGHTS["passed"]
+    middlegame, endgame = zip(*(unpack_score(weight) for weight in weights))
+    return np.array(middlegame, dtype=np.int64), np.array(endgame, dtype=np.int64)
+
+
+# Knight, bishop, rook and queen, whose white piece codes are 2 to 5
+MOBILE_SYMBOLS = "nbrq"
+# Whether each piece code is a knight, bishop, rook or queen
+MOBILE_CODES = np.isin(np.arange(13), (2, 3, 4, 5, 8, 9, 10, 11))
+
+_tables = None
+_tables_revision = None
+
+
+def weight_tables() -> dict:
+    """
+    Returns the evaluation weights as arrays, rebuilt whenever app.engine.evaluation.set_weights() changes them.
+
+    :return: Dict of "middlegame" and "endgame" (13, 64) score tables indexed by piece code and square, "phase"
+             weights by piece code, and mobility "targets", "mobility_middlegame", "mobility_endgame" and
+             "mobility_average", see _mobility_tables(), and "pawn_middlegame" and "pawn_endgame" weights of the
+             pawn_counts() columns.
+    """
+    global _tables, _tables_revision
+    if _tables_revision != evaluation.weights_revision:
+        middlegame, endgame, phase = _piece_tables()
+        targets, mobility_middlegame, mobility_endgame, mobility_average = _mobility_tables()
+        pawn_middlegame, pawn_endgame = _pawn_tables()
+        _tables = {"middlegame": middlegame, "endgame": endgame, "phase": phase, "targets": targets,
+                   "mobility_middlegame": mobility_middlegame, "mobility_endgame": mobility_endgame,
+                   "mobility_average": mobility_average, "pawn_middlegame": pawn_middlegame,
+                   "pawn_endgame": pawn_endgame}
+        _tables_revision = evaluation.weights_revision
+    return _tables
+
+
+def encode_fens(fens) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Packs positions given as FEN strings without building boards.
+
+    :param fens: FEN or EPD strings; only the placement and side to move fields are read.
+    :return: (N, 64) int8 piece codes and (N,) int8 side to move, 1 for black.
+    """
+    fens = list(fens)
+    squares = np.zeros((len(fens), 64), dtype=np.int8)
+    turns = np.zeros(len(fens), dtype=np.int8)
+    for index, fen in enumerate(fens):
+        fields = fen.split()
+        if len(fields) < 2:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        row = squares[index]
+        square = 0
+        for char in fields[0]:
+            if char == "/":
+                continue
+            if char.isdigit():
+                square += int(char)
+            else:
+                code = FEN_CODES.get(char)
+                if code is None or square > 63:
+                    raise ValueError(f"Invalid FEN: {fen!r}")
+                row[square] = code
+                square += 1
+        if square != 64:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        turns[index] = fields[1] == "b"
+    return squares, turns
+
+
+def encode_boards(boards) -> tuple[np.ndarray, np.ndarray]:
+    """Packs Board objects as encode_fens() does."""
+    boards = list(boards)
+    squares = np.zeros((len(boards), 64), dtype=np.int8)
+    turns = np.zeros(len(boards), dtype=np.int8)
+    for index, board in enumerate(boards):
+        for (row, col), piece in board.board.items():
+            squares[index, row * 8 + col] = FEN_CODES[piece.symbol if piece.colour == Colour.BLACK
+                                                      else piece.symbol.upper()]
+        turns[index] = board.turn == Colour.BLACK
+    return squares, turns
+
+
+def to_planes(squares: np.ndarray) -> np.ndarray:
+    """Expands (N, 64) piece codes into (N, 12, 64) int8 one-hot planes, one per piece type and colour."""
+    return (squares[:, None, :] == np.arange(1, 13, dtype=np.int8)[None, :, None]).astype(np.int8)
+
+
+def mobility_counts(squares: np.ndarray) -> np.ndarray:
+    """
+    Counts the mobility of the knights, bishops, rooks and queens of a block of positions.
+
+    Only the squares holding one of those pieces are looked at: their jumps or rays are gathered into a
+    (pieces, directions, length) array and a target counts when it is not held by the piece's own side and
+    every square before it along the ray is empty.
+
+    :param squares: (N, 64) int8 piece codes.
+    :return: (N, 4) int64 sums over the knights, bishops, rooks and queens of the squares each reaches less the
+             average for its type, white's pieces counting positive and black's negative.
+    """
+    tables = weight_tables()
+    count = len(squares)
+    padded = np.concatenate([squares, np.full((count, 1), OFF_BOARD, dtype=np.int8)], axis=1)
+    position, square = np.nonzero(MOBILE_CODES[squares])
+    codes = squares[position, square]
+    black = codes > 6
+    kinds = codes - 6 * black
+
+    occupants = padded[position[:, None, None], tables["targets"][kinds, square]]
+    empty = occupants == EMPTY
+    clear = np.ones_like(empty)
+    clear[..., 1:] = np.cumprod(empty[..., :-1], axis=-1, dtype=bool)
+    white_occupant = (occupants >= 1) & (occupants <= 6)
+    black_occupant = (occupants >= 7) & (occupants <= 12)
+    enemy = np.where(black[:, None, None], white_occupant, black_occupant)
+    reached = (clear & (empty | enemy)).sum(axis=(1, 2), dtype=np.int64)
+
+    signed = np.where(black, -1, 1) * (reached - tables["mobility_average"][kinds])
+    slots = position * len(MOBILE_SYMBOLS) + kinds - 2
+    counts = np.bincount(slots, signed, minlength=count * len(MOBILE_SYMBOLS))
+    return counts.astype(np.int64).reshape(count, len(MOBILE_SYMBOLS))
+
+
+def pawn_counts(squares: np.ndarray) -> np.ndarray:
+    """
+    Counts the pawn structure features of a block of positions, as app.engine.pawns.pawn_structure() scores them.
+
+    :param squares: (N, 64) int8 piece codes.
+    :return: (N, 10) int64 counts of doubled pawns, isolated pawns and passed pawns on each rank from their own
+             side, white's counting positive and black's negative.
+    """
+    count = len(squares)
+    grid = squares.reshape(count, 8, 8)
+    white, black = grid == FEN_CODES["P"], grid == FEN_CODES["p"]
+    rows = np.arange(8)[None, :, None]
+    counts = np.zeros((count, 10), dtype=np.int64)
+    for pawns, sign in ((white, 1), (black, -1)):
+        files = pawns.sum(axis=1, dtype=np.int64)
+        padded = np.pad(files, ((0, 0), (1, 1)))
+        counts[:, 0] += sign * np.maximum(files - 1, 0).sum(axis=1)
+        counts[:, 1] += sign * (files * ((padded[:, :-2] == 0) & (padded[:, 2:] == 0))).sum(axis=1)
+
+    def neighbouring(values, pad, reduce):
+        padded = np.pad(values, ((0, 0), (1, 1)), constant_values=pad)
+        return reduce(reduce(padded[:, :-2], padded[:, 1:-1]), padded[:, 2:])
+
+    # White pawns move towards row 0: passed when no black pawn on the same or a neighbouring file has a lower row
+    black_front = neighbouring(np.where(black, rows, 8).min(axis=1), 8, np.minimum)
+    white_front = neighbouring(np.where(white, rows, -1).max(axis=1), -1, np.maximum)
+    white_passed = (white & (black_front[:, None, :] >= rows)).sum(axis=2)
+    black_passed = (black & (white_front[:, None, :] <= rows)).sum(axis=2)
+    counts[:, 2:] = white_passed[:, ::-1] - black_passed
+    return counts
+
+
+def material_keys(squares: np.ndarray) -> np.ndarray:
+    """Returns the material key of each position, see app.game.material."""
+    return MATERIAL_KEY_UNITS[squares.astype(np.intp)].sum(axis=1)
+
+
+def decode_fen(codes: np.ndarray, turn: int) -> str:
+    """Returns the FEN of one packed position, without castling rights or en passant square."""
+    rows = []
+    for row in codes.reshape(8, 8):
+        text, empty = "", 0
+        for code in row:
+            if code == EMPTY:
+                empty += 1
+                continue
+            text += (str(empty) if empty else "") + CODE_SYMBOLS[code]
+            empty = 0
+        rows.append(text + (str(empty) if empty else ""))
+    return f"{'/'.join(rows)} {'b' if turn else 'w'} - - 0 1"
+
+
+def _handled(squares: np.ndarray) -> np.ndarray:
+    """Returns the indices of the positions whose material has an endgame handler."""
+    keys = material_keys(squares)
+    unique = np.unique(keys)
+    special = [key for key in unique.tolist() if endgame_handlers(key) != (None, None)]
+    return np.flatnonzero(np.isin(keys, special))
+
+
+def phases(squares: np.ndarray) -> np.ndarray:
+    """Returns the game phase of each position, at most MAX_PHASE."""
+    return np.minimum(weight_tables()["phase"][squares.astype(np.intp)].sum(axis=1), MAX_PHASE)
+
+
+def _evaluate_block(squares: np.ndarray, turns: np.ndarray) -> np.ndarray:
+    tables = weight_tables()
+    squares = squares.astype(np.int8)
+    codes = squares.astype(np.intp)
+    square_index = np.arange(64)
+    counts = mobility_counts(squares)
+    pawns = pawn_counts(squares)
+    middlegame = (tables["middlegame"][codes, square_index].sum(axis=1, dtype=np.int64)
+                  + counts @ tables["mobility_middlegame"][2:6] + pawns @ tables["pawn_middlegame"])
+    endgame = (tables["endgame"][codes, square_index].sum(axis=1, dtype=np.int64)
+               + counts @ tables["mobility_endgame"][2:6] + pawns @ tables["pawn_endgame"])
+    phase = phases(squares)
+    scores = (middlegame * phase + endgame * (MAX_PHASE - phase)) // MAX_PHASE
+    scores = np.where(turns.astype(bool), -scores, scores)
+    handled = _handled(squares)
+    if len(handled):
+        from app.game.board import Board
+
+        board = Board(fen=decode_fen(squares[handled[0]], turns[handled[0]]))
+        for index in handled:
+            board.set_fen(decode_fen(squares[index], turns[index]))
+            scores[index] = evaluation.evaluate(board)
+    return scores
+
+
+def evaluate_batch(squares: np.ndarray, turns: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+    """
+    Evaluates a batch of positions.
+
+    :param squares: (N, 64) piece codes from encode_fens() or encode_boards().
+    :param turns: (N,) side to move, 1 for black.
+    :param block_size: Positions evaluated at a time.
+    :return: (N,) int64 scores in centipawns from the side to move's point of view, equal to evaluate().
+    """
+    scores = np.empty(len(squares), dtype=np.int64)
+    for start in range(0, len(squares), block_size):
+        end = start + block_size
+        scores[start:end] = _evaluate_block(squares[start:end], turns[start:end])
+    return scores
+
+
+def evaluate_fens(fens) -> np.ndarray:
+    """Evaluates positions given as FEN strings, see evaluate_batch()."""
+    return evaluate_batch(*encode_fens(fens))
+
+
+def main(argv=None):
+    from app.game.epd import read_epd_file
+
+    parser = argparse.ArgumentParser(description="Evaluate the positions of an EPD or FEN file in one batch.")
+    parser.add_argument("positions", help="EPD or FEN file, one position per line")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="compare the throughput with evaluating one board at a time")
+    args = parser.parse_args(argv)
+
+    fens = [fen for fen, _ in read_epd_file(args.positions)]
+    start = time.perf_counter()
+    scores = evaluate_fens(fens)
+    batch_time = time.perf_counter() - start
+    if not args.benchmark:
+        for fen, score in zip(fens, scores):
+            print(f"{score:6d}  {fen}")
+        return
+
+    from app.engine.evaluation import evaluate
+    from app.game.board import Board
+
+    board = Board()
+    start = time.perf_counter()
+    for fen in fens:
+        board.set_fen(fen)
+        evaluate(board)
+    scalar_time = time.perf_counter() - start
+    print(f"{len(fens)} positions: batch {len(fens) / batch_time:,.0f}/s, "
+          f"one board at a time {len(fens) / scalar_time:,.0f}/s ({scalar_time / batch_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Specialised evaluation of recognised endgames, looked up by material key (see app.game.material).
+
+Each material key is classified once and the result cached, so recognising an endgame costs the evaluation a
+dict lookup rather than a count of the pieces. A key can have:
+
+- an evaluator, which replaces the normal evaluation: known draws (KvK, KBvK, KNvK) score 0, and KQvK and
+  KRvK score as won plus a mating-net term that drives the defending king to the edge and the attacking king
+  towards it, so the search finds the mate instead of wandering,
+- a scaler, which shrinks the normal evaluation towards a draw: bishops of opposite colours with only pawns
+  besides them halve it.
+
+is_known_draw() lets the search score the drawn keys without searching them.
+"""
+from app.game import Colour
+from app.game.material import SYMBOLS, material_key_of, piece_count
+
+# Scale factors are in 1/SCALE_NORMAL of the normal evaluation
+SCALE_NORMAL = 64
+OPPOSITE_BISHOPS_SCALE = 32
+
+# Score of a won endgame before the mating-net bonus, above any material count and below mate scores
+KNOWN_WIN = 10000
+
+# Keys scored as draws however the pieces stand
+DRAWN_KEYS = frozenset(material_key_of(white, black) for white, black in
+                       [("k", "k"), ("kb", "k"), ("k", "kb"), ("kn", "k"), ("k", "kn")])
+
+
+def _edge_distance(position: tuple[int, int]) -> int:
+    """Returns how many squares a position is from the nearest edge, 0 to 3."""
+    row, col = position
+    return min(row, 7 - row, col, 7 - col)
+
+
+def _king_distance(first: tuple[int, int], second: tuple[int, int]) -> int:
+    return max(abs(first[0] - second[0]), abs(first[1] - second[1]))
+
+
+def _draw(board) -> int:
+    return 0
+
+
+def _mating_net(strong: Colour, value: int):
+    """Returns an evaluator for the lone king endgame where strong has a piece worth value."""
+
+    def evaluate(board) -> int:
+        strong_king = board.find_king(strong)
+        weak_king = board.find_king(Colour.BLACK if strong == Colour.WHITE else Colour.WHITE)
+        score = (KNOWN_WIN + value + 40 * (3 - _edge_distance(weak_king))
+                 + 10 * (7 - _king_distance(strong_king, weak_king)))
+        return score if board.turn == strong else -score
+
+    return evaluate
+
+
+def _opposite_bishops(board) -> int:
+    colours = {(row + col) % 2 for (row, col), piece in board.board.items() if piece.symbol == "b"}
+    return OPPOSITE_BISHOPS_SCALE if len(colours) == 2 else SCALE_NORMAL
+
+
+def classify(key: int) -> tuple:
+    """
+    Finds the handlers of a material key.
+
+    :param key: Material key.
+    :return: (evaluator, scaler); either is None when it does not apply. An evaluator takes the board and
+             returns its score from the side to move's point of view, a scaler returns the factor, out of
+             SCALE_NORMAL, to apply to the normal evaluation.
+    """
+    if key in DRAWN_KEYS:
+        return _draw, None
+    sides = {colour: {symbol: piece_count(key, colour, symbol) for symbol in SYMBOLS if symbol != "k"}
+             for colour in (Colour.WHITE, Colour.BLACK)}
+    totals = {colour: sum(pieces.values()) for colour, pieces in sides.items()}
+    for strong, weak in ((Colour.WHITE, Colour.BLACK), (Colour.BLACK, Colour.WHITE)):
+        if totals[strong] == 1 and totals[weak] == 0:
+            for symbol, value in (("q", 900), ("r", 500)):
+                if sides[strong][symbol] == 1:
+                    return _mating_net(strong, value), None
+    if all(pieces["b"] == 1 and pieces["n"] == pieces["r"] == pieces["q"] == 0 for pieces in sides.values()):
+        return None, _opposite_bishops
+    return None, None
+
+
+_handlers = {}
+
+
+def handlers(key: int) -> tuple:
+    """Returns the cached classify() result of a material key."""
+    try:
+        return _handlers[key]
+    except KeyError:
+        result = _handlers[key] = classify(key)
+        return result
+
+
+def is_known_draw(key: int) -> bool:
+    """Returns whether a material key is drawn however the pieces stand."""
+    return key in DRAWN_KEYS
@@ -0,0 +1,195 @@
+"""
+Static evaluation of a position in centipawns.
+
+The score is the tapered sum of these terms, each with a middlegame and an endgame weight:
+
+- material and piece-square bonuses, kept up to date by the board (see app.game.psqt),
+- mobility: the squares each knight, bishop, rook and queen can move to that are not held by its own side,
+- pawn structure: doubled, isolated and passed pawns, cached by pawn key (see app.engine.pawns).
+
+The middlegame and endgame sums are blended by the game phase, so the evaluation moves smoothly from one to the
+other as pieces are traded. Recognised endgames, looked up by the board's material key, are scored or scaled by
+the handlers of app.engine.endgames instead. evaluate() runs at every leaf of the search and is kept as cheap as
+possible: material and piece-square scores are read from the board rather than recomputed, and pawn structure
+scores from the pawn hash table.
+
+The weights can be replaced with set_weights() or read from a JSON file written by save_weights(), such as the
+output of the tuner in app.engine.tuner. The file holds:
+
+- "material": [middlegame, endgame] value of each piece symbol,
+- "psqt": [middlegame table, endgame table] of each piece symbol, 64 values each from white's point of view
+  with rank 8 first,
+- "mobility": [middlegame weight, endgame weight, average square count] of n, b, r and q,
+- "pawns": [middlegame, endgame] weight of "doubled" and "isolated" pawns, and eight of them for "passed"
+  pawns, one per rank from the pawn's own side.
+"""
+import json
+
+from app.game import Colour
+from app.game.board import KNIGHT_JUMPS, ROOK_DIRECTIONS, BISHOP_DIRECTIONS
+from app.engine.endgames import SCALE_NORMAL, handlers as endgame_handlers
+from app.engine.pawns import PAWN_HASH, PAWN_WEIGHTS, pawn_structure
+from app.game.material import material_hash
+from app.game.psqt import psqt_scores, pack_score, unpack_score, set_tables, MATERIAL, TABLES, MAX_PHASE
+
+# Packed middlegame and endgame bonus per square a piece can move to, and the number of squares counted as
+# average so that a piece with fewer is penalised
+MOBILITY_WEIGHTS = {
+    "n": (pack_score(4, 4), 4),
+    "b": (pack_score(5, 5), 7),
+    "r": (pack_score(2, 4), 7),
+    "q": (pack_score(1, 2), 14),
+}
+
+
+def _rays(directions) -> dict:
+    """Lists the squares along each direction from every board position, nearest first."""
+    rays = {}
+    for row in range(8):
+        for col in range(8):
+            square_rays = []
+            for row_step, col_step in directions:
+                ray, target_row, target_col = [], row + row_step, col + col_step
+                while 0 <= target_row < 8 and 0 <= target_col < 8:
+                    ray.append((target_row, target_col))
+                    target_row, target_col = target_row + row_step, target_col + col_step
+                square_rays.append(ray)
+            rays[row, col] = square_rays
+    return rays
+
+
+KNIGHT_TARGETS = {
+    (row, col): [(row + dr, col + dc) for dr, dc in KNIGHT_JUMPS if 0 <= row + dr < 8 and 0 <= col + dc < 8]
+    for row in range(8) for col in range(8)
+}
+PIECE_RAYS = {
+    "b": _rays(BISHOP_DIRECTIONS),
+    "r": _rays(ROOK_DIRECTIONS),
+    "q": _rays(BISHOP_DIRECTIONS + ROOK_DIRECTIONS),
+}
+
+
+def mobility(board) -> int:
+    """
+    Scores the mobility of the knights, bishops, rooks and queens.
+
+    :param board: The board.
+    :return: Packed middlegame and endgame score from white's point of view.
+    """
+    get = board.board.get
+    score = 0
+    for position, piece in board.board.items():
+        symbol = piece.symbol
+        if symbol == "p" or symbol == "k":
+            continue
+        colour = piece.colour
+        count = 0
+        if symbol == "n":
+            for target in KNIGHT_TARGETS[position]:
+                blocker = get(target)
+                if blocker is None or blocker.colour != colour:
+                    count += 1
+        else:
+            for ray in PIECE_RAYS[symbol][position]:
+                for target in ray:
+                    blocker = get(target)
+                    if blocker is None:
+                        count += 1
+                        continue
+                    if blocker.colour != colour:
+                        count += 1
+                    break
+        weight, average = MOBILITY_WEIGHTS[symbol]
+        bonus = weight * (count - average)
+        score += bonus if colour == Colour.WHITE else -bonus
+    return score
+
+
+# Incremented whenever the weights change, so that copies of them (see app.engine.batch_eval) can be rebuilt
+weights_revision = 0
+
+
+def current_weights() -> dict:
+    """Returns the evaluation weights in the format of set_weights()."""
+    return {
+        "material": {symbol: list(MATERIAL[symbol]) for symbol in "pnbrqk"},
+        "psqt": {symbol: [list(TABLES[symbol][0]), list(TABLES[symbol][1])] for symbol in "pnbrqk"},
+        "mobility": {symbol: list(unpack_score(weight)) + [average]
+                     for symbol, (weight, average) in MOBILITY_WEIGHTS.items()},
+        "pawns": {"doubled": list(unpack_score(PAWN_WEIGHTS["doubled"])),
+                  "isolated": list(unpack_score(PAWN_WEIGHTS["isolated"])),
+                  "passed": [list(unpack_score(weight)) for weight in PAWN_WEIGHTS["passed"]]},
+    }
+
+
+def set_weights(weights: dict):
+    """
+    Replaces the evaluation weights. Boards keep the material and piece-square sums they were set up with, so
+    positions should be set up again with Board.set_fen() afterwards.
+
+    :param weights: Weights in the format described in the module documentation.
+    """
+    global weights_revision
+    material = {symbol: [int(value) for value in weights["material"][symbol]] for symbol in "pnbrqk"}
+    tables = {symbol: [[int(value) for value in table] for table in weights["psqt"][symbol]] for symbol in "pnbrqk"}
+    set_tables(material, tables)
+    for symbol, (middlegame, endgame, average) in weights["mobility"].items():
+        MOBILITY_WEIGHTS[symbol] = (pack_score(int(middlegame), int(endgame)), int(average))
+    if "pawns" in weights:
+        pawns = weights["pawns"]
+        if len(pawns["passed"]) != 8:
+            raise ValueError("The passed pawn weights need one value per rank")
+        PAWN_WEIGHTS["doubled"] = pack_score(*(int(value) for value in pawns["doubled"]))
+        PAWN_WEIGHTS["isolated"] = pack_score(*(int(value) for value in pawns["isolated"]))
+        PAWN_WEIGHTS["passed"] = [pack_score(int(middlegame), int(endgame))
+                                  for middlegame, endgame in pawns["passed"]]
+    PAWN_HASH.clear()
+    weights_revision += 1
+
+
+def load_weights(path: str):
+    """Reads evaluation weights from a JSON file and makes them current, see set_weights()."""
+    with open(path) as file:
+        set_weights(json.load(file))
+
+
+def save_weights(path: str, weights: dict = None):
+    """Writes evaluation weights, the current ones by default, to a JSON file."""
+    with open(path, "w") as file:
+        json.dump(weights or current_weights(), file)
+
+
+def taper(score: int, phase: int) -> int:
+    """Blends a packed score's middlegame and endgame parts by the game phase."""
+    middlegame, endgame = unpack_score(score)
+    phase = min(phase, MAX_PHASE)
+    return (middlegame * phase + endgame * (MAX_PHASE - phase)) // MAX_PHASE
+
+
+def evaluate(board, incremental: bool = True) -> int:
+    """
+    Evaluates a position.
+
+    :param board: The board.
+    :param incremental: Use the material key and sums kept by the board and the pawn hash table. False
+                        recomputes them from the pieces, which gives the same result and is meant for checking
+                        the incremental updates.
+    :return: Score in centipawns from the side to move's point of view.
+    """
+    evaluator, scaler = endgame_handlers(board.material_key if incremental else material_hash(board))
+    if evaluator is not None:
+        return evaluator(board)
+    if incremental:
+        score, phase = board.psqt_score, board.phase
+        score += PAWN_HASH.score(board)
+    else:
+        score, phase = psqt_scores(board)
+        score += pawn_structure(board)
+    value = taper(score + mobility(board), phase)
+    if scaler is not None:
+        value = int(value * scaler(board) / SCALE_NORMAL)
+    return value if board.turn == Colour.WHITE else -value
+
+
+# Weights the engine starts with, to go back to when a weights file is unloaded
+DEFAULT_WEIGHTS = current_weights()
@@ -0,0 +1,294 @@
+"""
+Mate solver using depth-first proof-number search, run with ``python -m app.engine.mate`` on an EPD file of
+puzzles.
+
+Proof-number search grows the game tree towards the line that looks cheapest to settle. Each node has a proof
+number, the fewest leaves that must be shown mates to prove the attacker mates from it, and a disproof number,
+the fewest that must be shown escapes to refute that. At the attacker's nodes the proof number is the
+smallest of the children's and the disproof number their sum; at the defender's it is the other way round.
+A forcing move leaves the defender few replies, so checks and mating nets get low proof numbers and are
+searched first, and quiet lines that give the defender many options are left alone.
+
+The depth-first variant (df-pn) keeps only the current path on the stack and stores the numbers of the nodes
+it leaves in a fixed-size ProofTable. It expands a child until the child's numbers pass thresholds derived
+from its siblings. Searches are bounded by the number of attacker moves allowed, which keeps the tree free of
+cycles and finds the shortest mate when the bound is raised one move at a time.
+"""
+import argparse
+import os
+import random
+import time
+from typing import List, Optional
+
+from app.engine.parallel import run_tasks
+from app.game.epd import position_id, read_epd_file
+from app.game.move import Move
+
+INFINITY = 10 ** 9
+DEFAULT_MAX_NODES = 1_000_000
+DEFAULT_TABLE_SIZE = 1 << 16
+
+# Mixed into the position key so one position is stored separately for each number of plies left
+_random = random.Random(2024)
+_PLY_KEYS = [_random.getrandbits(64) for _ in range(256)]
+
+
+class SolverStopped(Exception):
+    """Raised inside the solver when its node budget runs out."""
+
+
+class ProofTable:
+    def __init__(self, size: int = DEFAULT_TABLE_SIZE):
+        """
+        Fixed-size store of proof and disproof numbers, indexed by the low bits of the key. A new entry replaces
+        whatever was stored in its slot, so the memory used never grows.
+
+        :param size: Number of entries, a power of two.
+        """
+        if size <= 0 or size & (size - 1):
+            raise ValueError("The proof table size must be a power of two")
+        self._mask = size - 1
+        self._keys = [None] * size
+        self._numbers = [(1, 1)] * size
+
+    def lookup(self, key: int) -> tuple[int, int]:
+        """Returns the (phi, delta) stored for a key, (1, 1) for a node not searched yet."""
+        index = key & self._mask
+        return self._numbers[index] if self._keys[index] == key else (1, 1)
+
+    def store(self, key: int, phi: int, delta: int):
+        index = key & self._mask
+        self._keys[index] = key
+        self._numbers[index] = (phi, delta)
+
+
+class MateSolver:
+    def __init__(self, board, max_nodes: int = DEFAULT_MAX_NODES, table_size: int = DEFAULT_TABLE_SIZE):
+        """
+        Proves forced mates for the side to move.
+
+        Numbers are stored from the point of view of the side to move at each node: phi is the cost of proving
+        it gets its way (the attacker mates, or the defender escapes) and delta the cost of refuting that.
+
+        :param board: Position to solve. It is modified during the search and restored afterwards.
+        :param max_nodes: Node budget over all the searches of one solve(), 0 for none.
+        :param table_size: Entries in the proof table, a power of two.
+        """
+        self.board = board
+        self.max_nodes = max_nodes
+        self.table = ProofTable(table_size)
+        self.nodes = 0
+        self.exhausted = False
+        self._attacker = board.turn
+
+    def solve(self, max_moves: int) -> Optional[List[Move]]:
+        """
+        Looks for the shortest forced mate of at most max_moves moves by the side to move.
+
+        :param max_moves: Longest mate looked for, in the attacker's moves.
+        :return: The mating line, attacker's and defender's moves alternating and ending in mate, or None when
+                 there is no mate that short or the node budget ran out first (see exhausted).
+        """
+        self.nodes = 0
+        self.exhausted = False
+        self._attacker = self.board.turn
+        root_ply = len(self.board.move_history)
+        try:
+            for moves in range(1, max_moves + 1):
+                if self._prove(2 * moves - 1):
+                    return self._line(2 * moves - 1)
+        except SolverStopped:
+            self.exhausted = True
+            while len(self.board.move_history) > root_ply:
+                self.board.unmake_move()
+        return None
+
+    def _prove(self, plies: int) -> bool:
+        """Returns whether the attacker mates within plies from the current position."""
+        phi, delta = self._mid(plies, INFINITY, INFINITY)
+        attacker_to_move = self.board.turn == self._attacker
+        return (phi == 0) if attacker_to_move else (delta == 0)
+
+    def _line(self, plies: int) -> List[Move]:
+        """Follows a proven mate: the attacker's quickest mating move and the defender's longest defence."""
+        board = self.board
+        line = []
+        while True:
+            moves = board.legal_moves()
+            if not moves:
+                break
+            if board.turn == self._attacker:
+                chosen = self._quickest(moves, plies)
+            else:
+                chosen = self._longest(moves, plies)
+            move, plies = chosen
+            board.make_move(move)
+            line.append(move)
+        for _ in line:
+            board.unmake_move()
+        return line
+
+    def _quickest(self, moves: List[Move], plies: int) -> tuple[Move, int]:
+        for limit in range(1, plies + 1, 2):
+            for move in moves:
+                self.board.make_move(move)
+                proven = self._prove(limit - 1)
+                self.board.unmake_move()
+                if proven:
+                    return move, limit - 1
+        raise RuntimeError("The position was proven but no mating move was found")
+
+    def _longest(self, moves: List[Move], plies: int) -> tuple[Move, int]:
+        longest = None
+        for move in moves:
+            self.board.make_move(move)
+            limit = next(limit for limit in range(1, plies, 2) if self._prove(limit))
+            self.board.unmake_move()
+            if longest is None or limit > longest[1]:
+                longest = (move, limit)
+        return longest
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.max_nodes and self.nodes > self.max_nodes:
+            raise SolverStopped()
+
+    def _mid(self, plies: int, phi_threshold: int, delta_threshold: int) -> tuple[int, int]:
+        """
+        Searches the current position until its numbers reach the thresholds.
+
+        :param plies: Plies left for the attacker to mate in.
+        :return: (phi, delta) of the position.
+        """
+        self._count_node()
+        board = self.board
+        attacker_to_move = board.turn == self._attacker
+        key = board.zobrist_key ^ _PLY_KEYS[plies]
+
+        moves = board.legal_moves()
+        if not moves:
+            # Mated or stalemated: the attacker has won only if it is the defender who is mated
+            return self._terminal(key, not attacker_to_move and board.in_check(), attacker_to_move)
+        if plies <= 0:
+            return self._terminal(key, False, attacker_to_move)
+
+        children = []
+        for move in moves:
+            board.make_move(move)
+            # With one ply left, only a check can mate
+            if not attacker_to_move or plies > 1 or board.in_check():
+                children.append((move, board.zobrist_key ^ _PLY_KEYS[plies - 1]))
+            board.unmake_move()
+        if not children:
+            return self._terminal(key, False, attacker_to_move)
+
+        # Kept here as well as in the table, which may drop them
+        numbers = [self.table.lookup(child_key) for _, child_key in children]
+        while True:
+            phi, delta, best, second = INFINITY, 0, 0, INFINITY
+            for index, (child_phi, child_delta) in enumerate(numbers):
+                delta = min(INFINITY, delta + child_phi)
+                if child_delta < phi:
+                    phi, second, best = child_delta, phi, index
+                elif child_delta < second:
+                    second = child_delta
+            if phi >= phi_threshold or delta >= delta_threshold:
+                self.table.store(key, phi, delta)
+                return phi, delta
+
+            child_phi = numbers[best][0]
+            child_phi_threshold = min(INFINITY, delta_threshold - delta + child_phi)
+            child_delta_threshold = min(phi_threshold, second + 1)
+            board.make_move(children[best][0])
+            numbers[best] = self._mid(plies - 1, child_phi_threshold, child_delta_threshold)
+            board.unmake_move()
+
+    def _terminal(self, key: int, attacker_won: bool, attacker_to_move: bool) -> tuple[int, int]:
+        """Stores and returns the numbers of a settled position."""
+        numbers = (0, INFINITY) if attacker_won == attacker_to_move else (INFINITY, 0)
+        self.table.store(key, *numbers)
+        return numbers
+
+
+def mate_length(operations: dict) -> Optional[int]:
+    """Returns the mate length of an EPD 'dm' (direct mate) operation, if present."""
+    return int(operations["dm"][0]) if operations.get("dm") else None
+
+
+def solve_puzzle(task: dict) -> dict:
+    """
+    Solves one puzzle. Runs inside a worker process.
+
+    :param task: Dict with the puzzle's index, id, FEN, best moves in SAN, mate length to look for and limits.
+    :return: The result record.
+    """
+    from app.game.board import Board
+    from app.game.pgn import parse_san
+
+    board = Board(fen=task["fen"])
+    solver = MateSolver(board, max_nodes=task["max_nodes"], table_size=task["table_size"])
+    start = time.perf_counter()
+    line = solver.solve(task["max_moves"])
+    elapsed = time.perf_counter() - start
+
+    solved = line is not None
+    if solved and task["best_moves"]:
+        solved = line[0] in [parse_san(board, san) for san in task["best_moves"]]
+    if solved and task["mate"] is not None:
+        solved = (len(line) + 1) // 2 <= task["mate"]
+    return {"index": task["index"], "id": task["id"], "solved": solved,
+            "line": [move.uci() for move in line] if line else None,
+            "mate": (len(line) + 1) // 2 if line else None, "nodes": solver.nodes, "time": elapsed,
+            "exhausted": solver.exhausted}
+
+
+def make_tasks(positions: list, max_moves: int, max_nodes: int, table_size: int) -> list:
+    """Creates the puzzle tasks of an EPD file read with app.game.epd.read_epd_file()."""
+    tasks = []
+    for index, (fen, operations) in enumerate(positions):
+        mate = mate_length(operations)
+        tasks.append({"index": index, "id": position_id(operations, index), "fen": fen,
+                      "best_moves": operations.get("bm", []), "mate": mate, "max_moves": mate or max_moves,
+                      "max_nodes": max_nodes, "table_size": table_size})
+    return tasks
+
+
+def run_puzzles(tasks: list, concurrency: int = None, on_result=None) -> list:
+    """
+    Solves the puzzles across a process pool.
+
+    :param tasks: Puzzles created by make_tasks().
+    :param concurrency: Number of worker processes, defaults to the number of CPUs. With 1, the puzzles are
+                        solved in this process.
+    :param on_result: Optional callback receiving every record as it finishes.
+    :return: The result records in puzzle order.
+    """
+    return run_tasks(solve_puzzle, tasks, concurrency, on_result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve mate puzzles from an EPD file with proof-number search.")
+    parser.add_argument("puzzles", help="EPD file; 'dm' gives the mate length and 'bm' the first move")
+    parser.add_argument("--max-moves", type=int, default=5, help="longest mate looked for without a dm operation")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_MAX_NODES, help="node budget per puzzle, 0 for none")
+    parser.add_argument("--table-size", type=int, default=DEFAULT_TABLE_SIZE)
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    tasks = make_tasks(read_epd_file(args.puzzles), args.max_moves, args.nodes, args.table_size)
+
+    def report(record):
+        outcome = "solved" if record["solved"] else ("budget exhausted" if record["exhausted"] else "not solved")
+        line = " ".join(record["line"]) if record["line"] else "-"
+        print(f"{record['id']}: {outcome} in {record['time']:.2f}s, {record['nodes']} nodes, {line}")
+
+    start = time.perf_counter()
+    records = run_puzzles(tasks, args.concurrency, on_result=report)
+    solved = sum(record["solved"] for record in records)
+    average = sum(record["time"] for record in records) / len(records) if records else 0.0
+    print(f"Solved {solved}/{len(records)} ({solved / max(len(records), 1):.0%}), {average:.2f}s per puzzle, "
+          f"{time.perf_counter() - start:.1f}s with {args.concurrency} workers")
+
+
+if __name__ == "__main__":
+    main()
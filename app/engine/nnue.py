@@ -0,0 +1,292 @@
+"""
+Efficiently updatable neural network evaluation, run with ``python -m app.engine.nnue``.
+
+The network has two layers. The first maps 768 binary inputs, one per piece type, colour and square, to an
+accumulator of hidden_size int16 values. It is computed twice, from white's and from black's point of view (the
+board flipped and the colours swapped), with the same weights. The output layer takes the side to move's
+accumulator followed by the other side's, clipped to 0..QA, and gives the score in centipawns.
+
+Because a move only switches a few inputs on and off, an accumulator is updated by adding and subtracting the
+weight rows of the pieces that moved rather than summed from scratch. NNUEEvaluator keeps one accumulator, both
+halves, per ply of the board's move history. The updates are made lazily when a position is evaluated, from
+the deepest ply whose position still matches, so moves that are made and unmade without evaluating (legal move
+generation, for instance) cost nothing.
+
+Weights are quantised: first layer weights and biases are scaled by QA and stored as int16, output weights are
+scaled by QB and stored as int16, and the output bias is scaled by QA * QB and stored as int32. Weight files
+start with the header magic ``CHNN``, version (u16), reserved (u16) and hidden size (u32), followed by the
+arrays in that order, all little-endian.
+"""
+import argparse
+import random
+import struct
+import time
+
+import numpy as np
+
+from app.game import Colour
+
+MAGIC = b"CHNN"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+
+INPUTS = 768
+DEFAULT_HIDDEN_SIZE = 128
+# Quantisation scales of the first and the output layer, and the centipawns per unit of network output
+QA = 255
+QB = 64
+SCALE = 400
+
+# Earlier plies whose accumulators are rebuilt when the current position has to be computed from scratch
+REFRESH_PLIES = 32
+
+PIECE_INDEX = {symbol: index for index, symbol in enumerate("pnbrqk")}
+
+
+def feature(perspective: Colour, colour: Colour, symbol: str, position: tuple[int, int]) -> int:
+    """
+    Returns the input index of a piece seen from one side: its own pieces come first, and black sees the board
+    upside down.
+    """
+    square = position[0] * 8 + position[1]
+    if perspective == Colour.BLACK:
+        square ^= 56
+    return (0 if colour == perspective else 384) + PIECE_INDEX[symbol] * 64 + square
+
+
+def piece_index(colour: Colour, symbol: str, position: tuple[int, int]) -> int:
+    """Returns the row of Network.piece_weights for a piece on a square, which is its input index for white."""
+    return (0 if colour is Colour.WHITE else 384) + PIECE_INDEX[symbol] * 64 + position[0] * 8 + position[1]
+
+
+class Network:
+    def __init__(self, feature_weights: np.ndarray, feature_bias: np.ndarray, output_weights: np.ndarray,
+                 output_bias: int):
+        """
+        Quantised network weights.
+
+        :param feature_weights: (INPUTS, hidden size) int16 first layer weights.
+        :param feature_bias: (hidden size,) int16 first layer bias.
+        :param output_weights: (2 * hidden size,) int16 output weights, side to move's half first.
+        :param output_bias: Output bias.
+        """
+        self.hidden_size = feature_bias.shape[0]
+        self.feature_weights = np.ascontiguousarray(feature_weights, dtype=np.int16)
+        self.feature_bias = np.asarray(feature_bias, dtype=np.int16)
+        self.output_weights = np.asarray(output_weights, dtype=np.int16)
+        self.output_bias = int(output_bias)
+
+        # Accumulators hold white's and black's halves as the rows of one (2, hidden size) array, so a piece
+        # moving updates both with a single addition of its row of piece_weights
+        pieces = np.arange(INPUTS)
+        black_features = (384 - pieces // 384 * 384) + pieces % 384 // 64 * 64 + (pieces % 64 ^ 56)
+        self.piece_weights = np.stack([self.feature_weights, self.feature_weights[black_features]], axis=1)
+        self.bias = np.stack([self.feature_bias, self.feature_bias])
+        us, them = self.output_weights[:self.hidden_size], self.output_weights[self.hidden_size:]
+        self._output_weights = {Colour.WHITE: np.concatenate([us, them]).astype(np.int32),
+                                Colour.BLACK: np.concatenate([them, us]).astype(np.int32)}
+
+    @classmethod
+    def from_float(cls, feature_weights, feature_bias, output_weights, output_bias: float) -> "Network":
+        """Quantises floating point weights, such as those of a trained model."""
+        return cls(np.round(np.asarray(feature_weights) * QA).astype(np.int16),
+                   np.round(np.asarray(feature_bias) * QA).astype(np.int16),
+                   np.round(np.asarray(output_weights) * QB).astype(np.int16),
+                   round(output_bias * QA * QB))
+
+    @classmethod
+    def random(cls, hidden_size: int = DEFAULT_HIDDEN_SIZE, seed: int = 0) -> "Network":
+        """Creates an untrained network with small random weights, for testing and benchmarking."""
+        rng = np.random.default_rng(seed)
+        return cls.from_float(rng.normal(0, 0.05, (INPUTS, hidden_size)), rng.uniform(0, 0.5, hidden_size),
+                              rng.normal(0, 1.0, 2 * hidden_size), 0.0)
+
+    @classmethod
+    def load(cls, path: str) -> "Network":
+        """Reads a weight file."""
+        with open(path, "rb") as file:
+            magic, version, _, hidden_size = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} network file")
+            feature_weights = np.fromfile(file, dtype="<i2", count=INPUTS * hidden_size)
+            feature_bias = np.fromfile(file, dtype="<i2", count=hidden_size)
+            output_weights = np.fromfile(file, dtype="<i2", count=2 * hidden_size)
+            output_bias = np.fromfile(file, dtype="<i4", count=1)
+        if output_bias.shape != (1,):
+            raise ValueError(f"{path} is truncated")
+        return cls(feature_weights.reshape(INPUTS, hidden_size), feature_bias, output_weights, output_bias[0])
+
+    def save(self, path: str):
+        """Writes a weight file."""
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, 0, self.hidden_size))
+            file.write(self.feature_weights.astype("<i2").tobytes())
+            file.write(self.feature_bias.astype("<i2").tobytes())
+            file.write(self.output_weights.astype("<i2").tobytes())
+            file.write(np.array([self.output_bias], dtype="<i4").tobytes())
+
+    def accumulator(self, board) -> np.ndarray:
+        """Computes the (2, hidden size) accumulator of a position from scratch, white's half first."""
+        pieces = [piece_index(piece.colour, piece.symbol, position) for position, piece in board.board.items()]
+        return self.bias + self.piece_weights[pieces].sum(axis=0, dtype=np.int16)
+
+    def output(self, accumulator: np.ndarray, turn: Colour) -> int:
+        """Runs the output layer on an accumulator, returning centipawns for the side to move."""
+        hidden = np.minimum(np.maximum(accumulator, 0), QA).ravel()
+        total = int(np.dot(hidden, self._output_weights[turn])) + self.output_bias
+        return total * SCALE // (QA * QB)
+
+
+class NNUEEvaluator:
+    def __init__(self, network: Network):
+        """
+        Evaluates boards with a network, updating the accumulators incrementally along the board's move history.
+        Call it like app.engine.evaluation.evaluate().
+
+        :param network: The network.
+        """
+        self.network = network
+        # (position key, accumulator) for plies _base, _base + 1, ...
+        self._stack = []
+        self._base = 0
+        self.refreshes = 0
+        self.updates = 0
+
+    def evaluate(self, board) -> int:
+        """
+        Evaluates a position.
+
+        :param board: The board.
+        :return: Score in centipawns from the side to move's point of view.
+        """
+        return self.network.output(self._accumulator(board), board.turn)
+
+    __call__ = evaluate
+
+    def evaluate_full(self, board) -> int:
+        """Evaluates a position with the accumulator computed from scratch, to check the incremental updates."""
+        return self.network.output(self.network.accumulator(board), board.turn)
+
+    def _accumulator(self, board) -> np.ndarray:
+        ply, stack, base = board.ply, self._stack, self._base
+        # Deepest ply of the current move history whose position is still on the stack
+        known = min(ply, base + len(stack) - 1)
+        while known >= base and stack[known - base][0] != board.history_key(known):
+            known -= 1
+        if known < base:
+            self._refresh(board)
+            return self._stack[-1][1]
+
+        del stack[known - base + 1:]
+        for move_ply in range(known, ply):
+            removed, added = board.piece_changes(move_ply)
+            stack.append((board.history_key(move_ply + 1), self._update(stack[-1][1], removed, added)))
+            self.updates += 1
+        return stack[-1][1]
+
+    def _update(self, accumulator: np.ndarray, removed: list, added: list) -> np.ndarray:
+        """Returns a new accumulator with the removed pieces taken off and the added ones put on."""
+        weights = self.network.piece_weights
+        for colour, symbol, position in added:
+            accumulator = accumulator + weights[piece_index(colour, symbol, position)]
+        for colour, symbol, position in removed:
+            accumulator = accumulator - weights[piece_index(colour, symbol, position)]
+        return accumulator
+
+    def _refresh(self, board):
+        """
+        Computes the current accumulator from scratch, then those of the earlier plies by undoing the moves'
+        changes, so that other lines branching off the same history can still be updated incrementally.
+        """
+        self.refreshes += 1
+        ply = board.ply
+        accumulator = self.network.accumulator(board)
+        stack = [(board.zobrist_key, accumulator)]
+        self._base = max(0, ply - REFRESH_PLIES)
+        for move_ply in range(ply - 1, self._base - 1, -1):
+            removed, added = board.piece_changes(move_ply)
+            accumulator = self._update(accumulator, added, removed)
+            stack.append((board.history_key(move_ply), accumulator))
+        stack.reverse()
+        self._stack = stack
+
+
+def benchmark(evaluator, fens, plies: int = 4, seed: int = 0) -> float:
+    """
+    Measures the cost of evaluating along random move sequences, as a search does at its leaves.
+
+    :param evaluator: Evaluation function taking a board.
+    :param fens: Starting positions.
+    :param plies: Moves made from each position, evaluating after every one.
+    :param seed: Seed of the random move choice, so every evaluator sees the same positions.
+    :return: Average microseconds per evaluation, including the make and unmake of the moves.
+    """
+    from app.game.board import Board
+
+    rng = random.Random(seed)
+    board = Board()
+    elapsed, calls = 0.0, 0
+    for fen in fens:
+        board.set_fen(fen)
+        lines = []
+        for _ in range(8):
+            line = []
+            for _ in range(plies):
+                moves = board.legal_moves()
+                if not moves:
+                    break
+                line.append(rng.choice(moves))
+                board.make_move(line[-1])
+            while board.ply:
+                board.unmake_move()
+            lines.append(line)
+        start = time.perf_counter()
+        for line in lines:
+            for move in line:
+                board.make_move(move)
+                evaluator(board)
+            for _ in line:
+                board.unmake_move()
+        elapsed += time.perf_counter() - start
+        calls += sum(len(line) for line in lines)
+    return 1e6 * elapsed / max(calls, 1)
+
+
+def main(argv=None):
+    from app.engine.evaluation import evaluate
+
+    parser = argparse.ArgumentParser(description="Create and benchmark network weight files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("random", help="write an untrained network with random weights")
+    create.add_argument("path")
+    create.add_argument("--hidden", type=int, default=DEFAULT_HIDDEN_SIZE, help="accumulator size")
+    create.add_argument("--seed", type=int, default=0)
+    bench = commands.add_parser("bench", help="compare the cost per evaluation with the classical evaluation")
+    bench.add_argument("weights", nargs="?", help="weight file, defaults to a random network")
+    bench.add_argument("--hidden", type=int, default=DEFAULT_HIDDEN_SIZE, help="accumulator size of the random network")
+    bench.add_argument("--plies", type=int, default=4, help="moves made from each position")
+    args = parser.parse_args(argv)
+
+    if args.command == "random":
+        Network.random(args.hidden, args.seed).save(args.path)
+        print(f"Wrote a random network with {args.hidden} hidden units to {args.path}")
+        return
+
+    from app.game.board import START_FEN
+
+    network = Network.load(args.weights) if args.weights else Network.random(args.hidden)
+    fens = [START_FEN,
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+            "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP1B1PPP/R2QKB1R w KQ - 0 8",
+            "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"]
+    evaluator = NNUEEvaluator(network)
+    classical = benchmark(evaluate, fens, args.plies)
+    incremental = benchmark(evaluator, fens, args.plies)
+    full = benchmark(evaluator.evaluate_full, fens, args.plies)
+    print(f"classical {classical:.1f}us, network {incremental:.1f}us incremental, {full:.1f}us from scratch "
+          f"per evaluation ({network.hidden_size} hidden units, {evaluator.refreshes} refreshes, "
+          f"{evaluator.updates} updates)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import multiprocessing
+import os
+
+
+def run_tasks(function, tasks: list, concurrency: int = None, on_result=None) -> list:
+    """
+    Runs a function over tasks across a process pool, for the batch runners working through EPD files.
+
+    :param function: Module-level function taking a task dict and returning a record dict with its "index".
+    :param tasks: Task dicts, each with an "index".
+    :param concurrency: Number of worker processes, defaults to the number of CPUs. With 1, the tasks are run in
+                        this process.
+    :param on_result: Optional callback receiving every record as it finishes.
+    :return: The records in task order.
+    """
+    records = []
+    if concurrency == 1:
+        results = map(function, tasks)
+        for record in results:
+            records.append(record)
+            if on_result is not None:
+                on_result(record)
+    else:
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(concurrency or os.cpu_count()) as pool:
+            for record in pool.imap_unordered(function, tasks):
+                records.append(record)
+                if on_result is not None:
+                    on_result(record)
+    return sorted(records, key=lambda record: record["index"])
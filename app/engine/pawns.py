@@ -0,0 +1,136 @@
+"""
+Pawn structure evaluation and the pawn hash table, run with ``python -m app.engine.pawns`` to measure hit rates.
+
+The structure terms, each with a middlegame and an endgame weight packed as in app.game.psqt:
+
+- doubled pawns: every pawn beyond the first on a file,
+- isolated pawns: pawns with no pawn of their own side on either neighbouring file,
+- passed pawns: pawns with no enemy pawn ahead of them on their own or a neighbouring file, rewarded by rank.
+
+They depend on the pawns alone, which only change on pawn moves, promotions and pawn captures, so their sum is
+cached in a PawnHashTable indexed by the board's pawn key (see app.game.zobrist.pawn_hash()). Most positions
+in a search share their pawns with many others and find their score there.
+"""
+import argparse
+import time
+
+from app.game import Colour
+from app.game.psqt import pack_score
+
+# Packed penalties per doubled and isolated pawn, and bonuses per passed pawn by rank from its own side,
+# index 1 for the second rank; pawns never stand on the first or last rank
+PAWN_WEIGHTS = {
+    "doubled": pack_score(-10, -20),
+    "isolated": pack_score(-10, -15),
+    "passed": [pack_score(middlegame, endgame) for middlegame, endgame in
+               [(0, 0), (0, 5), (5, 10), (10, 20), (20, 35), (35, 60), (55, 90), (0, 0)]],
+}
+
+DEFAULT_TABLE_SIZE = 1 << 14
+
+
+def pawn_structure(board) -> int:
+    """
+    Scores the pawn structure.
+
+    :param board: The board.
+    :return: Packed middlegame and endgame score from white's point of view.
+    """
+    white_files = [[] for _ in range(8)]
+    black_files = [[] for _ in range(8)]
+    for (row, col), piece in board.board.items():
+        if piece.symbol == "p":
+            (white_files if piece.colour == Colour.WHITE else black_files)[col].append(row)
+
+    doubled, isolated, passed = PAWN_WEIGHTS["doubled"], PAWN_WEIGHTS["isolated"], PAWN_WEIGHTS["passed"]
+    score = 0
+    for col in range(8):
+        white_rows, black_rows = white_files[col], black_files[col]
+        if not white_rows and not black_rows:
+            continue
+        neighbours = range(max(col - 1, 0), min(col + 2, 8))
+        if white_rows:
+            score += doubled * (len(white_rows) - 1)
+            if not any(white_files[file] for file in neighbours if file != col):
+                score += isolated * len(white_rows)
+            # White pawns move towards row 0
+            front = min((row for file in neighbours for row in black_files[file]), default=8)
+            for row in white_rows:
+                if front >= row:
+                    score += passed[7 - row]
+        if black_rows:
+            score -= doubled * (len(black_rows) - 1)
+            if not any(black_files[file] for file in neighbours if file != col):
+                score -= isolated * len(black_rows)
+            front = max((row for file in neighbours for row in white_files[file]), default=-1)
+            for row in black_rows:
+                if front <= row:
+                    score -= passed[row]
+    return score
+
+
+class PawnHashTable:
+    def __init__(self, size: int = DEFAULT_TABLE_SIZE):
+        """
+        Fixed-size cache of pawn structure scores, indexed by the low bits of the pawn key. A new entry
+        replaces whatever was stored in its slot.
+
+        :param size: Number of entries, a power of two.
+        """
+        if size <= 0 or size & (size - 1):
+            raise ValueError("The pawn hash table size must be a power of two")
+        self._mask = size - 1
+        self._keys = [None] * size
+        self._scores = [0] * size
+        self.probes = 0
+        self.hits = 0
+
+    def score(self, board) -> int:
+        """Returns the pawn structure score of a position, see pawn_structure(), computing it on a miss."""
+        key = board.pawn_key
+        index = key & self._mask
+        self.probes += 1
+        if self._keys[index] == key:
+            self.hits += 1
+            return self._scores[index]
+        score = pawn_structure(board)
+        self._keys[index] = key
+        self._scores[index] = score
+        return score
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of probes answered from the table."""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def clear(self):
+        """Removes every entry, e.g. after the weights change, and resets the counters."""
+        self._keys = [None] * len(self._keys)
+        self.probes = self.hits = 0
+
+
+# Table used by app.engine.evaluation.evaluate()
+PAWN_HASH = PawnHashTable()
+
+
+def main(argv=None):
+    # The table evaluate() uses, not this module's copy when run as __main__
+    from app.engine.pawns import PAWN_HASH
+    from app.engine.search import Search, SearchLimits
+    from app.game.board import Board, START_FEN
+
+    parser = argparse.ArgumentParser(description="Search a position and report the pawn hash table hit rate.")
+    parser.add_argument("fen", nargs="?", default=START_FEN)
+    parser.add_argument("--depth", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    PAWN_HASH.clear()
+    search = Search(Board(fen=args.fen), SearchLimits(depth=args.depth))
+    start = time.perf_counter()
+    search.run()
+    print(f"{search.nodes} nodes in {time.perf_counter() - start:.2f}s, {PAWN_HASH.probes} pawn probes, "
+          f"hit rate {PAWN_HASH.hit_rate:.1%}")
+
+
+if __name__ == "__main__":
+    main()
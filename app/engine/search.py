@@ -0,0 +1,415 @@
+"""
+Iterative deepening alpha-beta search, run with ``python -m app.engine.search`` to benchmark its pruning.
+
+On top of plain alpha-beta the search uses these techniques, each switchable with SearchOptions:
+
+- principal variation search: moves after the first are searched with a null window, proving they are no
+  better, and only re-searched with the full window when they are,
+- aspiration windows: each iteration starts with a narrow window around the previous score, widened on a
+  fail,
+- null-move pruning: passing the turn and still failing high at reduced depth cuts the node; skipped when
+  the side to move has only pawns, where passing could be better than any move (zugzwang),
+- late move reductions: quiet moves ordered late are searched at reduced depth first,
+- futility pruning: near the leaves, quiet moves are skipped when the static evaluation is too far below
+  alpha for them to catch up,
+- razoring: near the leaves, a position far below alpha goes straight to the quiescence search.
+"""
+import argparse
+import time
+from typing import Callable, List, Optional
+
+from app.engine.endgames import is_known_draw
+from app.engine.evaluation import evaluate
+from app.engine.timeman import TimeManager
+from app.game.board import Board
+from app.game.material import NON_PAWN_MASKS
+from app.game.move import Move
+
+PIECE_VALUES = {"p": 100, "n": 320, "b": 330, "r": 500, "q": 900, "k": 0}
+
+MATE_SCORE = 100000
+INFINITY = 1000000
+
+# How often, in nodes, the search checks its limits and the stop flag
+CHECK_INTERVAL = 256
+
+# Half width of the first aspiration window, and the depth from which windows are used
+ASPIRATION_WINDOW = 50
+ASPIRATION_MIN_DEPTH = 3
+# Null-move pruning is tried from this depth, with the depth reduced by NULL_MOVE_REDUCTION more
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+# Quiet moves after the first LMR_MIN_MOVES are reduced from this depth, by one more ply after LMR_LATE_MOVES
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVES = 3
+LMR_LATE_MOVES = 8
+# Margins by remaining depth for futility pruning and razoring
+FUTILITY_MARGINS = {1: 150, 2: 300}
+RAZOR_MARGINS = {1: 250, 2: 450}
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when a limit is reached or a stop is requested."""
+
+
+class SearchLimits:
+    def __init__(self, depth: int = None, nodes: int = None, movetime: float = None, soft_time: float = None):
+        """
+        Limits for a single search. Any combination may be given; the search stops at whichever is hit first.
+
+        :param depth: Maximum iterative deepening depth.
+        :param nodes: Maximum number of nodes searched.
+        :param movetime: Maximum thinking time in seconds, the hard deadline.
+        :param soft_time: Seconds after which no new iteration is started, stretched on a fail low and shrunk
+                          once the best move is stable (see app.engine.timeman).
+        """
+        self.depth = depth
+        self.nodes = nodes
+        self.movetime = movetime
+        self.soft_time = soft_time
+
+    def to_dict(self) -> dict:
+        return {"depth": self.depth, "nodes": self.nodes, "movetime": self.movetime, "soft_time": self.soft_time}
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "SearchLimits":
+        return cls(**values)
+
+
+class SearchOptions:
+    NAMES = ("pvs", "aspiration", "null_move", "lmr", "futility", "razoring")
+
+    def __init__(self, pvs: bool = True, aspiration: bool = True, null_move: bool = True, lmr: bool = True,
+                 futility: bool = True, razoring: bool = True):
+        """
+        Switches for the search techniques described in the module documentation, all on by default.
+
+        :param pvs: Principal variation search.
+        :param aspiration: Aspiration windows.
+        :param null_move: Null-move pruning.
+        :param lmr: Late move reductions.
+        :param futility: Futility pruning.
+        :param razoring: Razoring.
+        """
+        self.pvs = pvs
+        self.aspiration = aspiration
+        self.null_move = null_move
+        self.lmr = lmr
+        self.futility = futility
+        self.razoring = razoring
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.NAMES}
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "SearchOptions":
+        return cls(**values)
+
+    @classmethod
+    def none(cls) -> "SearchOptions":
+        """Returns options with every technique off: plain alpha-beta."""
+        return cls(**{name: False for name in cls.NAMES})
+
+
+class Search:
+    """
+    Iterative deepening alpha-beta search with a capture-only quiescence search and the selective techniques
+    enabled in its SearchOptions.
+    """
+
+    def __init__(self, board: Board, limits: SearchLimits = None, should_stop: Callable[[], bool] = None,
+                 on_info: Callable[[dict], None] = None, tablebase=None, evaluator: Callable[[Board], int] = None,
+                 options: SearchOptions = None, multipv: int = 1):
+        """
+        :param board: Position to search. It is modified during the search and restored afterwards.
+        :param limits: Depth, node and time limits.
+        :param should_stop: Polled during the search; returning True aborts it.
+        :param on_info: Called with a progress record after every completed depth, once per line with multipv.
+        :param tablebase: Optional app.engine.tablebase.Tablebase giving exact scores once few pieces are left.
+        :param evaluator: Static evaluation used at the leaves, such as an app.engine.nnue.NNUEEvaluator;
+                          defaults to app.engine.evaluation.evaluate().
+        :param options: Search techniques to use, all by default.
+        :param multipv: Number of best moves to find, each with its own score and principal variation. Every
+                        line after the first is searched with the moves of the lines above it excluded at the
+                        root.
+        """
+        self.board = board
+        self.limits = limits or SearchLimits()
+        self.should_stop = should_stop
+        self.on_info = on_info
+        self.tablebase = tablebase
+        self.evaluate = evaluator or evaluate
+        self.options = options or SearchOptions()
+        self.multipv = max(1, multipv)
+        self.lines = []
+        self._excluded = ()
+        self.nodes = 0
+        self.tablebase_hits = 0
+        self._start_time = None
+        self._root_ply = 0
+
+    def run(self) -> tuple[Optional[Move], int]:
+        """
+        Searches the position until a limit is reached.
+
+        :return: The best move found (None if there are no legal moves) and its score in centipawns.
+        """
+        self.nodes = 0
+        self.tablebase_hits = 0
+        self._start_time = time.perf_counter()
+        self._root_ply = len(self.board.move_history)
+
+        root_moves = self.board.legal_moves()
+        if not root_moves:
+            return None, -MATE_SCORE if self.board.in_check() else 0
+
+        best_move, best_score = root_moves[0], 0
+        # (score, pv) of each line of the last completed depth, best first
+        self.lines = [(0, [])] * min(self.multipv, len(root_moves))
+        max_depth = self.limits.depth or 64
+        time_manager = None
+        if self.limits.soft_time is not None:
+            time_manager = TimeManager(self.limits.soft_time, self.limits.movetime)
+        for depth in range(1, max_depth + 1):
+            lines = []
+            try:
+                for rank, (previous_score, previous_pv) in enumerate(self.lines):
+                    self._excluded = [line[0] for _, line in lines]
+                    score, line = self._search_root(depth, previous_score, previous_pv)
+                    lines.append((score, line))
+                    if rank == 0:
+                        best_score, best_move = score, line[0]
+                    if self.on_info is not None:
+                        self.on_info(self._info(depth, score, line, rank + 1 if len(self.lines) > 1 else None))
+            except SearchStopped:
+                while len(self.board.move_history) > self._root_ply:
+                    self.board.unmake_move()
+                break
+            finally:
+                self._excluded = ()
+
+            self.lines = lines
+            if abs(best_score) >= MATE_SCORE - 1000:
+                break
+            if time_manager is not None:
+                time_manager.update(best_move, best_score)
+                if time_manager.should_stop(time.perf_counter() - self._start_time):
+                    break
+
+        return best_move, best_score
+
+    def _search_root(self, depth: int, previous_score: int, pv: List[Move]) -> tuple[int, List[Move]]:
+        """Searches the root to a depth, inside an aspiration window around the previous score if enabled."""
+        if not self.options.aspiration or depth < ASPIRATION_MIN_DEPTH or abs(previous_score) >= MATE_SCORE - 1000:
+            return self._negamax(depth, -INFINITY, INFINITY, 0, pv)
+        window = ASPIRATION_WINDOW
+        alpha, beta = previous_score - window, previous_score + window
+        while True:
+            score, line = self._negamax(depth, alpha, beta, 0, pv)
+            if alpha < score < beta:
+                return score, line
+            # Widen the side that failed, falling back to an open window once it gets wide
+            window *= 4
+            if score <= alpha:
+                alpha = -INFINITY if window > 1000 else score - window
+            else:
+                beta = INFINITY if window > 1000 else score + window
+                pv = line
+
+    def _info(self, depth: int, score: int, pv: List[Move], multipv: int = None) -> dict:
+        elapsed = time.perf_counter() - self._start_time
+        info = {
+            "depth": depth,
+            "score": score,
+            "pv": [move.uci() for move in pv],
+            "nodes": self.nodes,
+            "tbhits": self.tablebase_hits,
+            "nps": int(self.nodes / elapsed) if elapsed > 0 else 0,
+            "time": elapsed,
+        }
+        if multipv is not None:
+            info["multipv"] = multipv
+        return info
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL:
+            return
+        if self.limits.nodes is not None and self.nodes >= self.limits.nodes:
+            raise SearchStopped()
+        if self.limits.movetime is not None and time.perf_counter() - self._start_time >= self.limits.movetime:
+            raise SearchStopped()
+        if self.should_stop is not None and self.should_stop():
+            raise SearchStopped()
+
+    def _order_moves(self, moves: List[Move], pv_move: Optional[Move]) -> List[Move]:
+        """Orders the previous best move first, then captures by most valuable victim, least valuable attacker."""
+        board = self.board.board
+
+        def key(move):
+            if move == pv_move:
+                return -INFINITY
+            victim = board.get(move.end)
+            if victim is not None:
+                return -10 * PIECE_VALUES[victim.symbol] + PIECE_VALUES[board[move.start].symbol] // 10
+            return 0 if move.promotion is None else -PIECE_VALUES[move.promotion]
+
+        return sorted(moves, key=key)
+
+    def _negamax(self, depth: int, alpha: int, beta: int, ply: int, pv: List[Move],
+                 null_allowed: bool = True) -> tuple[int, List[Move]]:
+        board = self.board
+        # Neither side can mate with this material, whatever the moves
+        if ply > 0 and is_known_draw(board.material_key):
+            self._count_node()
+            return 0, []
+        # Quiescence counts the horizon node and generates its moves itself
+        if depth <= 0:
+            return self._quiesce(alpha, beta, ply), []
+        self._count_node()
+        moves = board.legal_moves()
+        in_check = board.in_check()
+        if not moves:
+            return (-MATE_SCORE + ply if in_check else 0), []
+        if ply > 0 and board.halfmove_clock >= 100:
+            return 0, []
+        if ply > 0 and self.tablebase is not None and len(board.board) <= self.tablebase.max_pieces:
+            plies_to_mate = self.tablebase.probe_dtm(board)
+            if plies_to_mate is not None:
+                self.tablebase_hits += 1
+                if plies_to_mate > 0:
+                    return MATE_SCORE - ply - plies_to_mate, []
+                return (-MATE_SCORE + ply - plies_to_mate if plies_to_mate < 0 else 0), []
+        if ply == 0 and self._excluded:
+            moves = [move for move in moves if move not in self._excluded]
+
+        options = self.options
+        futile = False
+        # Pruning is only safe away from the principal variation, where a null window is searched
+        if ply > 0 and not in_check and beta - alpha == 1:
+            static = self.evaluate(board)
+            if options.razoring and depth in RAZOR_MARGINS and static + RAZOR_MARGINS[depth] <= alpha:
+                score = self._quiesce(alpha, beta, ply)
+                if score <= alpha:
+                    return alpha, []
+            if (options.null_move and null_allowed and depth >= NULL_MOVE_MIN_DEPTH and static >= beta
+                    and board.material_key & NON_PAWN_MASKS[board.turn]):
+                board.make_null_move()
+                score = -self._negamax(depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, ply + 1, [],
+                                       null_allowed=False)[0]
+                board.unmake_move()
+                if score >= beta:
+                    return beta, []
+            futile = options.futility and depth in FUTILITY_MARGINS and static + FUTILITY_MARGINS[depth] <= alpha
+
+        best_line = []
+        for index, move in enumerate(self._order_moves(moves, pv[0] if pv else None)):
+            quiet = not in_check and move.promotion is None and not board.is_capture(move)
+            board.make_move(move)
+            quiet = quiet and not board.in_check()
+            if futile and quiet and index > 0:
+                board.unmake_move()
+                continue
+            child_pv = pv[1:] if pv and move == pv[0] else []
+
+            if index == 0:
+                score, line = self._negamax(depth - 1, -beta, -alpha, ply + 1, child_pv)
+                score = -score
+            else:
+                window_beta = alpha + 1 if options.pvs else beta
+                reduction = 0
+                if options.lmr and quiet and depth >= LMR_MIN_DEPTH and index >= LMR_MIN_MOVES:
+                    reduction = 2 if index >= LMR_LATE_MOVES and depth > 3 else 1
+                score, line = self._negamax(depth - 1 - reduction, -window_beta, -alpha, ply + 1, child_pv)
+                score = -score
+                if reduction and score > alpha:
+                    score, line = self._negamax(depth - 1, -window_beta, -alpha, ply + 1, child_pv)
+                    score = -score
+                if window_beta != beta and alpha < score < beta:
+                    score, line = self._negamax(depth - 1, -beta, -alpha, ply + 1, child_pv)
+                    score = -score
+            board.unmake_move()
+
+            if score > alpha or not best_line:
+                best_line = [move] + line
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha, best_line
+
+    def _quiesce(self, alpha: int, beta: int, ply: int) -> int:
+        self._count_node()
+        board = self.board
+        moves = board.legal_moves()
+        if board.in_check():
+            # No standing pat in check: every evasion is searched, so mates at the horizon are seen
+            if not moves:
+                return -MATE_SCORE + ply
+        else:
+            stand_pat = self.evaluate(board)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            # Captures that lose material by static exchange evaluation are not worth searching
+            moves = [move for move in moves if board.is_capture(move) and board.see(move) >= 0]
+
+        for move in self._order_moves(moves, None):
+            self.board.make_move(move)
+            score = -self._quiesce(-beta, -alpha, ply + 1)
+            self.board.unmake_move()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+
+BENCHMARK_FENS = [
+    "r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+def benchmark(fens: List[str], depth: int) -> dict:
+    """
+    Searches each position to a fixed depth with every technique on, every technique off, and each technique
+    toggled on its own.
+
+    :param fens: Positions to search.
+    :param depth: Depth of every search.
+    :return: Total nodes and seconds by configuration name.
+    """
+    configurations = {"all on": SearchOptions(), "all off": SearchOptions.none()}
+    for name in SearchOptions.NAMES:
+        configurations[f"only {name}"] = SearchOptions.from_dict({other: other == name
+                                                                  for other in SearchOptions.NAMES})
+        configurations[f"without {name}"] = SearchOptions.from_dict({other: other != name
+                                                                     for other in SearchOptions.NAMES})
+    results = {}
+    for name, options in configurations.items():
+        nodes, start = 0, time.perf_counter()
+        for fen in fens:
+            search = Search(Board(fen=fen), SearchLimits(depth=depth), options=options)
+            search.run()
+            nodes += search.nodes
+        results[name] = {"nodes": nodes, "time": time.perf_counter() - start}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report node counts of fixed-depth searches with each search "
+                                                 "technique switched on and off.")
+    parser.add_argument("fens", nargs="*", help="Positions to search, a small built-in set by default")
+    parser.add_argument("--depth", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.fens or BENCHMARK_FENS, args.depth)
+    baseline = results["all off"]["nodes"]
+    for name, result in results.items():
+        print(f"{name:<20} {result['nodes']:>10} nodes {result['nodes'] / baseline:>7.1%} "
+              f"{result['time']:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
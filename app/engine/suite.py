@@ -0,0 +1,166 @@
+"""
+EPD test-suite runner, run with ``python -m app.engine.suite``.
+
+Each position of an EPD file is searched under the same limits across a process pool. A position is solved
+when the move found is one of its ``bm`` (best move) operands and none of its ``am`` (avoid move) ones. The
+time to solution is when the search last switched to a solving move without leaving it again. The report is
+JSON with a record per position and a summary of the solved count, average time to solution and aggregate
+nodes per second; given a previous report as a baseline, the runner flags falls in speed or solved count and
+exits with status 1, so a nightly job can catch regressions.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from app.engine.parallel import run_tasks
+from app.engine.search import Search, SearchLimits
+from app.game.epd import position_id, read_epd_file
+
+# Relative fall in nodes per second reported as a regression
+DEFAULT_TOLERANCE = 0.1
+
+
+def solves(move: str, best_moves: list, avoid_moves: list) -> bool:
+    """Returns whether a move in UCI notation is one of the best moves, if any, and none of the avoid moves."""
+    return (not best_moves or move in best_moves) and move not in avoid_moves
+
+
+def run_position(task: dict) -> dict:
+    """
+    Searches one suite position. Runs inside a worker process.
+
+    :param task: Dict with the position's index, id, FEN, bm and am operands in SAN and search limits.
+    :return: The result record.
+    """
+    from app.game.board import Board
+    from app.game.pgn import parse_san
+
+    board = Board(fen=task["fen"])
+    best_moves = [parse_san(board, san).uci() for san in task["bm"]]
+    avoid_moves = [parse_san(board, san).uci() for san in task["am"]]
+
+    # (seconds, move) each time the best move changes
+    changes = []
+
+    def on_info(info):
+        if info["pv"] and (not changes or changes[-1][1] != info["pv"][0]):
+            changes.append((info["time"], info["pv"][0]))
+
+    search = Search(board, SearchLimits.from_dict(task["limits"]), on_info=on_info)
+    start = time.perf_counter()
+    move, score = search.run()
+    elapsed = time.perf_counter() - start
+    move = move.uci() if move else None
+
+    solved = move is not None and solves(move, best_moves, avoid_moves)
+    solution_time = None
+    if solved:
+        solution_time = changes[-1][0] if changes and changes[-1][1] == move else elapsed
+    return {"index": task["index"], "id": task["id"], "move": move, "score": score, "solved": solved,
+            "solution_time": solution_time, "bm": best_moves, "am": avoid_moves, "nodes": search.nodes,
+            "time": elapsed, "nps": int(search.nodes / elapsed) if elapsed > 0 else 0}
+
+
+def make_tasks(positions: list, limits: SearchLimits) -> list:
+    """Creates the tasks of the positions of an EPD file read with app.game.epd.read_epd_file()."""
+    return [{"index": index, "id": position_id(operations, index), "fen": fen,
+             "bm": operations.get("bm", []), "am": operations.get("am", []), "limits": limits.to_dict()}
+            for index, (fen, operations) in enumerate(positions)]
+
+
+def run_suite(tasks: list, concurrency: int = None, on_result=None) -> list:
+    """
+    Searches the positions across a process pool.
+
+    :param tasks: Positions created by make_tasks().
+    :param concurrency: Number of worker processes, defaults to the number of CPUs. With 1, the positions are
+                        searched in this process.
+    :param on_result: Optional callback receiving every record as it finishes.
+    :return: The result records in suite order.
+    """
+    return run_tasks(run_position, tasks, concurrency, on_result)
+
+
+def summarise(records: list) -> dict:
+    """Returns the solved count, average time to solution and aggregate nodes per second of a run."""
+    solved = [record for record in records if record["solved"]]
+    nodes = sum(record["nodes"] for record in records)
+    seconds = sum(record["time"] for record in records)
+    return {
+        "positions": len(records),
+        "solved": len(solved),
+        "solve_rate": len(solved) / len(records) if records else 0.0,
+        "average_solution_time": sum(record["solution_time"] for record in solved) / len(solved) if solved else None,
+        "nodes": nodes,
+        "time": seconds,
+        "nps": int(nodes / seconds) if seconds > 0 else 0,
+    }
+
+
+def compare(summary: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Compares a run's summary with a baseline's.
+
+    :param summary: Summary of the new run.
+    :param baseline: Summary of the baseline run.
+    :param tolerance: Relative fall in nodes per second allowed before it counts as a regression.
+    :return: A message per regression, empty if there is none.
+    """
+    regressions = []
+    if baseline["nps"] and summary["nps"] < (1 - tolerance) * baseline["nps"]:
+        change = summary["nps"] / baseline["nps"] - 1
+        regressions.append(f"nps fell from {baseline['nps']} to {summary['nps']} ({change:.1%})")
+    if summary["solved"] < baseline["solved"]:
+        regressions.append(f"solved fell from {baseline['solved']} to {summary['solved']}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run an EPD test suite and report solved positions and speed.")
+    parser.add_argument("suite", help="EPD file with bm and/or am operations")
+    parser.add_argument("--movetime", type=float, help="seconds per position")
+    parser.add_argument("--nodes", type=int, help="nodes per position")
+    parser.add_argument("--depth", type=int, help="depth per position")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="write the JSON report here instead of to stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to check for regressions against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative fall in nps reported as a regression")
+    args = parser.parse_args(argv)
+    if args.movetime is None and args.nodes is None and args.depth is None:
+        parser.error("give at least one of --movetime, --nodes and --depth")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    limits = SearchLimits(depth=args.depth, nodes=args.nodes, movetime=args.movetime)
+    tasks = make_tasks(read_epd_file(args.suite), limits)
+
+    def report(record):
+        outcome = "solved" if record["solved"] else "failed"
+        print(f"{record['id']}: {record['move']} {outcome}, {record['nodes']} nodes in {record['time']:.2f}s",
+              file=sys.stderr)
+
+    records = run_suite(tasks, args.concurrency, on_result=report)
+    result = {"suite": args.suite, "limits": limits.to_dict(), "summary": summarise(records), "positions": records}
+    if args.baseline:
+        with open(args.baseline) as file:
+            result["regressions"] = compare(result["summary"], json.load(file)["summary"], args.tolerance)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    for regression in result.get("regressions", []):
+        print(f"Regression: {regression}", file=sys.stderr)
+    if result.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,541 @@
+"""
+Endgame tablebases for up to four pieces, run with ``python -m app.engine.tablebase``.
+
+A table holds the depth to mate of every position with a given material signature such as KQvK, from the side
+to move's point of view. Tables are generated by retrograde analysis: the legal moves of every position are
+listed once (in worker processes), then the values are computed by repeated backward passes over the whole
+table with NumPy until nothing changes. Captures and promotions lead into smaller tables, which are generated
+first.
+
+Positions are indexed without gaps by the side to move, the white king's square reduced by symmetry (to the
+a1-d1-d4 triangle without pawns, to files a-d with pawns) and the squares of the other pieces. Each position
+takes one little-endian int16:
+
+- 0 for a draw,
+- n > 0 when the side to move mates in n plies,
+- -(n + 1) when the side to move is mated in n plies,
+- INVALID for impossible placements.
+
+Files start with the header magic ``CHTB``, version (u16), piece count (u16), signature (16 bytes) and entry
+count (u64). Tablebase memory-maps them, so a probe reads one value. Castling and en passant are not covered.
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+
+from app.game import Colour
+from app.game.board import KING_STEPS, KNIGHT_JUMPS, ROOK_DIRECTIONS, BISHOP_DIRECTIONS
+from app.game.zobrist import en_passant_file
+
+MAGIC = b"CHTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHH16sQ")
+VALUE = struct.Struct("<h")
+INVALID = -32768
+
+MAX_PIECES = 4
+# Piece order within a side, which is also the order of the pieces in a table's index
+PIECE_ORDER = "kqrbnp"
+PIECE_WORTH = {"k": 0, "q": 9, "r": 5, "b": 3, "n": 3, "p": 1}
+PROMOTIONS = "qrbn"
+WHITE, BLACK = 0, 1
+
+# Ordinal scores used while generating: mate in n plies scores MATE - n, mated in n plies -(MATE - n)
+MATE = 30000
+NO_MOVE = -(1 << 30)
+
+# Positions analysed per worker task
+CHUNK_SIZE = 8192
+
+# Position status found by the move listing
+STATUS_INVALID, STATUS_NORMAL, STATUS_MATED, STATUS_STALEMATE = 0, 1, 2, 3
+
+
+def _square(row: int, col: int) -> int:
+    return row * 8 + col
+
+
+def _step_targets(steps) -> list:
+    return [[_square(sq // 8 + dr, sq % 8 + dc) for dr, dc in steps if 0 <= sq // 8 + dr < 8 and 0 <= sq % 8 + dc < 8]
+            for sq in range(64)]
+
+
+def _rays(directions) -> list:
+    rays = []
+    for sq in range(64):
+        square_rays = []
+        for dr, dc in directions:
+            ray, row, col = [], sq // 8 + dr, sq % 8 + dc
+            while 0 <= row < 8 and 0 <= col < 8:
+                ray.append(_square(row, col))
+                row, col = row + dr, col + dc
+            square_rays.append(ray)
+        rays.append(square_rays)
+    return rays
+
+
+KING_TARGETS = _step_targets(KING_STEPS)
+KNIGHT_TARGETS = _step_targets(KNIGHT_JUMPS)
+SLIDER_RAYS = {"r": _rays(ROOK_DIRECTIONS), "b": _rays(BISHOP_DIRECTIONS)}
+SLIDER_RAYS["q"] = [rook + bishop for rook, bishop in zip(SLIDER_RAYS["r"], SLIDER_RAYS["b"])]
+STEP_ATTACKS = {"k": [set(targets) for targets in KING_TARGETS], "n": [set(targets) for targets in KNIGHT_TARGETS]}
+# Squares attacked by a pawn of each colour; white pawns move towards row 0
+PAWN_ATTACKS = [_step_targets([(-1, -1), (-1, 1)]), _step_targets([(1, -1), (1, 1)])]
+
+
+def _lines() -> dict:
+    """Maps (from, to) squares on a common rank, file or diagonal to the line's type and the squares between."""
+    lines = {}
+    for kind in ("r", "b"):
+        for start in range(64):
+            for ray in SLIDER_RAYS[kind][start]:
+                for distance, end in enumerate(ray):
+                    lines[start, end] = kind, ray[:distance]
+    return lines
+
+
+LINES = _lines()
+
+
+def _attacks(kind: str, colour: int, start: int, target: int, occupied) -> bool:
+    """Returns whether a piece on start attacks target, given the occupied squares."""
+    if kind in STEP_ATTACKS:
+        return target in STEP_ATTACKS[kind][start]
+    if kind == "p":
+        return target in PAWN_ATTACKS[colour][start]
+    line = LINES.get((start, target))
+    if line is None or (kind != "q" and line[0] != kind):
+        return False
+    return not any(square in occupied for square in line[1])
+
+
+def _is_attacked(pieces, squares, target: int, by: int, captured: int = None) -> bool:
+    """Returns whether any piece of colour by, other than the captured one, attacks target."""
+    occupied = set(squares)
+    for i, (colour, kind) in enumerate(pieces):
+        if colour == by and i != captured and _attacks(kind, colour, squares[i], target, occupied):
+            return True
+    return False
+
+
+def _piece_moves(kind: str, colour: int, start: int, occupant):
+    """
+    Yields (target, promotion) for the pseudo-legal moves of a piece.
+
+    :param occupant: Function returning the colour of the piece on a square, or None if it is empty.
+    """
+    if kind in ("k", "n"):
+        for target in (KING_TARGETS if kind == "k" else KNIGHT_TARGETS)[start]:
+            if occupant(target) != colour:
+                yield target, None
+    elif kind == "p":
+        step = -8 if colour == WHITE else 8
+        last_row = 0 if colour == WHITE else 7
+        targets = [target for target in PAWN_ATTACKS[colour][start] if occupant(target) == 1 - colour]
+        if occupant(start + step) is None:
+            targets.append(start + step)
+            start_row = 6 if colour == WHITE else 1
+            if start // 8 == start_row and occupant(start + 2 * step) is None:
+                targets.append(start + 2 * step)
+        for target in targets:
+            if target // 8 == last_row:
+                for promotion in PROMOTIONS:
+                    yield target, promotion
+            else:
+                yield target, None
+    else:
+        for ray in SLIDER_RAYS[kind][start]:
+            for target in ray:
+                target_colour = occupant(target)
+                if target_colour != colour:
+                    yield target, None
+                if target_colour is not None:
+                    break
+
+
+def signature_name(white: str, black: str) -> str:
+    """Returns the signature of two sides' pieces, e.g. ('kq', 'k') -> 'KQvK'."""
+    return f"{_sorted_pieces(white).upper()}v{_sorted_pieces(black).upper()}"
+
+
+def _sorted_pieces(pieces: str) -> str:
+    return "".join(sorted(pieces, key=PIECE_ORDER.index))
+
+
+def parse_signature(signature: str) -> tuple[str, str]:
+    """Splits a signature such as 'KRvKP' into each side's lower-case pieces, kings first."""
+    white, _, black = signature.lower().partition("v")
+    if white.count("k") != 1 or black.count("k") != 1 or any(piece not in PIECE_ORDER for piece in white + black):
+        raise ValueError(f"Invalid material signature: {signature!r}")
+    if len(white) + len(black) > MAX_PIECES:
+        raise ValueError(f"{signature} has more than {MAX_PIECES} pieces")
+    return _sorted_pieces(white), _sorted_pieces(black)
+
+
+def canonical_signature(signature: str) -> str:
+    """Returns the orientation of a signature that tables are generated for, the stronger side being white."""
+    white, black = parse_signature(signature)
+    if (sum(map(PIECE_WORTH.get, black)), black) > (sum(map(PIECE_WORTH.get, white)), white):
+        white, black = black, white
+    return signature_name(white, black)
+
+
+def is_insufficient(white: str, black: str) -> bool:
+    """Returns whether neither side can mate: no pawns, rooks or queens and at most one minor piece."""
+    others = (white + black).replace("k", "")
+    return len(others) <= 1 and all(piece in "bn" for piece in others)
+
+
+# King squares kept after symmetry reduction: the a1-d1-d4 triangle, or files a-d when pawns fix the ranks
+TRIANGLE = [_square(7 - rank, file) for file in range(4) for rank in range(file + 1)]
+QUEENSIDE = [_square(row, col) for row in range(8) for col in range(4)]
+
+
+class TableLayout:
+    def __init__(self, signature: str):
+        """
+        Maps the positions of a material signature to table indexes and back.
+
+        :param signature: Material signature such as 'KQvK'.
+        """
+        white, black = parse_signature(signature)
+        self.signature = signature_name(white, black)
+        self.pieces = [(WHITE, kind) for kind in white] + [(BLACK, kind) for kind in black]
+        self.has_pawns = "p" in white + black
+        self.king_squares = QUEENSIDE if self.has_pawns else TRIANGLE
+        self._king_slots = {square: slot for slot, square in enumerate(self.king_squares)}
+        self.others = len(self.pieces) - 1
+        self.size = 2 * len(self.king_squares) * 64 ** self.others
+
+    def canonical(self, squares: list) -> list:
+        """Applies the board symmetry that brings the white king into the indexed area."""
+        king = squares[0]
+        if king % 8 > 3:
+            squares = [square ^ 7 for square in squares]
+        if not self.has_pawns:
+            if squares[0] // 8 < 4:
+                squares = [square ^ 56 for square in squares]
+            rank, file = 7 - squares[0] // 8, squares[0] % 8
+            if rank > file:
+                squares = [63 - (square % 8) * 8 - square // 8 for square in squares]
+        return squares
+
+    def index(self, squares: list, turn: int) -> int:
+        """
+        Returns the table index of a position.
+
+        :param squares: Square (ROW * 8 + COL) of each piece, in the order of self.pieces.
+        :param turn: 0 when white is to move, 1 for black.
+        """
+        squares = self.canonical(squares)
+        index = turn * len(self.king_squares) + self._king_slots[squares[0]]
+        for square in squares[1:]:
+            index = index * 64 + square
+        return index
+
+    def decode(self, index: int) -> tuple[list, int]:
+        """Returns the squares and side to move of a table index."""
+        squares = []
+        for _ in range(self.others):
+            index, square = divmod(index, 64)
+            squares.append(square)
+        turn, slot = divmod(index, len(self.king_squares))
+        return [self.king_squares[slot]] + squares[::-1], turn
+
+
+def score_of(value: int) -> int:
+    """Converts a stored table value to an ordinal score, higher being better for the side to move."""
+    if value > 0:
+        return MATE - value
+    if value < 0:
+        return -(MATE + value + 1)
+    return 0
+
+
+def _backed_up(score: int) -> int:
+    """Returns the parent's score for a move to a position with the given score for the opponent."""
+    score = -score
+    return score - 1 if score > 0 else score + 1 if score < 0 else 0
+
+
+def table_path(directory: str, signature: str) -> str:
+    return os.path.join(directory, f"{signature}.chtb")
+
+
+class _Table:
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, signature, self.size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} tablebase")
+        self.layout = TableLayout(signature.rstrip(b"\0").decode("ascii"))
+
+    def value(self, index: int) -> int:
+        return VALUE.unpack_from(self._map, HEADER.size + VALUE.size * index)[0]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class Tablebase:
+    def __init__(self, directory: str):
+        """
+        Prober for the tables in a directory. Tables are opened on first use.
+
+        :param directory: Directory holding ``<signature>.chtb`` files.
+        """
+        self.directory = directory
+        self.max_pieces = MAX_PIECES
+        self._tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _table(self, signature: str):
+        if signature not in self._tables:
+            path = table_path(self.directory, signature)
+            self._tables[signature] = _Table(path) if os.path.exists(path) else None
+        return self._tables[signature]
+
+    def probe_value(self, pieces: list, turn: int):
+        """
+        Looks up a position given as a piece list.
+
+        :param pieces: (colour, kind, square) of every piece, colour 0 for white.
+        :param turn: 0 when white is to move, 1 for black.
+        :return: The stored value, see the module docstring, or None if the table is missing.
+        """
+        white = "".join(kind for colour, kind, _ in pieces if colour == WHITE)
+        black = "".join(kind for colour, kind, _ in pieces if colour == BLACK)
+        if is_insufficient(white, black):
+            return 0
+        if len(pieces) > self.max_pieces:
+            return None
+        table = self._table(signature_name(white, black))
+        if table is None:
+            # Look the position up with the colours swapped and the board turned around
+            table = self._table(signature_name(black, white))
+            if table is None:
+                return None
+            pieces = [(1 - colour, kind, square ^ 56) for colour, kind, square in pieces]
+            turn = 1 - turn
+        ordered = sorted(pieces, key=lambda piece: (piece[0], PIECE_ORDER.index(piece[1])))
+        return table.value(table.layout.index([square for _, _, square in ordered], turn))
+
+    def _probe_board(self, board):
+        if len(board.board) > self.max_pieces or board.castling_rights or en_passant_file(board) is not None:
+            return None
+        pieces = [(WHITE if piece.colour == Colour.WHITE else BLACK, piece.symbol, row * 8 + col)
+                  for (row, col), piece in board.board.items()]
+        value = self.probe_value(pieces, WHITE if board.turn == Colour.WHITE else BLACK)
+        return None if value == INVALID else value
+
+    def probe_wdl(self, board):
+        """
+        Probes for win, draw or loss.
+
+        :return: 1 if the side to move wins, 0 for a draw, -1 if it loses, None if the position is not covered.
+        """
+        value = self._probe_board(board)
+        return None if value is None else (value > 0) - (value < 0)
+
+    def probe_dtm(self, board):
+        """
+        Probes for the depth to mate.
+
+        :return: Plies to mate, positive if the side to move mates and negative if it is mated; 0 for draws and
+                 checkmated positions. None if the position is not covered.
+        """
+        value = self._probe_board(board)
+        if value is None:
+            return None
+        return value + 1 if value < 0 else value
+
+    def close(self):
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables = {}
+
+
+def _analyse_range(task: tuple):
+    """
+    Lists the legal moves of a range of positions. Runs inside a worker process.
+
+    :param task: Signature, tablebase directory, first index and end index.
+    :return: Status and best score reached through captures or promotions of every position, the number of
+             moves staying in the table and the table indexes they lead to.
+    """
+    import array
+
+    signature, directory, first, end = task
+    layout = TableLayout(signature)
+    pieces = layout.pieces
+    kings = [pieces.index((WHITE, "k")), pieces.index((BLACK, "k"))]
+    pawns = [i for i, (_, kind) in enumerate(pieces) if kind == "p"]
+    statuses, external, counts, children = bytearray(), array.array("i"), array.array("i"), array.array("i")
+
+    with Tablebase(directory) as tablebase:
+        for index in range(first, end):
+            squares, turn = layout.decode(index)
+            if (len(set(squares)) != len(squares) or any(squares[i] // 8 in (0, 7) for i in pawns)
+                    or _is_attacked(pieces, squares, squares[kings[1 - turn]], turn)):
+                statuses.append(STATUS_INVALID)
+                external.append(NO_MOVE)
+                counts.append(0)
+                continue
+
+            colours = {square: pieces[i][0] for i, square in enumerate(squares)}
+            occupants = {square: i for i, square in enumerate(squares)}
+            moves, best, count = 0, NO_MOVE, 0
+            for i, (colour, kind) in enumerate(pieces):
+                if colour != turn:
+                    continue
+                for target, promotion in _piece_moves(kind, colour, squares[i], colours.get):
+                    captured = occupants.get(target)
+                    after = list(squares)
+                    after[i] = target
+                    if _is_attacked(pieces, after, after[kings[turn]], 1 - turn, captured):
+                        continue
+                    moves += 1
+                    if captured is None and promotion is None:
+                        children.append(layout.index(after, 1 - turn))
+                        count += 1
+                        continue
+                    child = [(colour, promotion if j == i and promotion else kind, after[j])
+                             for j, (colour, kind) in enumerate(pieces) if j != captured]
+                    value = tablebase.probe_value(child, 1 - turn)
+                    if value is None:
+                        raise FileNotFoundError(f"Missing table for a position reached from {signature}")
+                    best = max(best, _backed_up(score_of(value)))
+
+            if moves:
+                statuses.append(STATUS_NORMAL)
+            else:
+                in_check = _is_attacked(pieces, squares, squares[kings[turn]], 1 - turn)
+                statuses.append(STATUS_MATED if in_check else STATUS_STALEMATE)
+            external.append(best)
+            counts.append(count)
+    return bytes(statuses), external.tobytes(), counts.tobytes(), children.tobytes()
+
+
+def dependencies(signature: str) -> list:
+    """Returns the canonical signatures reached from a signature by one capture or promotion."""
+    white, black = parse_signature(signature)
+    reached = set()
+    for side, other, flip in ((white, black, False), (black, white, True)):
+        for i, kind in enumerate(side):
+            if kind == "k":
+                continue
+            variants = [side[:i] + side[i + 1:]]
+            if kind == "p":
+                variants += [side[:i] + promotion + side[i + 1:] for promotion in PROMOTIONS]
+            for variant in variants:
+                child_white, child_black = (other, variant) if flip else (variant, other)
+                if not is_insufficient(child_white, child_black):
+                    reached.add(canonical_signature(signature_name(child_white, child_black)))
+    return sorted(reached)
+
+
+def generate(signature: str, directory: str, concurrency: int = None, on_progress=None) -> str:
+    """
+    Generates a table and, first, any missing tables it depends on.
+
+    :param signature: Material signature, e.g. 'KRvK'. It is turned around if the stronger side is black.
+    :param directory: Directory the tables are written to.
+    :param concurrency: Number of worker processes listing moves, defaults to the number of CPUs; 1 runs in
+                        this process.
+    :param on_progress: Optional callback receiving a message for every table written.
+    :return: Path of the table.
+    """
+    import numpy as np
+
+    signature = canonical_signature(signature)
+    os.makedirs(directory, exist_ok=True)
+    path = table_path(directory, signature)
+    for dependency in dependencies(signature):
+        if not os.path.exists(table_path(directory, dependency)):
+            generate(dependency, directory, concurrency, on_progress)
+
+    start = time.perf_counter()
+    layout = TableLayout(signature)
+    tasks = [(signature, directory, first, min(first + CHUNK_SIZE, layout.size))
+             for first in range(0, layout.size, CHUNK_SIZE)]
+    concurrency = concurrency or os.cpu_count()
+    if concurrency == 1:
+        results = list(map(_analyse_range, tasks))
+    else:
+        with multiprocessing.get_context("spawn").Pool(concurrency) as pool:
+            results = pool.map(_analyse_range, tasks)
+
+    status = np.frombuffer(b"".join(result[0] for result in results), dtype=np.int8)
+    external = np.frombuffer(b"".join(result[1] for result in results), dtype=np.int32)
+    counts = np.frombuffer(b"".join(result[2] for result in results), dtype=np.int32)
+    children = np.frombuffer(b"".join(result[3] for result in results), dtype=np.int32)
+
+    # Backward passes: every position takes the best score over its moves until no score changes
+    normal = status == STATUS_NORMAL
+    scores = np.where(status == STATUS_MATED, -MATE, 0).astype(np.int32)
+    has_children = counts > 0
+    starts = (np.cumsum(counts) - counts)[has_children]
+    passes = 0
+    while True:
+        passes += 1
+        best = external.copy()
+        if len(children):
+            opponent = -scores[children]
+            backed_up = np.where(opponent > 0, opponent - 1, np.where(opponent < 0, opponent + 1, 0))
+            best[has_children] = np.maximum(best[has_children], np.maximum.reduceat(backed_up, starts))
+        updated = np.where(normal, best, scores).astype(np.int32)
+        if np.array_equal(updated, scores):
+            break
+        scores = updated
+
+    values = np.zeros(layout.size, dtype="<i2")
+    values[scores > 0] = MATE - scores[scores > 0]
+    values[scores < 0] = -(MATE + scores[scores < 0]) - 1
+    values[status == STATUS_INVALID] = INVALID
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, len(layout.pieces), signature.encode("ascii"), layout.size))
+        output.write(values.tobytes())
+
+    if on_progress is not None:
+        wins = int(np.count_nonzero(values > 0))
+        on_progress(f"{signature}: {layout.size} positions, {wins} won for the side to move, longest mate "
+                    f"{int(values.max())} plies, {passes} passes in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and probe endgame tablebases.")
+    parser.add_argument("--directory", default="tablebases", help="directory holding the tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_parser = commands.add_parser("generate", help="generate tables and the tables they depend on")
+    generate_parser.add_argument("signatures", nargs="+", help="material signatures such as KQvK, KRvK, KPvK")
+    generate_parser.add_argument("--concurrency", type=int, default=os.cpu_count(),
+                                 help="number of worker processes")
+    probe = commands.add_parser("probe", help="print the value of a position")
+    probe.add_argument("fen")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        for signature in args.signatures:
+            generate(signature, args.directory, args.concurrency, on_progress=print)
+    else:
+        from app.game.board import Board
+
+        board = Board(fen=args.fen)
+        with Tablebase(args.directory) as tablebase:
+            print(f"WDL {tablebase.probe_wdl(board)}, DTM {tablebase.probe_dtm(board)}")
+
+
+if __name__ == "__main__":
+    main()
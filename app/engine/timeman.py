@@ -0,0 +1,145 @@
+"""
+Time management: turning the time left on a clock into deadlines for one search.
+
+Each move gets a soft and a hard deadline. The hard deadline is a SearchLimits movetime and aborts the search
+wherever it is. The soft deadline is only checked between iterations by a TimeManager, which stretches it while
+the score is dropping (a fail low: the move that looked best has run into trouble, so it is worth looking
+for another) and shrinks it once the best move has stayed the same for several iterations.
+"""
+import time
+from typing import Optional
+
+from app.game import Colour
+
+# Moves assumed to be left in the game when the time control does not say
+DEFAULT_MOVES_TO_GO = 30
+# The hard deadline is this multiple of the soft one, but never more than HARD_FRACTION of the clock
+HARD_FACTOR = 4.0
+HARD_FRACTION = 0.5
+
+# A drop of more than this many centipawns since the previous iteration counts as a fail low
+FAIL_LOW_MARGIN = 30
+FAIL_LOW_EXTENSION = 2.0
+# The soft deadline is scaled by STABLE_SCALE once the best move has been the same for this many iterations
+STABLE_ITERATIONS = 4
+STABLE_SCALE = 0.5
+
+
+def allocate_time(remaining: float, increment: float, moves_to_go: int = None) -> float:
+    """
+    Splits the remaining clock time over the moves still to play.
+
+    :param remaining: Seconds left on the engine's clock.
+    :param increment: Seconds added per move.
+    :param moves_to_go: Moves until the next time control, if known.
+    :return: Seconds to spend on this move.
+    """
+    moves = moves_to_go if moves_to_go else DEFAULT_MOVES_TO_GO
+    budget = remaining / moves + 0.8 * increment
+    return max(0.01, min(budget, HARD_FRACTION * remaining))
+
+
+def deadlines(remaining: float, increment: float, moves_to_go: int = None) -> tuple[float, float]:
+    """
+    Finds the soft and hard time limits of a move.
+
+    :param remaining: Seconds left on the engine's clock.
+    :param increment: Seconds added per move.
+    :param moves_to_go: Moves until the next time control, if known.
+    :return: (soft, hard) in seconds; use them as a SearchLimits soft_time and movetime.
+    """
+    soft = allocate_time(remaining, increment, moves_to_go)
+    hard = max(soft, min(HARD_FACTOR * soft, HARD_FRACTION * remaining))
+    return soft, hard
+
+
+class TimeManager:
+    def __init__(self, soft_time: float, hard_time: float = None):
+        """
+        Decides after each iteration whether a search should start another.
+
+        :param soft_time: Seconds after which no new iteration is started, before scaling.
+        :param hard_time: Seconds the soft deadline may never pass.
+        """
+        self.soft_time = soft_time
+        self.hard_time = hard_time
+        self.scale = 1.0
+        self.stable_iterations = 0
+        self._best_move = None
+        self._score = None
+
+    def update(self, best_move, score: int):
+        """Records the result of a completed iteration and rescales the soft deadline."""
+        if best_move == self._best_move:
+            self.stable_iterations += 1
+        else:
+            self.stable_iterations = 0
+        if self._score is not None and score < self._score - FAIL_LOW_MARGIN:
+            self.scale = FAIL_LOW_EXTENSION
+        elif self.stable_iterations >= STABLE_ITERATIONS:
+            self.scale = STABLE_SCALE
+        else:
+            self.scale = 1.0
+        self._best_move, self._score = best_move, score
+
+    @property
+    def deadline(self) -> float:
+        """Seconds after the start of the search at which no new iteration is started."""
+        soft = self.soft_time * self.scale
+        return min(soft, self.hard_time) if self.hard_time is not None else soft
+
+    def should_stop(self, elapsed: float) -> bool:
+        """Returns whether a search that has run for elapsed seconds should stop between iterations."""
+        return elapsed >= self.deadline
+
+
+class GameClock:
+    def __init__(self, initial: float, increment: float = 0.0):
+        """
+        Chess clock with a Fischer increment, added to a side's time when it completes a move.
+
+        :param initial: Seconds each side starts with.
+        :param increment: Seconds added per move.
+        """
+        self.initial = initial
+        self.increment = increment
+        self.remaining = {Colour.WHITE: float(initial), Colour.BLACK: float(initial)}
+        self.running = None
+        self._started = None
+
+    @classmethod
+    def parse(cls, text: str) -> "GameClock":
+        """Parses a time control given as ``minutes+increment``, e.g. '5+3'."""
+        minutes, _, increment = text.partition("+")
+        return cls(float(minutes) * 60, float(increment or 0))
+
+    def press(self, colour: Colour, now: float = None, credit: bool = True):
+        """
+        Stops the running side's clock, crediting its increment, and starts colour's.
+
+        :param colour: Side whose clock starts.
+        :param now: Current time from time.perf_counter(), read if not given.
+        :param credit: Whether the running side completed a move and earns the increment; False when the clock
+                       changes sides because of a takeback.
+        """
+        now = time.perf_counter() if now is None else now
+        if self.running is not None:
+            self.remaining[self.running] += (self.increment if credit else 0.0) - (now - self._started)
+        self.running, self._started = colour, now
+
+    def time_left(self, colour: Colour, now: float = None) -> float:
+        """Returns the seconds left for a side, counting the time used on the running clock."""
+        now = time.perf_counter() if now is None else now
+        used = now - self._started if colour == self.running else 0.0
+        return self.remaining[colour] - used
+
+    def flagged(self, now: float = None) -> Optional[Colour]:
+        """Returns the side whose time has run out, if any."""
+        for colour in (Colour.WHITE, Colour.BLACK):
+            if self.time_left(colour, now) <= 0:
+                return colour
+        return None
+
+    def limits_for(self, colour: Colour, now: float = None) -> tuple[float, float]:
+        """Returns the (soft, hard) deadlines of a move by colour, see deadlines()."""
+        return deadlines(max(self.time_left(colour, now), 0.0), self.increment)
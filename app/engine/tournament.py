@@ -0,0 +1,290 @@
+"""
+Headless self-play tournament runner, run with ``python -m app.engine.tournament``.
+
+Games are played in parallel worker processes from a list of opening positions, each opening once with
+either colour. With a Polyglot book, both games of a pair follow the same randomly chosen book line. Every
+finished game is appended to a JSONL file as soon as it arrives, and the run ends with an Elo and SPRT summary
+from the first engine's point of view.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+
+from app.engine.polyglot import PolyglotBook, choose_book_move
+from app.engine.search import Search, SearchLimits, SearchOptions
+from app.game import Colour
+from app.game.board import START_FEN
+from app.game.epd import read_epd_file
+
+DEFAULT_MAX_PLIES = 400
+
+
+class EngineSpec:
+    def __init__(self, name: str, limits: SearchLimits, options: SearchOptions = None):
+        """
+        A named engine configuration taking part in a tournament.
+
+        :param name: Name used in the results.
+        :param limits: Limits for every move the engine makes.
+        :param options: Search techniques the engine uses, all by default.
+        """
+        self.name = name
+        self.limits = limits
+        self.options = options or SearchOptions()
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "limits": self.limits.to_dict(), "options": self.options.to_dict()}
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "EngineSpec":
+        options = SearchOptions.from_dict(values["options"]) if "options" in values else None
+        return cls(values["name"], SearchLimits.from_dict(values["limits"]), options)
+
+    @classmethod
+    def parse(cls, text: str) -> "EngineSpec":
+        """
+        Parses an engine given on the command line as ``name:key=value,key=value``.
+        Keys are depth, nodes and movetime (in seconds), and the SearchOptions names set to 0 or 1 to switch a
+        search technique off or on, e.g. ``nolmr:depth=4,lmr=0``.
+        """
+        name, _, settings = text.partition(":")
+        limits = SearchLimits()
+        options = SearchOptions()
+        for setting in filter(None, settings.split(",")):
+            key, _, value = setting.partition("=")
+            if key in SearchOptions.NAMES:
+                setattr(options, key, bool(int(value)))
+            elif key in ("depth", "nodes", "movetime"):
+                setattr(limits, key, float(value) if key == "movetime" else int(value))
+            else:
+                raise ValueError(f"Unknown engine setting {key!r} in {text!r}")
+        return cls(name, limits, options)
+
+
+def play_game(task: dict) -> dict:
+    """
+    Plays one game between two engines. Runs inside a worker process.
+
+    :param task: Dict with game id, opening FEN, white and black engine specs, the ply limit and optionally
+                 the path of a Polyglot book.
+    :return: The game record.
+    """
+    from app.game.board import Board
+
+    board = Board(fen=task["fen"])
+    engines = {
+        Colour.WHITE: EngineSpec.from_dict(task["white"]),
+        Colour.BLACK: EngineSpec.from_dict(task["black"]),
+    }
+    nodes = Counter()
+    think_time = Counter()
+    moves = []
+    book = PolyglotBook(task["book"]) if task.get("book") else None
+    # Seeded by the pair of games, so the pair plays the same book line with colours reversed
+    book_random = random.Random(task["game"] // 2)
+    book_plies = 0
+    repetitions = Counter([_position_key(board)])
+    start = time.perf_counter()
+
+    while True:
+        outcome = board.outcome()
+        if outcome is None and repetitions[_position_key(board)] >= 3:
+            outcome = "1/2-1/2", "threefold repetition"
+        if outcome is None and len(moves) >= task["max_plies"]:
+            outcome = "1/2-1/2", "max plies"
+        if outcome is not None:
+            break
+
+        move = choose_book_move(board.book_moves(book), rng=book_random) if book is not None else None
+        if move is not None:
+            book_plies += 1
+        else:
+            engine = engines[board.turn]
+            move_start = time.perf_counter()
+            search = Search(board, engine.limits, options=engine.options)
+            move, _ = search.run()
+            think_time[engine.name] += time.perf_counter() - move_start
+            nodes[engine.name] += search.nodes
+
+        board.make_move(move)
+        moves.append(move.uci())
+        repetitions[_position_key(board)] += 1
+
+    if book is not None:
+        book.close()
+    result, reason = outcome
+    return {
+        "game": task["game"],
+        "opening": task["fen"],
+        "white": engines[Colour.WHITE].name,
+        "black": engines[Colour.BLACK].name,
+        "result": result,
+        "reason": reason,
+        "plies": len(moves),
+        "book_plies": book_plies,
+        "moves": moves,
+        "nodes": dict(nodes),
+        "nps": {name: int(nodes[name] / think_time[name]) if think_time[name] else 0 for name in nodes},
+        "time": time.perf_counter() - start,
+    }
+
+
+def _position_key(board) -> str:
+    """Identifies a position for repetition detection: placement, side to move, castling and en passant."""
+    return board.fen().rsplit(" ", 2)[0]
+
+
+def score_for(record: dict, name: str) -> float:
+    """Returns the score, 1, 0.5 or 0, of the named engine in a game record."""
+    if record["result"] == "1/2-1/2":
+        return 0.5
+    winner = record["white"] if record["result"] == "1-0" else record["black"]
+    return 1.0 if winner == name else 0.0
+
+
+def elo_from_score(score: float) -> float:
+    """Converts an expected score to an Elo difference."""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def summarise(records: list, name: str, elo0: float = 0.0, elo1: float = 5.0, alpha: float = 0.05,
+              beta: float = 0.05) -> dict:
+    """
+    Summarises game results from one engine's point of view.
+
+    The Elo estimate uses a 95% confidence interval. The SPRT log-likelihood ratio uses the normal
+    approximation to the trinomial (win/draw/loss) distribution for H0: elo = elo0 against H1: elo = elo1.
+
+    :param records: Game records produced by play_game().
+    :param name: Engine whose results are summarised.
+    :return: Dict with the counts, Elo estimate and SPRT state.
+    """
+    scores = [score_for(record, name) for record in records]
+    games = len(scores)
+    wins, draws, losses = scores.count(1.0), scores.count(0.5), scores.count(0.0)
+    summary = {"engine": name, "games": games, "wins": wins, "draws": draws, "losses": losses}
+    if not games:
+        return summary
+
+    mean = sum(scores) / games
+    variance = sum((score - mean) ** 2 for score in scores) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    summary.update({
+        "score": mean,
+        "elo": elo_from_score(mean),
+        "elo_low": elo_from_score(mean - margin),
+        "elo_high": elo_from_score(mean + margin),
+    })
+
+    lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+    llr = 0.0
+    if variance > 0:
+        score0 = 1 / (1 + 10 ** (-elo0 / 400))
+        score1 = 1 / (1 + 10 ** (-elo1 / 400))
+        llr = (score1 - score0) * (2 * mean - score0 - score1) * games / (2 * variance)
+    summary["sprt"] = {
+        "elo0": elo0, "elo1": elo1, "llr": llr, "lower": lower, "upper": upper,
+        "decision": "H1" if llr >= upper else "H0" if llr <= lower else "continue",
+    }
+    nodes, seconds = Counter(), Counter()
+    for record in records:
+        for engine, engine_nodes in record["nodes"].items():
+            nodes[engine] += engine_nodes
+            if record["nps"].get(engine):
+                seconds[engine] += engine_nodes / record["nps"][engine]
+    summary["nps"] = {engine: int(nodes[engine] / seconds[engine]) for engine in nodes if seconds[engine]}
+    summary["average_plies"] = sum(record["plies"] for record in records) / games
+    return summary
+
+
+def format_summary(summary: dict) -> str:
+    lines = [f"{summary['engine']}: {summary['games']} games, +{summary['wins']} ={summary['draws']} "
+             f"-{summary['losses']}"]
+    if summary["games"]:
+        lines.append(f"Score {100 * summary['score']:.1f}%, Elo {summary['elo']:+.1f} "
+                     f"[{summary['elo_low']:+.1f}, {summary['elo_high']:+.1f}]")
+        sprt = summary["sprt"]
+        lines.append(f"SPRT ({sprt['elo0']:g}, {sprt['elo1']:g}): LLR {sprt['llr']:.2f} "
+                     f"[{sprt['lower']:.2f}, {sprt['upper']:.2f}] {sprt['decision']}")
+        lines.append("NPS " + ", ".join(f"{engine} {nps}" for engine, nps in summary["nps"].items()))
+    return "\n".join(lines)
+
+
+def make_tasks(openings: list, engine_a: EngineSpec, engine_b: EngineSpec, games: int,
+               max_plies: int = DEFAULT_MAX_PLIES, book: str = None) -> list:
+    """Pairs up games so each opening is played once with each engine as white."""
+    tasks = []
+    for game in range(games):
+        fen = openings[(game // 2) % len(openings)]
+        white, black = (engine_a, engine_b) if game % 2 == 0 else (engine_b, engine_a)
+        tasks.append({"game": game, "fen": fen, "white": white.to_dict(), "black": black.to_dict(),
+                      "max_plies": max_plies, "book": book})
+    return tasks
+
+
+def run_tournament(tasks: list, output_path: str, concurrency: int = None, on_result=None) -> list:
+    """
+    Plays the games across a process pool, appending each record to the JSONL output as it finishes.
+
+    :param tasks: Games created by make_tasks().
+    :param output_path: JSONL file the game records are written to.
+    :param concurrency: Number of worker processes, defaults to the number of CPUs.
+    :param on_result: Optional callback receiving every record.
+    :return: All game records in the order they finished.
+    """
+    records = []
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(concurrency or os.cpu_count()) as pool, open(output_path, "w") as output:
+        for record in pool.imap_unordered(play_game, tasks):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            records.append(record)
+            if on_result is not None:
+                on_result(record)
+    return records
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Play a self-play tournament between two engine configurations.")
+    parser.add_argument("--engine", action="append", type=EngineSpec.parse, required=True,
+                        help="engine as name:key=value,... with keys depth, nodes, movetime and search technique "
+                             "switches such as lmr=0; give it twice")
+    parser.add_argument("--openings", help="FEN or EPD file of opening positions, defaults to the start position")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--book", help="Polyglot book both engines play from while the game is in it")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES, help="adjudicate a draw after this")
+    parser.add_argument("--output", default="tournament.jsonl", help="JSONL file for the game records")
+    parser.add_argument("--elo0", type=float, default=0.0, help="SPRT null hypothesis Elo")
+    parser.add_argument("--elo1", type=float, default=5.0, help="SPRT alternative hypothesis Elo")
+    args = parser.parse_args(argv)
+    if len(args.engine) != 2:
+        parser.error("exactly two --engine options are required")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    openings = [fen for fen, _ in read_epd_file(args.openings)] if args.openings else [START_FEN]
+    engine_a, engine_b = args.engine
+    tasks = make_tasks(openings, engine_a, engine_b, args.games, args.max_plies, args.book)
+
+    start = time.perf_counter()
+
+    def report(record):
+        print(f"Game {record['game']}: {record['white']} - {record['black']} {record['result']} "
+              f"({record['reason']}, {record['plies']} plies)")
+
+    records = run_tournament(tasks, args.output, args.concurrency, on_result=report)
+    print(format_summary(summarise(records, engine_a.name, args.elo0, args.elo1)))
+    print(f"{len(records)} games in {time.perf_counter() - start:.1f}s with {args.concurrency} workers")
+
+
+if __name__ == "__main__":
+    main()
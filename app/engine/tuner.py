@@ -0,0 +1,345 @@
+"""
+Texel tuning of the evaluation weights, run with ``python -m app.engine.tuner``.
+
+The classical evaluation (app.engine.evaluation) is linear in its weights once the game phase is known: every
+piece adds its piece-square value, material included, every mobile piece adds its mobility weight times
+the squares it reaches less the average, and every doubled, isolated or passed pawn adds its weight. Each
+labelled position is therefore turned into a sparse feature vector once, with one entry per piece (piece type
+and square seen from white, +1 for white and -1 for black), one per mobility term and one per pawn structure
+term. Its score from white's point of view is
+
+    (features . middlegame weights * phase + features . endgame weights * (MAX_PHASE - phase)) / MAX_PHASE
+
+and the weights are fitted by mini-batch gradient descent (Adam) so that 1 / (1 + 10 ** (-K * score / 400))
+predicts the game results, with K first chosen to fit the starting weights best.
+
+Feature extraction uses the vectorised code of app.engine.batch_eval on chunks of positions in worker
+processes. The features are stored in compressed sparse row form and every epoch is a handful of NumPy calls,
+so an epoch over a million positions takes seconds.
+
+Labelled files have one position per line: an EPD with a ``c9`` result operation, or a FEN followed by a
+result such as ``1-0``, ``0.5`` or ``[1.0]``, always from white's point of view.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from app.engine import evaluation
+from app.engine.batch_eval import MOBILE_SYMBOLS, encode_fens, mobility_counts, pawn_counts, phases
+from app.game.psqt import MAX_PHASE
+
+PIECE_SYMBOLS = "pnbrqk"
+# Feature columns: piece-square entries, one mobility entry per mobile piece type, then the pawn structure
+# entries of batch_eval.pawn_counts(): doubled, isolated and passed pawns on each rank
+PSQT_FEATURES = 6 * 64
+MOBILITY_OFFSET = PSQT_FEATURES
+PAWN_OFFSET = MOBILITY_OFFSET + len(MOBILE_SYMBOLS)
+FEATURES = PAWN_OFFSET + 10
+
+RESULTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+DEFAULT_BATCH_SIZE = 16384
+DEFAULT_LEARNING_RATE = 1.0
+# Positions whose features are extracted per worker task
+CHUNK_SIZE = 20000
+
+
+def parse_result(text: str) -> float:
+    """Reads a game result as a score from white's point of view: 1, 0.5 or 0."""
+    text = text.strip().strip('[];"')
+    if text in RESULTS:
+        return RESULTS[text]
+    value = float(text)
+    if value not in (0.0, 0.5, 1.0):
+        raise ValueError(f"Invalid result: {text!r}")
+    return value
+
+
+def parse_labelled_line(line: str) -> tuple[str, float]:
+    """
+    Reads a labelled position.
+
+    :param line: EPD with a c9 operation, or a FEN followed by the result.
+    :return: FEN and result from white's point of view.
+    """
+    from app.game.epd import parse_epd
+
+    if " c9 " in line:
+        fen, operations = parse_epd(line)
+        return fen, parse_result(operations["c9"][0])
+    fen, _, result = line.strip().rpartition(" ")
+    if not fen:
+        raise ValueError(f"Missing result: {line!r}")
+    return fen, parse_result(result)
+
+
+def read_labelled_positions(path: str) -> tuple[list, np.ndarray]:
+    """
+    Reads a labelled position file, skipping blank lines and '#' comments.
+
+    :return: FENs and a float32 array of results.
+    """
+    fens, results = [], []
+    with open(path) as file:
+        for line in file:
+            if line.strip() and not line.lstrip().startswith("#"):
+                fen, result = parse_labelled_line(line)
+                fens.append(fen)
+                results.append(result)
+    return fens, np.array(results, dtype=np.float32)
+
+
+class PositionFeatures:
+    def __init__(self, offsets: np.ndarray, columns: np.ndarray, values: np.ndarray, phase: np.ndarray):
+        """
+        Sparse feature matrix of a set of positions, in compressed sparse row form.
+
+        :param offsets: (N + 1,) start of each position's entries in columns and values.
+        :param columns: Feature column of each entry.
+        :param values: Value of each entry.
+        :param phase: (N,) game phase of each position.
+        """
+        self.offsets = offsets
+        self.columns = columns
+        self.values = values
+        self.phase = phase
+        # Row of each entry, used to sum the entries of each position
+        self.rows = np.repeat(np.arange(len(phase), dtype=np.int32), np.diff(offsets))
+
+    def __len__(self):
+        return len(self.phase)
+
+    @classmethod
+    def concatenate(cls, parts) -> "PositionFeatures":
+        parts = list(parts)
+        starts = np.cumsum([0] + [len(part.columns) for part in parts[:-1]])
+        offsets = np.concatenate([[0]] + [part.offsets[1:] + start for part, start in zip(parts, starts)])
+        return cls(offsets, np.concatenate([part.columns for part in parts]),
+                   np.concatenate([part.values for part in parts]), np.concatenate([part.phase for part in parts]))
+
+
+def extract_chunk(fens: list) -> PositionFeatures:
+    """Extracts the features of a list of positions. Runs inside a worker process."""
+    squares, _ = encode_fens(fens)
+    count = len(fens)
+    position, square = np.nonzero(squares)
+    codes = squares[position, square].astype(np.int64)
+    black = codes > 6
+    # Black's pieces use the white table upside down
+    psqt_columns = (codes - 1 - 6 * black) * 64 + np.where(black, square ^ 56, square)
+    psqt_values = np.where(black, -1.0, 1.0)
+
+    counts = mobility_counts(squares)
+    mobility_position, mobility_kind = np.nonzero(counts)
+    pawns = pawn_counts(squares)
+    pawn_position, pawn_kind = np.nonzero(pawns)
+
+    rows = np.concatenate([position, mobility_position, pawn_position])
+    columns = np.concatenate([psqt_columns, MOBILITY_OFFSET + mobility_kind, PAWN_OFFSET + pawn_kind])
+    values = np.concatenate([psqt_values, counts[mobility_position, mobility_kind], pawns[pawn_position, pawn_kind]])
+    order = np.argsort(rows, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=count))])
+    return PositionFeatures(offsets, columns[order].astype(np.int16), values[order].astype(np.float32),
+                            phases(squares).astype(np.float32))
+
+
+def extract_features(fens: list, concurrency: int = None, chunk_size: int = CHUNK_SIZE) -> PositionFeatures:
+    """
+    Extracts the features of many positions across worker processes.
+
+    :param fens: Positions.
+    :param concurrency: Number of worker processes, defaults to the number of CPUs; 1 extracts in this process.
+    :param chunk_size: Positions per worker task.
+    """
+    chunks = [fens[start:start + chunk_size] for start in range(0, len(fens), chunk_size)]
+    concurrency = concurrency or os.cpu_count()
+    if concurrency == 1 or len(chunks) == 1:
+        return PositionFeatures.concatenate(map(extract_chunk, chunks))
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(min(concurrency, len(chunks))) as pool:
+        return PositionFeatures.concatenate(pool.map(extract_chunk, chunks))
+
+
+def weights_to_vector(weights: dict) -> np.ndarray:
+    """
+    Flattens evaluation weights into the tuned parameters: the middlegame then the endgame value of every
+    feature column, with material folded into the piece-square values.
+    """
+    vector = np.zeros(2 * FEATURES)
+    for stage in (0, 1):
+        base = stage * FEATURES
+        for index, symbol in enumerate(PIECE_SYMBOLS):
+            table = np.array(weights["psqt"][symbol][stage]) + weights["material"][symbol][stage]
+            vector[base + index * 64:base + (index + 1) * 64] = table
+        for index, symbol in enumerate(MOBILE_SYMBOLS):
+            vector[base + MOBILITY_OFFSET + index] = weights["mobility"][symbol][stage]
+        pawns = weights["pawns"]
+        pawn_weights = [pawns["doubled"], pawns["isolated"]] + pawns["passed"]
+        vector[base + PAWN_OFFSET:base + FEATURES] = [weight[stage] for weight in pawn_weights]
+    return vector
+
+
+def vector_to_weights(vector: np.ndarray, template: dict) -> dict:
+    """
+    Rounds tuned parameters back into evaluation weights. Each piece's material is the average of its
+    piece-square values (over ranks 2 to 7 for pawns, the king's stays 0) and its table keeps the differences.
+
+    :param vector: Parameters from weights_to_vector().
+    :param template: Weights supplying the mobility averages.
+    """
+    weights = {"material": {}, "psqt": {}, "mobility": {}, "pawns": {}}
+    for index, symbol in enumerate(PIECE_SYMBOLS):
+        tables, material = [], []
+        for stage in (0, 1):
+            values = vector[stage * FEATURES + index * 64:stage * FEATURES + (index + 1) * 64]
+            if symbol == "p":
+                value = int(round(values[8:56].mean()))
+            else:
+                value = 0 if symbol == "k" else int(round(values.mean()))
+            table = [int(round(entry)) - value for entry in values]
+            if symbol == "p":
+                # Pawns never stand on the first or last rank, so those entries are not tuned
+                table[:8] = table[56:] = [0] * 8
+            material.append(value)
+            tables.append(table)
+        weights["material"][symbol] = material
+        weights["psqt"][symbol] = tables
+    for index, symbol in enumerate(MOBILE_SYMBOLS):
+        weights["mobility"][symbol] = [int(round(vector[stage * FEATURES + MOBILITY_OFFSET + index]))
+                                       for stage in (0, 1)] + [template["mobility"][symbol][2]]
+    pawns = [[int(round(vector[stage * FEATURES + PAWN_OFFSET + index])) for stage in (0, 1)] for index in range(10)]
+    weights["pawns"] = {"doubled": pawns[0], "isolated": pawns[1], "passed": pawns[2:]}
+    return weights
+
+
+class Tuner:
+    def __init__(self, features: PositionFeatures, results: np.ndarray, weights: dict = None):
+        """
+        Fits evaluation weights to game results.
+
+        :param features: Features of the labelled positions.
+        :param results: Result of each position from white's point of view.
+        :param weights: Starting weights, the evaluator's current ones by default.
+        """
+        self.features = features
+        self.results = np.asarray(results, dtype=np.float64)
+        self.template = weights or evaluation.current_weights()
+        self.parameters = weights_to_vector(self.template)
+        self.scaling = 1.0
+        self._moments = np.zeros_like(self.parameters)
+        self._velocities = np.zeros_like(self.parameters)
+        self._steps = 0
+
+    def _entries(self, rows: slice):
+        """Returns the start and end of a range of positions, and the columns, values and rows of its entries."""
+        features = self.features
+        start, stop, _ = rows.indices(len(features))
+        entries = slice(features.offsets[start], features.offsets[stop])
+        return start, stop, features.columns[entries], features.values[entries], features.rows[entries] - start
+
+    def scores(self, parameters: np.ndarray = None, rows: slice = slice(None)) -> np.ndarray:
+        """Returns the linear scores of a range of positions from white's point of view."""
+        parameters = self.parameters if parameters is None else parameters
+        features = self.features
+        start, stop, columns, values, local_rows = self._entries(rows)
+        count = stop - start
+        middlegame = np.bincount(local_rows, values * parameters[columns], minlength=count)
+        endgame = np.bincount(local_rows, values * parameters[FEATURES + columns], minlength=count)
+        phase = features.phase[start:stop]
+        return (middlegame * phase + endgame * (MAX_PHASE - phase)) / MAX_PHASE
+
+    def _predict(self, scores: np.ndarray, scaling: float) -> np.ndarray:
+        return 1.0 / (1.0 + np.power(10.0, -scaling * scores / 400.0))
+
+    def loss(self, parameters: np.ndarray = None, scaling: float = None) -> float:
+        """Returns the mean squared difference between the predicted and the actual results."""
+        predicted = self._predict(self.scores(parameters), self.scaling if scaling is None else scaling)
+        return float(np.mean((self.results - predicted) ** 2))
+
+    def fit_scaling(self, low: float = 0.1, high: float = 3.0, iterations: int = 40) -> float:
+        """Chooses the K that makes the current weights predict the results best, by golden section search."""
+        scores = self.scores()
+        ratio = (math.sqrt(5) - 1) / 2
+
+        def loss(scaling):
+            return float(np.mean((self.results - self._predict(scores, scaling)) ** 2))
+
+        for _ in range(iterations):
+            first, second = high - ratio * (high - low), low + ratio * (high - low)
+            if loss(first) < loss(second):
+                high = second
+            else:
+                low = first
+        self.scaling = (low + high) / 2
+        return self.scaling
+
+    def gradient(self, rows: slice) -> np.ndarray:
+        """Returns the gradient of the loss over a range of positions with respect to the parameters."""
+        start, stop, columns, values, local_rows = self._entries(rows)
+        scores = self.scores(rows=rows)
+        predicted = self._predict(scores, self.scaling)
+        # d loss / d score for each position
+        slopes = (-2.0 * (self.results[start:stop] - predicted) * predicted * (1.0 - predicted)
+                  * self.scaling * math.log(10) / 400.0 / (stop - start))
+        phase = self.features.phase[start:stop]
+        middlegame = np.bincount(columns, values * (slopes * phase / MAX_PHASE)[local_rows], minlength=FEATURES)
+        endgame = np.bincount(columns, values * (slopes * (MAX_PHASE - phase) / MAX_PHASE)[local_rows],
+                              minlength=FEATURES)
+        return np.concatenate([middlegame, endgame])
+
+    def epoch(self, batch_size: int = DEFAULT_BATCH_SIZE, learning_rate: float = DEFAULT_LEARNING_RATE,
+              beta1: float = 0.9, beta2: float = 0.999) -> float:
+        """
+        Runs one pass of Adam over the positions in mini-batches.
+
+        :return: The loss after the epoch.
+        """
+        for start in range(0, len(self.features), batch_size):
+            gradient = self.gradient(slice(start, start + batch_size))
+            self._steps += 1
+            self._moments = beta1 * self._moments + (1 - beta1) * gradient
+            self._velocities = beta2 * self._velocities + (1 - beta2) * gradient ** 2
+            moment = self._moments / (1 - beta1 ** self._steps)
+            velocity = self._velocities / (1 - beta2 ** self._steps)
+            self.parameters -= learning_rate * moment / (np.sqrt(velocity) + 1e-8)
+        return self.loss()
+
+    def weights(self) -> dict:
+        """Returns the tuned parameters as evaluation weights, see vector_to_weights()."""
+        return vector_to_weights(self.parameters, self.template)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the evaluation weights on positions labelled with results.")
+    parser.add_argument("positions", help="labelled EPD or FEN file")
+    parser.add_argument("output", help="weights file to write, loaded with the UCI EvalWeights option")
+    parser.add_argument("--weights", help="weights file to start from, defaults to the built-in weights")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_LEARNING_RATE)
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count(), help="feature extraction processes")
+    args = parser.parse_args(argv)
+
+    if args.weights:
+        evaluation.load_weights(args.weights)
+    start = time.perf_counter()
+    fens, results = read_labelled_positions(args.positions)
+    features = extract_features(fens, args.concurrency)
+    print(f"{len(fens)} positions, {len(features.columns)} feature entries extracted in "
+          f"{time.perf_counter() - start:.1f}s")
+
+    tuner = Tuner(features, results)
+    print(f"K = {tuner.fit_scaling():.3f}, loss {tuner.loss():.6f}")
+    for epoch in range(1, args.epochs + 1):
+        start = time.perf_counter()
+        loss = tuner.epoch(args.batch_size, args.learning_rate)
+        print(f"Epoch {epoch}: loss {loss:.6f} ({time.perf_counter() - start:.2f}s)")
+        evaluation.save_weights(args.output, tuner.weights())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import multiprocessing
+import queue
+import traceback
+
+from app.engine.search import Search, SearchLimits, SearchOptions
+
+
+def _worker_main(requests, results, cancelled_below, stopped_below):
+    """
+    Entry point of the engine process. Searches each submitted position and streams progress back.
+
+    :param requests: Queue of (job_id, fen, limits, tablebase directory, network file, weights file, search options,
+                     multipv) tuples, None to exit.
+    :param results: Queue the progress and result messages are put on.
+    :param cancelled_below: Shared value; every job with a lower id should stop and discard its result.
+    :param stopped_below: Shared value; every job with a lower id should stop and report its best move so far.
+    """
+    from app.engine.tablebase import Tablebase
+    from app.game.board import Board
+
+    board = tablebase = evaluator = None
+    evaluator_path = weights_path = None
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        job_id, fen, limits, tablebase_path, network_path, weights, options, multipv = request
+        if cancelled_below.value > job_id:
+            results.put(("cancelled", job_id, None))
+            continue
+
+        try:
+            if weights != weights_path:
+                # Weights change the board's piece-square sums, so they are loaded before the position is set up
+                from app.engine.evaluation import DEFAULT_WEIGHTS, load_weights, set_weights
+
+                load_weights(weights) if weights else set_weights(DEFAULT_WEIGHTS)
+                weights_path = weights
+            if board is None:
+                board = Board(fen=fen)
+            else:
+                board.set_fen(fen)
+            if tablebase_path != (tablebase.directory if tablebase is not None else None):
+                if tablebase is not None:
+                    tablebase.close()
+                tablebase = Tablebase(tablebase_path) if tablebase_path else None
+            if network_path != evaluator_path:
+                # NumPy is only needed, and imported, once a network is used
+                from app.engine.nnue import Network, NNUEEvaluator
+
+                evaluator = NNUEEvaluator(Network.load(network_path)) if network_path else None
+                evaluator_path = network_path
+            search = Search(
+                board,
+                SearchLimits.from_dict(limits),
+                should_stop=lambda: cancelled_below.value > job_id or stopped_below.value > job_id,
+                on_info=lambda info: results.put(("info", job_id, info)),
+                tablebase=tablebase,
+                evaluator=evaluator,
+                options=SearchOptions.from_dict(options) if options else None,
+                multipv=multipv,
+            )
+            move, score = search.run()
+        except Exception:
+            results.put(("error", job_id, traceback.format_exc()))
+            continue
+
+        if cancelled_below.value > job_id:
+            results.put(("cancelled", job_id, None))
+        else:
+            results.put(("bestmove", job_id, {"move": move.uci() if move else None, "score": score,
+                                              "nodes": search.nodes}))
+
+
+class EngineWorker:
+    """
+    Runs searches in a separate process so the GUI thread never blocks while the engine thinks.
+
+    Positions are submitted with submit(); progress and the final move are collected without blocking via poll().
+    """
+
+    def __init__(self):
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._requests = None
+        self._results = None
+        self._cancelled_below = None
+        self._stopped_below = None
+        self._next_job_id = 0
+        self.job_id = None
+
+    @property
+    def busy(self) -> bool:
+        """Whether a submitted search has not finished yet."""
+        return self.job_id is not None
+
+    def start(self):
+        """Starts the engine process if it is not running."""
+        if self._process is not None and self._process.is_alive():
+            return
+        self._requests = self._context.Queue()
+        self._results = self._context.Queue()
+        self._cancelled_below = self._context.Value("i", 0)
+        self._stopped_below = self._context.Value("i", 0)
+        self._process = self._context.Process(
+            target=_worker_main,
+            args=(self._requests, self._results, self._cancelled_below, self._stopped_below),
+            daemon=True,
+        )
+        self._process.start()
+
+    def submit(self, fen: str, limits: SearchLimits, tablebase_path: str = None, network_path: str = None,
+               weights_path: str = None, options: SearchOptions = None, multipv: int = 1) -> int:
+        """
+        Starts searching a position, cancelling any search still running.
+
+        :param fen: Position to search.
+        :param limits: Limits for the search.
+        :param tablebase_path: Directory of endgame tables for the search to probe.
+        :param network_path: Network weight file to evaluate with instead of the classical evaluation.
+        :param weights_path: Weights file for the classical evaluation, written by app.engine.tuner.
+        :param options: Search techniques to use, all by default.
+        :param multipv: Number of best moves to report progress on, see Search.
+        :return: Id of the job, included in every message it produces.
+        """
+        self.start()
+        if self.busy:
+            self.cancel()
+        job_id = self._next_job_id
+        self._next_job_id += 1
+        self.job_id = job_id
+        self._requests.put((job_id, fen, limits.to_dict(), tablebase_path, network_path, weights_path,
+                            options.to_dict() if options else None, multipv))
+        return job_id
+
+    def stop(self):
+        """Stops the current search early. It still reports the best move found so far."""
+        if self._stopped_below is not None:
+            with self._stopped_below.get_lock():
+                self._stopped_below.value = self._next_job_id
+
+    def cancel(self):
+        """Stops the current search. Its remaining messages are discarded."""
+        if self._cancelled_below is not None:
+            with self._cancelled_below.get_lock():
+                self._cancelled_below.value = self._next_job_id
+        self.job_id = None
+
+    def poll(self) -> list:
+        """
+        Returns the messages received for the current job since the last call, without blocking.
+
+        :return: List of (kind, payload) tuples where kind is 'info', 'bestmove' or 'error'.
+        """
+        messages = []
+        if self._results is None:
+            return messages
+        while True:
+            try:
+                kind, job_id, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if job_id != self.job_id:
+                continue
+            if kind in ("bestmove", "error", "cancelled"):
+                self.job_id = None
+            if kind != "cancelled":
+                messages.append((kind, payload))
+        return messages
+
+    def close(self, timeout: float = 1.0):
+        """Cancels any search and shuts down the engine process."""
+        if self._process is None:
+            return
+        self.cancel()
+        self._requests.put(None)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._process = None
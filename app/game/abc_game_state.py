@@ -8,6 +8,22 @@ class GameState:
     def update(self):
         pass
 
+    def is_idle(self) -> bool:
+        """
+        Whether the state is waiting on input, with no animation or drag in progress.
+        The main loop blocks on the next event while this is True.
+        """
+        return True
+
+    def close(self):
+        """Releases anything the state holds on to, e.g. background processes, when it is left."""
+        pass
+
     def render(self):
+        """
+        Draws the state onto the screen.
+
+        :return: List of changed screen rects, or None if the whole screen should be flipped.
+        """
         pass
 
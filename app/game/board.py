@@ -1,8 +1,5 @@
 from typing import List, Union
 
-import pygame
-import copy
-
 from app import get_board_asset_path
 from app.game.pieces.King import King
 from app.game.pieces.Queen import Queen
@@ -10,20 +7,52 @@ from app.game.pieces.Bishop import Bishop
 from app.game.pieces.Knight import Knight
 from app.game.pieces.Rook import Rook
 from app.game.pieces.Pawn import Pawn
+from app.game.move import Move, square_name, parse_square
+from app.game.zobrist import zobrist_hash, pawn_hash, piece_key, castling_key, en_passant_key, BLACK_TO_MOVE_KEY
+from app.game.psqt import psqt_scores, piece_square_score, PHASE_WEIGHTS
+from app.game.material import material_hash, material_unit, PAWN_ROOK_QUEEN_MASK
+from app.game.instrumentation import InstrumentStats, instrument, uninstrument
 from . import Colour, is_in_bounds, get_positions_between
 
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+PIECE_CLASSES = {piece_class.symbol: piece_class for piece_class in (King, Queen, Rook, Bishop, Knight, Pawn)}
+
+KNIGHT_JUMPS = [(2, -1), (2, 1), (-2, -1), (-2, 1), (1, 2), (-1, 2), (1, -2), (-1, -2)]
+KING_STEPS = [(1, 1), (1, -1), (-1, 1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)]
+ROOK_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+BISHOP_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+# Piece values used by static exchange evaluation, see Board.see(); the king is worth more than any exchange
+SEE_VALUES = {"p": 100, "n": 320, "b": 330, "r": 500, "q": 900, "k": 20000}
+
+# Castling right lost when a piece leaves or is captured on each corner / king square
+CASTLING_SQUARES = {(7, 7): "K", (7, 0): "Q", (0, 7): "k", (0, 0): "q", (7, 4): "KQ", (0, 4): "kq"}
+# King move and rook move for each castling right
+CASTLING_MOVES = {
+    "K": (Move((7, 4), (7, 6)), (7, 7), (7, 5)),
+    "Q": (Move((7, 4), (7, 2)), (7, 0), (7, 3)),
+    "k": (Move((0, 4), (0, 6)), (0, 7), (0, 5)),
+    "q": (Move((0, 4), (0, 2)), (0, 0), (0, 3)),
+}
+
 
 class Board:
-    def __init__(self, screen_width, screen_height):
+    def __init__(self, screen_width=800, screen_height=800, fen=None):
         """
         Initializes the chess board, its pieces, and relevant dimensions for rendering.
+
+        :param screen_width: Width of the window the board is drawn in.
+        :param screen_height: Height of the window the board is drawn in.
+        :param fen: Optional FEN string to set up instead of the starting position.
         """
         # Game screen dimensions
         self.screen_width = screen_width
         self.screen_height = screen_height
 
-        # Load and scale the chessboard sprite
-        self._load_board_image()
+        # Chessboard sprite, loaded when first drawn so that pygame is only imported by boards that are rendered
+        self._sprite = None
+        self._sprite_loaded = False
 
         # Initialize the empty board and track pieces
         self._empty_board = [[None for _ in range(8)] for _ in range(8)]
@@ -34,24 +63,73 @@ class Board:
         self.stalemate = False
         self.checkmate = False
         self.en_passant_target = None
+        self.castling_rights = "KQkq"
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        # Zobrist key of the position, see app.game.zobrist
+        self.zobrist_key = 0
+        # Zobrist key of the pawns alone, indexing cached pawn structure scores
+        self.pawn_key = 0
+        # Number of pieces of each type and colour, see app.game.material
+        self.material_key = 0
+        # Packed material and piece-square sum and game phase, see app.game.psqt
+        self.psqt_score = 0
+        self.phase = 0
+        # Opening book consulted by book_moves(), e.g. an app.archive.opening_tree.OpeningTree
+        self.opening_book = None
+        # Undo information for every move made with make_move()
+        self._history = []
+        # Call counts and times of the hot paths, None unless enable_stats() was called
+        self.stats = None
+
+        # Off-screen layer holding the board sprite and stationary pieces, see render()
+        self._layer = None
+        self._layer_pieces = {}
 
         # Configuration for chessboard border and square size
         self.border_ratio = 0.05
         self._calculate_board_dimensions()
 
         # Set up the initial game state
-        self.setup_board()
+        if fen is None:
+            self.setup_board()
+        else:
+            self.set_fen(fen)
+
+    def enable_stats(self, stats: InstrumentStats = None) -> InstrumentStats:
+        """
+        Starts counting and timing the calls of this board's hot paths, see app.game.instrumentation.
+
+        :param stats: Stats to record in, e.g. to share them between boards; a new one by default.
+        :return: The stats, also kept in self.stats.
+        """
+        self.stats = instrument(self, stats if stats is not None else InstrumentStats())
+        return self.stats
+
+    def disable_stats(self):
+        """Stops the instrumentation; the stats recorded so far stay in self.stats."""
+        uninstrument(self)
+
+    @property
+    def sprite(self):
+        """The chessboard image scaled to the screen, loaded on first use."""
+        if not self._sprite_loaded:
+            self._load_board_image()
+        return self._sprite
 
     def _load_board_image(self):
         """Loads and scales the chessboard image."""
+        import pygame
+
+        self._sprite_loaded = True
         try:
-            self.sprite = pygame.transform.scale(
+            self._sprite = pygame.transform.scale(
                 pygame.image.load(get_board_asset_path()),
                 (self.screen_width, self.screen_height)
             )
         except pygame.error as e:
             print(f"Error loading board image: {e}")
-            self.sprite = None
+            self._sprite = None
 
     def _calculate_board_dimensions(self):
         """Calculates the dimensions of the active chessboard and each square."""
@@ -96,6 +174,10 @@ class Board:
             for pos in positions:
                 colour = Colour.BLACK if pos[0] == 0 else Colour.WHITE
                 self._add_piece(piece_class, pos, colour)
+        self.zobrist_key = zobrist_hash(self)
+        self.pawn_key = pawn_hash(self)
+        self.material_key = material_hash(self)
+        self.psqt_score, self.phase = psqt_scores(self)
         self.update_piece_move_list()
 
     def update_piece_move_list(self, colour=None):
@@ -128,55 +210,543 @@ class Board:
             print("Invalid move: Move not allowed for piece")
             return
 
-        # Simulate move to check for threats
-        old_position = piece.position
-        current_piece = self._simulate_move(piece, new_position)
+        # A pawn reaching the promotion rank is tried as a queen; the piece only matters once the move is legal
+        start = piece.position
+        promotion_rank = 0 if piece.colour == Colour.WHITE else 7
+        promotes = isinstance(piece, Pawn) and new_position[0] == promotion_rank
 
-        if self.is_check(self.turn):
+        # Make the move and take it back if it leaves the mover in check
+        colour = self.turn
+        self.make_move(Move(start, new_position, "q" if promotes else None))
+        if self.in_check(colour):
             print("Invalid move: Leaves game in check")
-
-            self._revert_move(piece, new_position, old_position, current_piece)
+            self.unmake_move()
             return
 
-        # Check for promotion if the piece is a Pawn and reached the promotion rank
-        if isinstance(piece, Pawn):
-            promotion_rank = 0 if piece.colour == Colour.WHITE else 7
-            if new_position[0] == promotion_rank:
-                self.promote_pawn(piece, new_position)
+        # Ask for the promotion piece only for a legal promotion
+        if promotes:
+            self.unmake_move()
+            self.make_move(Move(start, new_position, self.promote_pawn(piece, new_position)))
+
+        self._refresh_game_state()
+
+    def play_move(self, move: Move):
+        """
+        Plays a legal move chosen outside the GUI, e.g. by an engine, and updates the game state.
+
+        :param move: The move to play.
+        """
+        self.make_move(move)
+        self._refresh_game_state()
+
+    def undo_move(self):
+        """Takes back the last move played and updates the game state."""
+        if not self._history:
+            return
+        self.unmake_move()
+        self._refresh_game_state()
 
-        # Execute the move and switch turns
-        self._finalize_move(piece)
+    def _refresh_game_state(self):
+        """Updates the pieces' move lists and the check, checkmate and stalemate flags after a move."""
+        self.update_piece_move_list()
+        self.check = self.in_check(self.turn)
         self.is_checkmate()
 
-        if isinstance(piece, Pawn) and abs(new_position[0] - piece.position[0]) == 2:
-            # If the pawn moved two squares forward, set the en passant target to the square behind it
-            self.en_passant_target = (new_position[0] - piece.direction, new_position[1])
-        else:
-            # Reset the en passant target if no two-square move happened
-            self.en_passant_target = None
+    @staticmethod
+    def promote_pawn(pawn, position) -> str:
+        """
+        Asks which piece a pawn reaching the last rank is promoted to.
 
-    def promote_pawn(self, pawn, position):
-        """Promotes a pawn to another piece when it reaches the last rank."""
+        :return: Lower-case letter of the promotion piece.
+        """
         print(f"Pawn at {position} is being promoted!")
 
         # Ask the user for promotion choice (can be expanded to a GUI later)
         promotion_choice = input("Choose piece for promotion (Q=Queen, R=Rook, B=Bishop, K=Knight): ").upper()
 
-        if promotion_choice == 'Q':
-            new_piece = Queen(position=position, colour=pawn.colour, square_size=self.square_size_x)
-        elif promotion_choice == 'R':
-            new_piece = Rook(position=position, colour=pawn.colour, square_size=self.square_size_x)
-        elif promotion_choice == 'B':
-            new_piece = Bishop(position=position, colour=pawn.colour, square_size=self.square_size_x)
-        elif promotion_choice == 'K':
-            new_piece = Knight(position=position, colour=pawn.colour, square_size=self.square_size_x)
-        else:
+        choices = {'Q': 'q', 'R': 'r', 'B': 'b', 'K': 'n'}
+        if promotion_choice not in choices:
             print("Invalid choice! Defaulting to Queen.")
-            new_piece = Queen(position=position, colour=pawn.colour, square_size=self.square_size_x)
+        promotion = choices.get(promotion_choice, 'q')
+        print(f"Pawn promoted to {PIECE_CLASSES[promotion].__name__}")
+        return promotion
+
+    def set_fen(self, fen: str):
+        """
+        Sets up the board from a FEN string.
+
+        :param fen: Position in Forsyth-Edwards Notation.
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        placement, turn, castling, en_passant = fields[:4]
+        rows = placement.split("/")
+        if len(rows) != 8:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+
+        self.board = {}
+        for row, text in enumerate(rows):
+            col = 0
+            for char in text:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                if char.lower() not in PIECE_CLASSES or col > 7:
+                    raise ValueError(f"Invalid FEN: {fen!r}")
+                colour = Colour.WHITE if char.isupper() else Colour.BLACK
+                self._add_piece(PIECE_CLASSES[char.lower()], (row, col), colour)
+                col += 1
+
+        # Pawns off their starting rank have already used their double step
+        for position, piece in self.board.items():
+            if isinstance(piece, Pawn):
+                piece.has_moved = position[0] != (6 if piece.colour == Colour.WHITE else 1)
+
+        self.turn = Colour.WHITE if turn == "w" else Colour.BLACK
+        self.castling_rights = "".join(right for right in "KQkq" if right in castling)
+        self.en_passant_target = None if en_passant == "-" else parse_square(en_passant)
+        self.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        self.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        self._history = []
+        self.zobrist_key = zobrist_hash(self)
+        self.pawn_key = pawn_hash(self)
+        self.material_key = material_hash(self)
+        self.psqt_score, self.phase = psqt_scores(self)
+        self.selected_piece = None
+        self.update_piece_move_list()
+        self.check = self.in_check(self.turn)
+        self.checkmate = self.stalemate = False
+
+    def fen(self) -> str:
+        """Returns the current position in Forsyth-Edwards Notation."""
+        rows = []
+        for row in range(8):
+            text, empty = "", 0
+            for col in range(8):
+                piece = self.board.get((row, col))
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += piece.symbol.upper() if piece.colour == Colour.WHITE else piece.symbol
+            rows.append(text + (str(empty) if empty else ""))
+
+        return " ".join([
+            "/".join(rows),
+            "w" if self.turn == Colour.WHITE else "b",
+            self.castling_rights or "-",
+            square_name(self.en_passant_target) if self.en_passant_target else "-",
+            str(self.halfmove_clock),
+            str(self.fullmove_number),
+        ])
+
+    def make_move(self, move: Move):
+        """
+        Makes a move without validating it or updating the pieces' move lists.
+        Handles captures, en passant, castling and promotion, and records what is needed to unmake it.
+
+        :param move: The move to make.
+        """
+        key = self.zobrist_key ^ en_passant_key(self) ^ BLACK_TO_MOVE_KEY
+        piece = self.board.pop(move.start)
+        captured_position = move.end
+        if isinstance(piece, Pawn) and move.end == self.en_passant_target and move.end not in self.board:
+            captured_position = (move.start[0], move.end[1])
+        captured = self.board.pop(captured_position, None)
+        key ^= piece_key(piece, move.start)
+        score = self.psqt_score - piece_square_score(piece, move.start)
+        self._history.append((move, piece, captured, captured_position, piece.has_moved,
+                              self.en_passant_target, self.castling_rights, self.halfmove_clock,
+                              self.zobrist_key, self.psqt_score, self.phase, self.pawn_key, self.material_key))
+        if isinstance(piece, Pawn):
+            self.pawn_key ^= piece_key(piece, move.start)
+            if not move.promotion:
+                self.pawn_key ^= piece_key(piece, move.end)
+        if captured is not None:
+            key ^= piece_key(captured, captured_position)
+            if isinstance(captured, Pawn):
+                self.pawn_key ^= piece_key(captured, captured_position)
+            score -= piece_square_score(captured, captured_position)
+            self.phase -= PHASE_WEIGHTS[captured.symbol]
+            self.material_key -= material_unit(captured)
+
+        if move.promotion:
+            new_piece = PIECE_CLASSES[move.promotion](position=move.end, colour=piece.colour,
+                                                      square_size=self.square_size_x)
+            new_piece.has_moved = True
+            self.board[move.end] = new_piece
+            self.phase += PHASE_WEIGHTS[move.promotion]
+            self.material_key += material_unit(new_piece) - material_unit(piece)
+        else:
+            piece.position = move.end
+            self.board[move.end] = piece
+        piece.has_moved = True
+        key ^= piece_key(self.board[move.end], move.end)
+        score += piece_square_score(self.board[move.end], move.end)
+
+        # Castling moves the rook as well
+        if isinstance(piece, King) and abs(move.end[1] - move.start[1]) == 2:
+            rook_start, rook_end = self._castling_rook_squares(move)
+            rook = self.board.pop(rook_start)
+            rook.position = rook_end
+            self.board[rook_end] = rook
+            key ^= piece_key(rook, rook_start) ^ piece_key(rook, rook_end)
+            score += piece_square_score(rook, rook_end) - piece_square_score(rook, rook_start)
+        self.psqt_score = score
+
+        if self.castling_rights:
+            lost = CASTLING_SQUARES.get(move.start, "") + CASTLING_SQUARES.get(captured_position, "")
+            if lost:
+                key ^= castling_key(self.castling_rights)
+                self.castling_rights = "".join(right for right in self.castling_rights if right not in lost)
+                key ^= castling_key(self.castling_rights)
+
+        if isinstance(piece, Pawn) and abs(move.end[0] - move.start[0]) == 2:
+            self.en_passant_target = ((move.start[0] + move.end[0]) // 2, move.start[1])
+        else:
+            self.en_passant_target = None
+
+        self.halfmove_clock = 0 if captured is not None or isinstance(piece, Pawn) else self.halfmove_clock + 1
+        if self.turn == Colour.BLACK:
+            self.fullmove_number += 1
+        self.turn = Colour.WHITE if self.turn == Colour.BLACK else Colour.BLACK
+        self.zobrist_key = key ^ en_passant_key(self)
+
+    def make_null_move(self):
+        """
+        Passes the turn to the other side without moving, as the search's null-move pruning needs. Taken back
+        with unmake_move() like any other move; it appears as None in move_history.
+        """
+        self._history.append((None, None, None, None, None, self.en_passant_target, self.castling_rights,
+                              self.halfmove_clock, self.zobrist_key, self.psqt_score, self.phase, self.pawn_key,
+                              self.material_key))
+        key = self.zobrist_key ^ en_passant_key(self) ^ BLACK_TO_MOVE_KEY
+        self.en_passant_target = None
+        self.halfmove_clock += 1
+        if self.turn == Colour.BLACK:
+            self.fullmove_number += 1
+        self.turn = Colour.WHITE if self.turn == Colour.BLACK else Colour.BLACK
+        self.zobrist_key = key
+
+    def unmake_move(self) -> Move:
+        """
+        Takes back the last move made with make_move() or make_null_move().
+
+        :return: The move that was taken back, None for a null move.
+        """
+        (move, piece, captured, captured_position, has_moved, en_passant, castling, halfmove,
+         self.zobrist_key, self.psqt_score, self.phase, self.pawn_key, self.material_key) = self._history.pop()
+        self.turn = Colour.WHITE if self.turn == Colour.BLACK else Colour.BLACK
+        if self.turn == Colour.BLACK:
+            self.fullmove_number -= 1
+        if move is None:
+            self.en_passant_target = en_passant
+            self.halfmove_clock = halfmove
+            return None
+
+        if isinstance(piece, King) and abs(move.end[1] - move.start[1]) == 2:
+            rook_start, rook_end = self._castling_rook_squares(move)
+            rook = self.board.pop(rook_end)
+            rook.position = rook_start
+            self.board[rook_start] = rook
+
+        del self.board[move.end]
+        piece.position = move.start
+        piece.has_moved = has_moved
+        self.board[move.start] = piece
+        if captured is not None:
+            self.board[captured_position] = captured
+
+        self.en_passant_target = en_passant
+        self.castling_rights = castling
+        self.halfmove_clock = halfmove
+        return move
+
+    @staticmethod
+    def _castling_rook_squares(move: Move):
+        """Returns the start and end position of the rook for a castling king move."""
+        row = move.start[0]
+        return (row, 7 if move.end[1] == 6 else 0), (row, (move.start[1] + move.end[1]) // 2)
+
+    @property
+    def move_history(self) -> List[Move]:
+        """Moves made with make_move() since the position was set up."""
+        return [entry[0] for entry in self._history]
+
+    @property
+    def ply(self) -> int:
+        """Number of moves made with make_move() since the position was set up."""
+        return len(self._history)
+
+    def history_key(self, ply: int) -> int:
+        """Returns the Zobrist key of the position before the move made at a ply, or the current key."""
+        return self.zobrist_key if ply == len(self._history) else self._history[ply][8]
+
+    def piece_changes(self, ply: int) -> tuple[list, list]:
+        """
+        Lists the pieces a move made with make_move() took off and put on the board.
+
+        :param ply: Index of the move in move_history.
+        :return: Removed and added (colour, symbol, position) triples, none for a null move.
+        """
+        move, piece, captured, captured_position = self._history[ply][:4]
+        if move is None:
+            return [], []
+        removed = [(piece.colour, piece.symbol, move.start)]
+        added = [(piece.colour, move.promotion or piece.symbol, move.end)]
+        if captured is not None:
+            removed.append((captured.colour, captured.symbol, captured_position))
+        if isinstance(piece, King) and abs(move.end[1] - move.start[1]) == 2:
+            rook_start, rook_end = self._castling_rook_squares(move)
+            removed.append((piece.colour, "r", rook_start))
+            added.append((piece.colour, "r", rook_end))
+        return removed, added
+
+    def pseudo_legal_moves(self) -> List[Move]:
+        """
+        Returns the moves of the side to move, without checking whether they leave the king in check.
+        Castling is only generated when it is fully legal.
+        """
+        moves = []
+        colour = self.turn
+        for position, piece in list(self.board.items()):
+            if piece.colour != colour:
+                continue
+            targets = piece._valid_moves(self.board, self.en_passant_target)
+            if isinstance(piece, Pawn):
+                for target in targets:
+                    if target[0] in (0, 7):
+                        moves.extend(Move(position, target, promotion) for promotion in "qrbn")
+                    else:
+                        moves.append(Move(position, target))
+            else:
+                moves.extend(Move(position, target) for target in targets)
+
+        moves.extend(self._castling_moves(colour))
+        return moves
+
+    def _castling_moves(self, colour) -> List[Move]:
+        """Returns the castling moves available to the given colour."""
+        moves = []
+        rights = [right for right in self.castling_rights if right.isupper() == (colour == Colour.WHITE)]
+        if not rights:
+            return moves
+
+        opponent = Colour.BLACK if colour == Colour.WHITE else Colour.WHITE
+        for right in rights:
+            king_move, rook_position, rook_target = CASTLING_MOVES[right]
+            king, rook = self.board.get(king_move.start), self.board.get(rook_position)
+            if not isinstance(king, King) or not isinstance(rook, Rook) or rook.colour != colour:
+                continue
+            row = king_move.start[0]
+            step = 1 if rook_position[1] > king_move.start[1] else -1
+            between = [(row, col) for col in range(king_move.start[1] + step, rook_position[1], step)]
+            if any(square in self.board for square in between):
+                continue
+            passed = [king_move.start, (row, king_move.start[1] + step), king_move.end]
+            if any(self.is_square_attacked(square, opponent) for square in passed):
+                continue
+            moves.append(king_move)
+        return moves
 
-        # Replace the pawn with the promoted piece
-        self.board[position] = new_piece
-        print(f"Pawn promoted to {new_piece.__class__.__name__}")
+    def legal_moves(self) -> List[Move]:
+        """Returns all legal moves for the side to move."""
+        colour = self.turn
+        opponent = Colour.BLACK if colour == Colour.WHITE else Colour.WHITE
+        king_position = self.find_king(colour)
+        moves = []
+        for move in self.pseudo_legal_moves():
+            self.make_move(move)
+            target = move.end if move.start == king_position else king_position
+            if target is None or not self.is_square_attacked(target, opponent):
+                moves.append(move)
+            self.unmake_move()
+        return moves
+
+    def book_moves(self, book=None) -> list:
+        """
+        Looks up the current position in an opening book.
+
+        :param book: Book to use instead of opening_book; any object with a moves(board) method returning
+                     entries that have a move attribute.
+        :return: The book's entries for the position whose moves are legal, in the book's order.
+        """
+        book = book if book is not None else self.opening_book
+        if book is None:
+            return []
+        entries = book.moves(self)
+        if not entries:
+            return []
+        legal_moves = set(self.legal_moves())
+        return [entry for entry in entries if entry.move in legal_moves]
+
+    def is_capture(self, move: Move) -> bool:
+        """Checks whether a move captures a piece, including en passant."""
+        if move.end in self.board:
+            return True
+        return move.end == self.en_passant_target and isinstance(self.board.get(move.start), Pawn)
+
+    def is_square_attacked(self, square: tuple[int, int], colour: Colour) -> bool:
+        """
+        Checks whether any piece of the given colour attacks a square, scanning outwards from the square.
+
+        :param square: (ROW, COL) position to check.
+        :param colour: Colour of the attacking side.
+        :return: True if the square is attacked.
+        """
+        board = self.board
+        row, col = square
+
+        # White pawns attack towards row 0, so they sit one row below the square they attack
+        pawn_row = row + 1 if colour == Colour.WHITE else row - 1
+        for dcol in (-1, 1):
+            piece = board.get((pawn_row, col + dcol))
+            if piece is not None and piece.symbol == "p" and piece.colour == colour:
+                return True
+
+        for drow, dcol in KNIGHT_JUMPS:
+            piece = board.get((row + drow, col + dcol))
+            if piece is not None and piece.symbol == "n" and piece.colour == colour:
+                return True
+
+        for drow, dcol in KING_STEPS:
+            piece = board.get((row + drow, col + dcol))
+            if piece is not None and piece.symbol == "k" and piece.colour == colour:
+                return True
+
+        for directions, sliders in ((ROOK_DIRECTIONS, "rq"), (BISHOP_DIRECTIONS, "bq")):
+            for drow, dcol in directions:
+                new_row, new_col = row + drow, col + dcol
+                while 0 <= new_row < 8 and 0 <= new_col < 8:
+                    piece = board.get((new_row, new_col))
+                    if piece is not None:
+                        if piece.colour == colour and piece.symbol in sliders:
+                            return True
+                        break
+                    new_row += drow
+                    new_col += dcol
+        return False
+
+    def _see_attackers(self, square: tuple[int, int], skipped) -> tuple[list, list]:
+        """
+        Collects the pieces that attack a square directly or through other attackers, for see().
+
+        :param square: Target square.
+        :param skipped: Positions to treat as empty.
+        :return: List of knights and king-step, pawn and slider attackers, and for each of the eight rays from
+                 the square the pieces along it, nearest first, as (piece, distance) pairs.
+        """
+        board = self.board
+        row, col = square
+        knights = []
+        for drow, dcol in KNIGHT_JUMPS:
+            piece = board.get((row + drow, col + dcol))
+            if piece is not None and piece.symbol == "n" and (row + drow, col + dcol) not in skipped:
+                knights.append(piece)
+        rays = []
+        for drow, dcol in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+            ray, new_row, new_col, distance = [], row + drow, col + dcol, 1
+            while 0 <= new_row < 8 and 0 <= new_col < 8:
+                piece = board.get((new_row, new_col))
+                if piece is not None and (new_row, new_col) not in skipped:
+                    ray.append((piece, distance))
+                new_row, new_col, distance = new_row + drow, new_col + dcol, distance + 1
+            rays.append(((drow, dcol), ray))
+        return knights, rays
+
+    @staticmethod
+    def _attacks_along(piece, direction: tuple[int, int], distance: int) -> bool:
+        """Checks whether a piece attacks the square it is distance steps away from, looking back along direction."""
+        symbol = piece.symbol
+        if symbol == "q":
+            return True
+        if direction[0] and direction[1]:
+            if symbol == "b":
+                return True
+            if distance != 1:
+                return False
+            # White pawns attack towards row 0, so they stand one row below their target
+            return symbol == "k" or (symbol == "p" and direction[0] == (1 if piece.colour == Colour.WHITE else -1))
+        return symbol == "r" or (symbol == "k" and distance == 1)
+
+    def see(self, move: Move) -> int:
+        """
+        Static exchange evaluation: resolves the sequence of captures on the target square of a move, each side
+        recapturing with its least valuable attacker and stopping when that would lose material. Sliding
+        pieces behind other attackers join in as the pieces in front of them capture. No moves are made and
+        pins are not considered.
+
+        :param move: Move of the side to move, a capture or not.
+        :return: Material the moving side wins in centipawns (negative when it loses material), by SEE_VALUES.
+        """
+        board = self.board
+        target = move.end
+        piece = board[move.start]
+        skipped = {move.start}
+        victim = board.get(target)
+        if victim is None and piece.symbol == "p" and target == self.en_passant_target:
+            skipped.add((move.start[0], target[1]))
+            victim = piece
+        gains = [SEE_VALUES[victim.symbol] if victim is not None else 0]
+        on_square = SEE_VALUES[piece.symbol]
+        if move.promotion:
+            gains[0] += SEE_VALUES[move.promotion] - SEE_VALUES["p"]
+            on_square = SEE_VALUES[move.promotion]
+
+        knights, rays = self._see_attackers(target, skipped)
+        colour = Colour.BLACK if piece.colour == Colour.WHITE else Colour.WHITE
+        while True:
+            # Least valuable attacker of the side to recapture: a knight or the nearest piece on a ray
+            best, best_value, best_ray = None, None, None
+            for knight in knights:
+                if knight.colour == colour:
+                    best, best_value = knight, SEE_VALUES["n"]
+                    break
+            for ray_index, (direction, ray) in enumerate(rays):
+                if ray:
+                    attacker, distance = ray[0]
+                    value = SEE_VALUES[attacker.symbol]
+                    if attacker.colour == colour and (best is None or value < best_value) and \
+                            self._attacks_along(attacker, direction, distance):
+                        best, best_value, best_ray = attacker, value, ray_index
+            if best is None:
+                break
+            if best.symbol == "k":
+                # The king may only recapture when nothing defends the square any more
+                other = Colour.BLACK if colour == Colour.WHITE else Colour.WHITE
+                if any(knight.colour == other for knight in knights) or any(
+                        ray and ray[0][0].colour == other and self._attacks_along(ray[0][0], direction, ray[0][1])
+                        for ray_index, (direction, ray) in enumerate(rays) if ray_index != best_ray):
+                    break
+            gains.append(on_square - gains[-1])
+            on_square = best_value
+            if best_ray is None:
+                knights.remove(best)
+            else:
+                rays[best_ray][1].pop(0)
+            colour = Colour.BLACK if colour == Colour.WHITE else Colour.WHITE
+
+        # Either side may stop capturing when continuing would lose more
+        for index in range(len(gains) - 1, 0, -1):
+            gains[index - 1] = -max(-gains[index - 1], gains[index])
+        return gains[0]
+
+    def in_check(self, colour: Colour = None) -> bool:
+        """
+        Checks whether the given colour's king is attacked, without relying on the pieces' move lists.
+
+        :param colour: Colour of the king, defaults to the side to move.
+        """
+        if colour is None:
+            colour = self.turn
+        king_position = self.find_king(colour)
+        if king_position is None:
+            return False
+        opponent = Colour.BLACK if colour == Colour.WHITE else Colour.WHITE
+        return self.is_square_attacked(king_position, opponent)
 
     def _simulate_move(self, piece, new_position, colour=None):
         """Simulates moving a piece and returns the piece at the new position."""
@@ -208,14 +778,40 @@ class Board:
             self.board.pop(new_position)
         self.update_piece_move_list(colour)
 
-    def _finalize_move(self, piece):
-        """Finalizes a valid move and switches the turn."""
-        piece.has_moved = True
-        self.turn = Colour.WHITE if self.turn == Colour.BLACK else Colour.BLACK
+    def render(self, screen) -> list:
+        """
+        Renders the board and all stationary pieces, redrawing only what changed.
+
+        The board sprite and every piece except the selected one are kept in an off-screen layer. Each call
+        compares the pieces drawn in that layer with the current board and repaints only the squares that
+        differ, then copies those areas to the screen.
 
-    def render(self, screen):
-        """Renders the board and all active pieces."""
-        screen.blit(self.sprite, dest=(0, 0))
+        :param screen: The Pygame surface to draw on.
+        :return: List of screen rects that changed, for use with pygame.display.update().
+        """
+        if self._layer is None or self._layer.get_size() != screen.get_size():
+            self._rebuild_layer(screen.get_size())
+            screen.blit(self._layer, (0, 0))
+            return [screen.get_rect()]
+
+        drawn = self._layer_contents()
+        changed = [
+            position for position in set(drawn) | set(self._layer_pieces)
+            if drawn.get(position) is not self._layer_pieces.get(position)
+        ]
+        self._layer_pieces = drawn
+        dirty_rects = [self._redraw_layer_area(self._square_rect(position)) for position in changed]
+
+        for rect in dirty_rects:
+            screen.blit(self._layer, rect, area=rect)
+        return dirty_rects
+
+    def render_full(self, screen):
+        """Renders the board and all active pieces without using the cached layer."""
+        if self.sprite:
+            screen.blit(self.sprite, dest=(0, 0))
+        else:
+            screen.fill((0, 0, 0))
 
         for piece in self.board.values():
             if piece == self.selected_piece:
@@ -224,6 +820,59 @@ class Board:
             piece_x, piece_y = self.get_render_position(piece.position)
             piece.render(screen, (piece_x, piece_y))
 
+    def restore_area(self, screen, rect):
+        """
+        Copies an area of the cached board layer back onto the screen, e.g. to erase a dragged piece.
+
+        :param screen: The Pygame surface to draw on.
+        :param rect: The screen rect to restore.
+        :return: The restored rect.
+        """
+        if self._layer is None:
+            self._rebuild_layer(screen.get_size())
+        import pygame
+
+        rect = pygame.Rect(rect).clip(screen.get_rect())
+        screen.blit(self._layer, rect, area=rect)
+        return rect
+
+    def invalidate(self):
+        """Forces the cached board layer to be rebuilt on the next render."""
+        self._layer = None
+
+    def _layer_contents(self) -> dict:
+        """Returns the pieces that belong in the cached layer, keyed by board position."""
+        return {position: piece for position, piece in self.board.items() if piece is not self.selected_piece}
+
+    def _rebuild_layer(self, size):
+        """Draws the board sprite and all stationary pieces into a fresh off-screen layer."""
+        import pygame
+
+        self._layer = pygame.Surface(size)
+        self.render_full(self._layer)
+        self._layer_pieces = self._layer_contents()
+
+    def _redraw_layer_area(self, rect):
+        """Repaints a single area of the cached layer from the board sprite and the pieces overlapping it."""
+        self._layer.set_clip(rect)
+        if self.sprite:
+            self._layer.blit(self.sprite, rect, area=rect)
+        else:
+            self._layer.fill((0, 0, 0), rect)
+
+        for position, piece in self._layer_pieces.items():
+            if self._square_rect(position).colliderect(rect):
+                piece.render(self._layer, self.get_render_position(position))
+        self._layer.set_clip(None)
+        return rect
+
+    def _square_rect(self, position: tuple[int, int]):
+        """Returns the screen rect covered by a piece drawn on the given board position."""
+        import pygame
+
+        piece_x, piece_y = self.get_render_position(position)
+        return pygame.Rect(int(piece_y), int(piece_x), int(0.5 * self.square_size_x) + 1, int(self.square_size_y) + 1)
+
     def get_render_position(self, position: tuple[int, int]):
         """Calculates the screen position for a piece."""
         piece_x = self.board_start_x + (position[0] * self.square_size_x) - (self.square_size_x * 0.1)
@@ -236,7 +885,7 @@ class Board:
         board_y = (mouse_y - self.board_start_y) // self.square_size_y
 
         if is_in_bounds(board_x, board_y):
-            return self.board[(board_x, board_y)]
+            return self.board.get((board_x, board_y))
 
     @staticmethod
     def is_valid_move(piece, position):
@@ -282,37 +931,12 @@ class Board:
         return False
 
     def is_checkmate(self):
-        """Checks if the current player is in checkmate."""
-        attacking_pieces = self.is_check(self.turn)
-        if not attacking_pieces:
-            self.checkmate = False
-            return
-
-        king_position = self.find_king(self.turn)
-        king_piece = self.board[king_position]
-
-        other_colour = Colour.WHITE if self.turn == Colour.BLACK else Colour.BLACK
-
-        if king_piece.move_list:
-            new_move_list = []
-            for move in king_piece.move_list:
-                kings_capture = self._simulate_move(king_piece, move, other_colour)
-                threats = self.is_check(self.turn)
-                if not threats:
-                    new_move_list.append(move)
-                self._revert_move(king_piece, move, king_position, kings_capture, other_colour)
-
-            if new_move_list:
-                self.checkmate = False
-                return
-            self.checkmate = True
+        """Checks if the current player is in checkmate, or in stalemate if not in check."""
+        if self.legal_moves():
+            self.checkmate = self.stalemate = False
             return
-
-        for attacker in attacking_pieces:
-            if self.can_capture(attacker) or self.can_block(attacker, king_piece):
-                self.checkmate = False
-
-        self.checkmate = True
+        self.checkmate = self.in_check(self.turn)
+        self.stalemate = not self.checkmate
 
     @staticmethod
     def get_positions_between(start, end):
@@ -329,10 +953,41 @@ class Board:
 
         return positions
 
+    def is_insufficient_material(self) -> bool:
+        """Checks whether neither side has enough material left to deliver checkmate."""
+        if self.material_key & PAWN_ROOK_QUEEN_MASK:
+            return False
+        pieces = [(position, piece) for position, piece in self.board.items() if piece.symbol != "k"]
+        if any(piece.symbol in "pqr" for _, piece in pieces):
+            return False
+        if len(pieces) <= 1:
+            return True
+        # Only bishops, all on squares of the same colour
+        return (all(piece.symbol == "b" for _, piece in pieces)
+                and len({(row + col) % 2 for (row, col), _ in pieces}) == 1)
+
+    def outcome(self):
+        """
+        Decides whether the game is over by the rules: checkmate, stalemate, the fifty-move rule or
+        insufficient material.
+
+        :return: Tuple of (result, reason), e.g. ('1-0', 'checkmate'), or None if the game goes on.
+        """
+        if not self.legal_moves():
+            if self.in_check(self.turn):
+                return ("0-1" if self.turn == Colour.WHITE else "1-0"), "checkmate"
+            return "1/2-1/2", "stalemate"
+        if self.halfmove_clock >= 100:
+            return "1/2-1/2", "fifty moves"
+        if self.is_insufficient_material():
+            return "1/2-1/2", "insufficient material"
+        return None
+
     def is_game_over(self) -> bool:
         """Checks if the game is over due to checkmate or stalemate."""
         return self.stalemate or self.checkmate
 
     def is_stalemate(self):
         """Checks if the game is in a stalemate state."""
-        self.stalemate = False
+        self.is_checkmate()
+        return self.stalemate
@@ -0,0 +1,67 @@
+import shlex
+
+
+def parse_epd(line: str) -> tuple[str, dict]:
+    """
+    Parses a line of Extended Position Description, or a plain FEN.
+
+    EPD has the first four FEN fields followed by semicolon terminated operations, e.g.
+    ``r1b1k2r/... w kq - bm Qxf7+; id "WAC.001";``. Operations keep their operands as a list of strings.
+
+    :param line: An EPD or FEN line.
+    :return: Tuple of (fen, operations). The FEN gets default clocks when the line has none.
+    """
+    fields = line.strip().split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"Invalid EPD: {line!r}")
+    fen, rest = " ".join(fields[:4]), fields[4] if len(fields) > 4 else ""
+
+    # A plain FEN has two numeric clock fields instead of operations
+    clocks = rest.split()
+    if len(clocks) == 2 and all(clock.isdigit() for clock in clocks):
+        return f"{fen} {rest}", {}
+
+    operations = {}
+    for operation in _split_operations(rest):
+        tokens = shlex.split(operation, posix=True)
+        if tokens:
+            operations[tokens[0]] = tokens[1:]
+
+    half_move = operations.get("hmvc", ["0"])[0]
+    full_move = operations.get("fmvn", ["1"])[0]
+    return f"{fen} {half_move} {full_move}", operations
+
+
+def _split_operations(text: str) -> list:
+    """Splits EPD operations on semicolons that are not inside quoted strings."""
+    operations, current, quoted = [], "", False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        if char == ";" and not quoted:
+            operations.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        operations.append(current.strip())
+    return operations
+
+
+def read_epd_file(path: str) -> list:
+    """
+    Reads every position from an EPD or FEN file, skipping blank lines and '#' comments.
+
+    :return: List of (fen, operations) tuples.
+    """
+    positions = []
+    with open(path) as file:
+        for line in file:
+            if line.strip() and not line.lstrip().startswith("#"):
+                positions.append(parse_epd(line))
+    return positions
+
+
+def position_id(operations: dict, index: int) -> str:
+    """Returns the 'id' operand of a position, or its 1-based number in the file when it has none."""
+    return (operations.get("id") or [str(index + 1)])[0]
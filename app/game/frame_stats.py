@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+
+class FrameStats:
+    """
+    Collects per-frame timings for each GameState so the main loop can be profiled.
+
+    Times are recorded in seconds and reported in milliseconds.
+    """
+
+    PHASES = ("events", "update", "render", "frame")
+
+    def __init__(self, log_interval: float = 0.0):
+        """
+        :param log_interval: Seconds between printed summaries, 0 disables periodic logging.
+        """
+        self.log_interval = log_interval
+        self._totals = defaultdict(lambda: dict.fromkeys(self.PHASES, 0.0))
+        self._maxima = defaultdict(lambda: dict.fromkeys(self.PHASES, 0.0))
+        self._frames = defaultdict(int)
+        self._last_log = None
+        self.last = dict.fromkeys(self.PHASES, 0.0)
+
+    def record(self, state_name: str, now: float, **timings):
+        """
+        Records the phase timings of a single frame.
+
+        :param state_name: Name of the GameState that produced the frame.
+        :param now: Current time, used to decide when to print a summary.
+        :param timings: Seconds spent in each of PHASES.
+        """
+        totals = self._totals[state_name]
+        maxima = self._maxima[state_name]
+        for phase in self.PHASES:
+            value = timings.get(phase, 0.0)
+            totals[phase] += value
+            maxima[phase] = max(maxima[phase], value)
+            self.last[phase] = value
+        self._frames[state_name] += 1
+
+        if self.log_interval:
+            if self._last_log is None:
+                self._last_log = now
+            elif now - self._last_log >= self.log_interval:
+                print(self.format_summary())
+                self._last_log = now
+
+    def summary(self) -> dict:
+        """
+        Returns the average and maximum time per phase in milliseconds, keyed by state name.
+        """
+        result = {}
+        for state_name, frames in self._frames.items():
+            result[state_name] = {"frames": frames}
+            for phase in self.PHASES:
+                result[state_name][f"{phase}_avg_ms"] = 1000 * self._totals[state_name][phase] / frames
+                result[state_name][f"{phase}_max_ms"] = 1000 * self._maxima[state_name][phase]
+        return result
+
+    def format_summary(self) -> str:
+        """Formats the summary as one line per state."""
+        lines = []
+        for state_name, stats in self.summary().items():
+            phases = " ".join(f"{phase}={stats[f'{phase}_avg_ms']:.2f}ms" for phase in self.PHASES)
+            lines.append(f"[{state_name}] frames={stats['frames']} {phases}")
+        return "\n".join(lines)
+
+    def format_last(self) -> str:
+        """Formats the timings of the most recent frame for the on-screen overlay."""
+        return " ".join(f"{phase} {1000 * self.last[phase]:.1f}ms" for phase in self.PHASES)
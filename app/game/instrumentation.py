@@ -0,0 +1,125 @@
+"""
+Opt-in instrumentation of the Board's hot paths and a cProfile wrapper.
+
+Board.enable_stats() replaces the methods listed in HOT_PATHS on that one Board instance with wrappers that
+count the calls and add up the time spent in them. Nothing is wrapped until then, so a Board without stats
+runs the plain class methods and pays nothing. Times are inclusive: legal_moves() also counts towards
+make_move() and unmake_move(), which it calls.
+"""
+import cProfile
+import functools
+import json
+import time
+from contextlib import contextmanager
+
+# Section -> Board methods instrumented in it
+HOT_PATHS = {
+    "move_generation": ("update_piece_move_list", "pseudo_legal_moves", "legal_moves"),
+    "check": ("is_check", "in_check"),
+    "simulation": ("_simulate_move", "make_move"),
+    "revert": ("_revert_move", "unmake_move"),
+    "terminal": ("is_checkmate", "outcome"),
+    "render": ("render", "render_full"),
+}
+
+
+class InstrumentStats:
+    """
+    Call counts and cumulative times of instrumented methods, keyed by method name.
+
+    Times are recorded in seconds and reported in milliseconds, like FrameStats.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+
+    def record(self, name: str, seconds: float):
+        """Records one call of a method that took the given time."""
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def reset(self):
+        self.calls.clear()
+        self.seconds.clear()
+
+    def summary(self) -> dict:
+        """
+        Returns the section, call count, total time in milliseconds and average time in microseconds of every
+        method called so far, slowest in total first.
+        """
+        sections = {name: section for section, names in HOT_PATHS.items() for name in names}
+        result = {}
+        for name in sorted(self.calls, key=lambda name: -self.seconds[name]):
+            calls, seconds = self.calls[name], self.seconds[name]
+            result[name] = {"section": sections.get(name), "calls": calls, "total_ms": 1000 * seconds,
+                            "avg_us": 1e6 * seconds / calls}
+        return result
+
+    def format_summary(self) -> str:
+        """Formats the summary as one line per method."""
+        return "\n".join(f"[{stats['section']}] {name} calls={stats['calls']} total={stats['total_ms']:.2f}ms "
+                         f"avg={stats['avg_us']:.2f}us" for name, stats in self.summary().items())
+
+    def dump(self, path: str):
+        """Writes the summary to a JSON file."""
+        with open(path, "w") as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+def _timed(stats: InstrumentStats, name: str, method):
+    """Wraps a bound method so every call is recorded in stats."""
+    perf_counter = time.perf_counter
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stats.record(name, perf_counter() - start)
+
+    return wrapper
+
+
+def instrument(target, stats: InstrumentStats) -> InstrumentStats:
+    """
+    Wraps the HOT_PATHS methods of one object, shadowing the class's methods with instance attributes.
+
+    :param target: Board to instrument.
+    :param stats: Stats the calls are recorded in.
+    :return: stats.
+    """
+    uninstrument(target)
+    for names in HOT_PATHS.values():
+        for name in names:
+            setattr(target, name, _timed(stats, name, getattr(target, name)))
+    return stats
+
+
+def uninstrument(target):
+    """Removes the wrappers added by instrument(), restoring the class's methods."""
+    for names in HOT_PATHS.values():
+        for name in names:
+            target.__dict__.pop(name, None)
+
+
+@contextmanager
+def profiled(path: str = None):
+    """
+    Runs the body of a with statement under cProfile.
+
+    The file is in the pstats format: read it with ``python -m pstats``, or turn it into a flame graph with a
+    tool that reads cProfile output such as flameprof or snakeviz.
+
+    :param path: File the profile is written to when the body finishes, None to only return it.
+    :return: The cProfile.Profile, usable once the body has finished.
+    """
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        if path is not None:
+            profile.dump_stats(path)
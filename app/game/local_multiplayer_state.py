@@ -1,18 +1,58 @@
+import time
+
 import pygame
+from . import Colour
 from .abc_game_state import GameState
 from .board import Board
+from app.engine.polyglot import PolyglotBook, choose_book_move
+from app.engine.search import SearchLimits
+from app.engine.timeman import GameClock
+from app.engine.worker import EngineWorker
+from app.game.move import Move
 
 WIDTH, HEIGHT = 800, 800
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 
+DEFAULT_ENGINE_LIMITS = SearchLimits(depth=4, movetime=5.0)
+
 
 class SingleGameState(GameState):
-    def __init__(self, screen):
+    def __init__(self, screen, engine_colour: Colour = None, engine_limits: SearchLimits = None,
+                 book_path: str = None, clock: GameClock = None, ponder: bool = True):
+        """
+        :param screen: The Pygame screen.
+        :param engine_colour: Colour played by the engine, None for a two player game.
+        :param engine_limits: Search limits for each engine move. With a clock, the engine's thinking time is
+                              taken from the clock instead.
+        :param book_path: Polyglot opening book the engine plays from while the position is in it.
+        :param clock: Game clock; a side whose time runs out loses.
+        :param ponder: Let the engine search the reply it expects while the opponent is thinking.
+        """
         super().__init__(screen)
         self.board = Board(WIDTH, HEIGHT)
         self.selected_piece = None
         self.mouse_offset = (0, 0)
+        self._drag_rect = None
+
+        # The engine searches in its own process; its moves are picked up in update()
+        self.engine_colour = engine_colour
+        self.engine_limits = engine_limits or DEFAULT_ENGINE_LIMITS
+        self.engine = EngineWorker() if engine_colour is not None else None
+        self.engine_info = None
+        self.clock = clock
+        self._caption = None
+
+        # While pondering, the engine searches the position after the reply it predicted. If the opponent plays
+        # it, the search carries on as the engine's own (a ponder hit); otherwise it is cancelled.
+        self.ponder = ponder
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self._ponder_move = None
+        self._ponder_result = None
+        self._ponder_deadline = None
+        if book_path is not None:
+            self.board.opening_book = PolyglotBook(book_path)
 
     @staticmethod
     def get_mouse_coords():
@@ -27,6 +67,9 @@ class SingleGameState(GameState):
             mouse_x, mouse_y = pygame.mouse.get_pos()[::-1]  # Reverse for chess orientation
             piece = self.board.get_piece_at(mouse_x, mouse_y)
 
+            if self.engine is not None and self.board.turn == self.engine_colour:
+                print("The engine is thinking")
+                return
             if piece:
                 if piece.colour != self.board.turn:
                     print("Not your turn")
@@ -53,20 +96,164 @@ class SingleGameState(GameState):
                 self.board.move_piece(self.selected_piece, (new_x, new_y))
                 self.board.selected_piece = None
 
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_u, pygame.K_BACKSPACE):
+            self.take_back()
+
         if self.board.is_game_over():
             return "GAMEOVER"
 
+    def take_back(self):
+        """Takes back the last move, or the last move of each side when playing the engine."""
+        if self.engine is not None:
+            self.engine.cancel()
+            self._ponder_move = self._ponder_result = self._ponder_deadline = None
+            if self.board.turn != self.engine_colour:
+                self.board.undo_move()
+        self.board.undo_move()
+        self.board.selected_piece = None
+        if self.clock is not None and self.clock.running != self.board.turn:
+            # Nobody completed a move, so the side whose clock stops gets no increment
+            self.clock.press(self.board.turn, credit=False)
+
     def update(self):
+        if self.clock is not None:
+            if self.clock.running != self.board.turn:
+                self.clock.press(self.board.turn)
+            flagged = self.clock.flagged()
+            if flagged is not None:
+                print(f"{flagged.name.capitalize()} lost on time")
+                return "GAMEOVER"
+        if self.engine is not None:
+            self._update_engine()
         if self.board.is_game_over():
             return "GAMEOVER"  # Switch to game over state
         return None
 
+    def _update_engine(self):
+        """Collects the engine's progress and plays its move, or starts it thinking when it is its turn."""
+        for kind, payload in self.engine.poll():
+            if kind == "info":
+                self.engine_info = payload
+            elif kind == "bestmove" and self._ponder_move is not None:
+                # The ponder search finished before the opponent moved; kept in case the prediction hits
+                self._ponder_result = payload
+            elif kind == "bestmove" and payload["move"] is not None:
+                self._play_engine_move(Move.from_uci(payload["move"]))
+            elif kind == "error":
+                print(f"Engine error: {payload}")
+
+        if self._ponder_move is not None and self.board.turn == self.engine_colour:
+            self._resolve_ponder()
+        if self._ponder_deadline is not None and time.perf_counter() >= self._ponder_deadline:
+            # The ponder search has no time limit of its own; stopping it reports its best move
+            self._ponder_deadline = None
+            self.engine.stop()
+
+        if self.board.turn == self.engine_colour and not self.engine.busy and not self.board.is_game_over():
+            # Book moves are played at once without starting a search
+            book_move = choose_book_move(self.board.book_moves())
+            if book_move is not None:
+                self.board.play_move(book_move)
+            else:
+                self.engine.submit(self.board.fen(), self._move_limits())
+
+    def _move_limits(self) -> SearchLimits:
+        """Returns the limits of an engine move: from the clock if there is one, otherwise engine_limits."""
+        if self.clock is None:
+            return self.engine_limits
+        soft, hard = self.clock.limits_for(self.engine_colour)
+        return SearchLimits(nodes=self.engine_limits.nodes, movetime=hard, soft_time=soft)
+
+    def _play_engine_move(self, move: Move):
+        """
+        Plays the engine's move and starts pondering on the reply at the head of its principal variation. A move
+        that is not legal in the current position, e.g. the result of a search of an older position, is dropped.
+        """
+        if self.board.turn != self.engine_colour or move not in self.board.legal_moves():
+            print(f"Dropped stale engine move {move.uci()}")
+            return
+        self.board.play_move(move)
+        pv = self.engine_info["pv"] if self.engine_info else []
+        if not self.ponder or self.board.is_game_over() or len(pv) < 2 or pv[0] != move.uci():
+            return
+        expected = Move.from_uci(pv[1])
+        if expected not in self.board.legal_moves():
+            return
+        self.board.make_move(expected)
+        fen = self.board.fen()
+        self.board.unmake_move()
+        self._ponder_move, self._ponder_result = expected, None
+        # Unlimited in time: on a hit the GUI stops it once the move's time is up
+        self.engine.submit(fen, SearchLimits(depth=None if self.clock else self.engine_limits.depth,
+                                             nodes=self.engine_limits.nodes))
+
+    def _resolve_ponder(self):
+        """Once the opponent has moved, keeps the ponder search if it predicted the move and cancels it if not."""
+        history = self.board.move_history
+        hit = bool(history) and history[-1] == self._ponder_move
+        result, self._ponder_move, self._ponder_result = self._ponder_result, None, None
+        if not hit:
+            self.ponder_misses += 1
+            self.engine.cancel()
+            return
+        self.ponder_hits += 1
+        if result is not None:
+            if result["move"] is not None:
+                self._play_engine_move(Move.from_uci(result["move"]))
+            return
+        if self.clock is not None:
+            self._ponder_deadline = time.perf_counter() + self.clock.limits_for(self.engine_colour)[0]
+        elif self.engine_limits.movetime is not None:
+            self._ponder_deadline = time.perf_counter() + self.engine_limits.movetime
+
+    def is_idle(self) -> bool:
+        # Dragging a piece needs a frame on every mouse movement, a thinking engine needs polling and a running
+        # clock needs checking for a flag
+        return (self.board.selected_piece is None and (self.engine is None or not self.engine.busy)
+                and self.clock is None)
+
+    def close(self):
+        if self.engine is not None:
+            self.engine.close()
+        if self.board.opening_book is not None:
+            self.board.opening_book.close()
+
     def render(self):
-        self.board.render(self.screen)
+        """
+        Renders the board and the dragged piece.
+
+        :return: List of screen rects that changed this frame.
+        """
+        dirty_rects = self.board.render(self.screen)
+        if self.clock is not None:
+            self._render_clock()
+
+        # Erase the dragged piece from where it was drawn last frame
+        if self._drag_rect is not None:
+            dirty_rects.append(self.board.restore_area(self.screen, self._drag_rect))
+            self._drag_rect = None
+
         if self.board.selected_piece:
             mouse_x, mouse_y = self.get_mouse_coords()
 
             adjusted_x = mouse_x - self.mouse_offset[0]
             adjusted_y = mouse_y - self.mouse_offset[1]
 
-            self.board.selected_piece.render(self.screen, (adjusted_x, adjusted_y))
+            piece = self.board.selected_piece
+            piece.render(self.screen, (adjusted_x, adjusted_y))
+            if piece.sprite:
+                self._drag_rect = piece.sprite.get_rect(topleft=(int(adjusted_y), int(adjusted_x))).inflate(2, 2)
+                dirty_rects.append(self._drag_rect)
+
+        return dirty_rects
+
+    def _render_clock(self):
+        """Shows both sides' remaining time in the window title, updated when a displayed second changes."""
+        times = []
+        for colour in (Colour.WHITE, Colour.BLACK):
+            seconds = max(0, int(self.clock.time_left(colour)))
+            times.append(f"{colour.name.capitalize()} {seconds // 60}:{seconds % 60:02d}")
+        caption = "Chess - " + "  ".join(times)
+        if caption != self._caption:
+            pygame.display.set_caption(caption)
+            self._caption = caption
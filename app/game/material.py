@@ -0,0 +1,54 @@
+"""
+Material keys: the number of pieces of each type and colour packed into one integer.
+
+Every (colour, symbol) pair owns a 4-bit field, white's pawn, knight, bishop, rook, queen and king in the low
+24 bits and black's above them, so adding a piece adds its unit and two positions with the same material have
+the same key. Board keeps the key up to date in make_move() and unmake_move(); material_hash() computes it from
+scratch. Keys index the endgame handlers of app.engine.endgames.
+"""
+from app.game import Colour
+
+SYMBOLS = "pnbrqk"
+FIELD_BITS = 4
+FIELD_MASK = (1 << FIELD_BITS) - 1
+
+MATERIAL_UNITS = {
+    (colour, symbol): 1 << (FIELD_BITS * (index + 6 * side))
+    for side, colour in enumerate((Colour.WHITE, Colour.BLACK)) for index, symbol in enumerate(SYMBOLS)
+}
+
+# Fields of the pawns, rooks and queens of both sides; without any, the material may be insufficient to mate
+PAWN_ROOK_QUEEN_MASK = sum(FIELD_MASK * MATERIAL_UNITS[colour, symbol]
+                           for colour in (Colour.WHITE, Colour.BLACK) for symbol in "prq")
+# Fields of each side's knights, bishops, rooks and queens; a side without any is prone to zugzwang
+NON_PAWN_MASKS = {colour: sum(FIELD_MASK * MATERIAL_UNITS[colour, symbol] for symbol in "nbrq")
+                  for colour in (Colour.WHITE, Colour.BLACK)}
+
+
+def material_unit(piece) -> int:
+    """Returns the amount a piece adds to the material key."""
+    return MATERIAL_UNITS[piece.colour, piece.symbol]
+
+
+def material_hash(board) -> int:
+    """Computes the material key of a position from scratch."""
+    return sum(MATERIAL_UNITS[piece.colour, piece.symbol] for piece in board.board.values())
+
+
+def piece_count(key: int, colour: Colour, symbol: str) -> int:
+    """Returns the number of pieces of one type and colour in a material key."""
+    return (key // MATERIAL_UNITS[colour, symbol]) & FIELD_MASK
+
+
+def material_key_of(white: str, black: str) -> int:
+    """Returns the material key of two sides' pieces, e.g. ('kb', 'k')."""
+    return (sum(MATERIAL_UNITS[Colour.WHITE, symbol] for symbol in white.lower())
+            + sum(MATERIAL_UNITS[Colour.BLACK, symbol] for symbol in black.lower()))
+
+
+def material_signature(key: int) -> str:
+    """Returns the signature of a material key, strongest pieces first, e.g. 'KRPvKR'."""
+    sides = []
+    for colour in (Colour.WHITE, Colour.BLACK):
+        sides.append("".join(symbol.upper() * piece_count(key, colour, symbol) for symbol in reversed(SYMBOLS)))
+    return "v".join(sides)
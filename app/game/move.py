@@ -0,0 +1,73 @@
+from typing import NamedTuple, Optional
+
+FILES = "abcdefgh"
+
+# Promotion piece stored in the top bits of an encoded move, 0 meaning no promotion
+PROMOTION_CODES = {None: 0, "n": 1, "b": 2, "r": 3, "q": 4}
+PROMOTION_PIECES = {code: piece for piece, code in PROMOTION_CODES.items()}
+
+
+def square_name(position: tuple[int, int]) -> str:
+    """
+    Converts a board position to algebraic notation.
+
+    :param position: (ROW, COL) tuple, row 0 being the eighth rank.
+    :return: Square name such as 'e4'.
+    """
+    row, col = position
+    return FILES[col] + str(8 - row)
+
+
+def parse_square(name: str) -> tuple[int, int]:
+    """
+    Converts a square in algebraic notation to a board position.
+
+    :param name: Square name such as 'e4'.
+    :return: (ROW, COL) tuple.
+    """
+    if len(name) != 2 or name[0] not in FILES or name[1] not in "12345678":
+        raise ValueError(f"Invalid square: {name!r}")
+    return 8 - int(name[1]), FILES.index(name[0])
+
+
+class Move(NamedTuple):
+    """
+    A move between two board positions, with the lower-case letter of the promotion piece if any.
+    """
+    start: tuple[int, int]
+    end: tuple[int, int]
+    promotion: Optional[str] = None
+
+    def uci(self) -> str:
+        """Returns the move in UCI long algebraic notation, e.g. 'e2e4' or 'e7e8q'."""
+        return square_name(self.start) + square_name(self.end) + (self.promotion or "")
+
+    @classmethod
+    def from_uci(cls, text: str) -> "Move":
+        """
+        Parses a move in UCI long algebraic notation.
+
+        :param text: Move such as 'e2e4' or 'e7e8q'.
+        :return: The parsed Move.
+        """
+        if len(text) not in (4, 5) or (len(text) == 5 and text[4] not in "qrbn"):
+            raise ValueError(f"Invalid UCI move: {text!r}")
+        return cls(parse_square(text[:2]), parse_square(text[2:4]), text[4] if len(text) == 5 else None)
+
+    def encode(self) -> int:
+        """
+        Packs the move into 16 bits: start square in bits 0-5, end square in bits 6-11 and the
+        promotion piece in bits 12-14. Squares are numbered ROW * 8 + COL.
+        """
+        start = self.start[0] * 8 + self.start[1]
+        end = self.end[0] * 8 + self.end[1]
+        return start | (end << 6) | (PROMOTION_CODES[self.promotion] << 12)
+
+    @classmethod
+    def decode(cls, code: int) -> "Move":
+        """Unpacks a move packed by encode()."""
+        start, end = code & 63, (code >> 6) & 63
+        return cls((start >> 3, start & 7), (end >> 3, end & 7), PROMOTION_PIECES[code >> 12])
+
+    def __str__(self):
+        return self.uci()
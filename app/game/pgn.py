@@ -0,0 +1,153 @@
+import re
+from typing import Iterator, List
+
+from app.game.move import Move, FILES, square_name
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQ]))?$")
+TAG_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]$')
+TOKEN_PATTERN = re.compile(r'\{[^}]*\}|;[^\n]*|\$\d+|\(|\)|[^\s(){};]+')
+
+
+class PgnGame:
+    def __init__(self, headers: dict, moves: List[str], result: str):
+        """
+        A game read from PGN, with its moves still in SAN.
+
+        :param headers: The tag pairs, e.g. {'White': ..., 'Result': '1-0'}.
+        :param moves: Mainline moves in Standard Algebraic Notation.
+        :param result: Game result token.
+        """
+        self.headers = headers
+        self.moves = moves
+        self.result = result
+
+    @property
+    def fen(self):
+        """The starting position if the game does not start from the initial position."""
+        return self.headers.get("FEN")
+
+
+def read_games(file) -> Iterator[PgnGame]:
+    """
+    Reads games one by one from an open PGN file. Comments, NAGs and variations are skipped.
+
+    :param file: Text file object.
+    :return: Iterator of PgnGame.
+    """
+    headers, movetext = {}, []
+    for line in file:
+        stripped = line.strip()
+        match = TAG_PATTERN.match(stripped)
+        if match:
+            if movetext:
+                yield _parse_game(headers, " ".join(movetext))
+                headers, movetext = {}, []
+            headers[match.group(1)] = match.group(2)
+        elif stripped and not stripped.startswith("%"):
+            movetext.append(stripped)
+    if headers or movetext:
+        yield _parse_game(headers, " ".join(movetext))
+
+
+def _parse_game(headers: dict, movetext: str) -> PgnGame:
+    moves, depth = [], 0
+    result = headers.get("Result", "*")
+    for token in TOKEN_PATTERN.findall(movetext):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth or token[0] in "{;$":
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            # Strip move numbers such as '12.' or '12...', which may be attached to the move
+            token = re.sub(r"^\d+\.+", "", token)
+            if token:
+                moves.append(token)
+    return PgnGame(headers, moves, result)
+
+
+def parse_san(board, san: str) -> Move:
+    """
+    Finds the legal move matching a move in Standard Algebraic Notation.
+
+    :param board: Board in the position the move is played from.
+    :param san: Move such as 'Nf3', 'exd5', 'O-O' or 'e8=Q+'.
+    :return: The matching Move.
+    """
+    text = san.rstrip("+#!?")
+    legal_moves = board.legal_moves()
+
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        end_col = 6 if text in ("O-O", "0-0") else 2
+        for move in legal_moves:
+            piece = board.board[move.start]
+            if piece.symbol == "k" and move.start[1] == 4 and move.end[1] == end_col:
+                return move
+        raise ValueError(f"Illegal castling move {san!r} in {board.fen()}")
+
+    match = SAN_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid SAN move: {san!r}")
+    piece_letter, from_file, from_rank, _, target, promotion = match.groups()
+    symbol = (piece_letter or "P").lower()
+    target_name = target
+
+    candidates = []
+    for move in legal_moves:
+        if square_name(move.end) != target_name or board.board[move.start].symbol != symbol:
+            continue
+        start_name = square_name(move.start)
+        if from_file and start_name[0] != from_file:
+            continue
+        if from_rank and start_name[1] != from_rank:
+            continue
+        if (move.promotion or None) != (promotion.lower() if promotion else None):
+            continue
+        candidates.append(move)
+
+    if len(candidates) != 1:
+        raise ValueError(f"{'Ambiguous' if candidates else 'Illegal'} move {san!r} in {board.fen()}")
+    return candidates[0]
+
+
+def move_to_san(board, move: Move) -> str:
+    """
+    Writes a legal move in Standard Algebraic Notation, including check and mate suffixes.
+
+    :param board: Board in the position the move is played from.
+    :param move: The move.
+    :return: SAN string such as 'Nbd2' or 'exd8=Q#'.
+    """
+    piece = board.board[move.start]
+    if piece.symbol == "k" and abs(move.end[1] - move.start[1]) == 2:
+        san = "O-O" if move.end[1] == 6 else "O-O-O"
+    else:
+        capture = board.is_capture(move)
+        if piece.symbol == "p":
+            san = (FILES[move.start[1]] + "x" if capture else "") + square_name(move.end)
+            if move.promotion:
+                san += "=" + move.promotion.upper()
+        else:
+            san = piece.symbol.upper()
+            rivals = [other for other in board.legal_moves()
+                      if other.end == move.end and other.start != move.start
+                      and board.board[other.start].symbol == piece.symbol]
+            if rivals:
+                if all(other.start[1] != move.start[1] for other in rivals):
+                    san += FILES[move.start[1]]
+                elif all(other.start[0] != move.start[0] for other in rivals):
+                    san += square_name(move.start)[1]
+                else:
+                    san += square_name(move.start)
+            san += ("x" if capture else "") + square_name(move.end)
+
+    board.make_move(move)
+    if board.in_check():
+        san += "#" if not board.legal_moves() else "+"
+    board.unmake_move()
+    return san
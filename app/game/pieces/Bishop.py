@@ -6,6 +6,8 @@ from app.game import Colour
 
 
 class Bishop(Piece):
+    symbol = "b"
+
     def __init__(self, position: tuple[int, int], colour: Colour, square_size: int):
         """
         Initializes the Bishop piece with its position, colour, and sprite.
@@ -5,6 +5,8 @@ from copy import deepcopy
 
 
 class King(Piece):
+    symbol = "k"
+
     def __init__(self, position, colour, square_size):
         sprite_path = get_piece_asset_path(colour, "King")
         super().__init__(position, colour, sprite_path, square_size)
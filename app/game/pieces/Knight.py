@@ -4,6 +4,8 @@ from app.game.pieces.pieces import Piece
 
 
 class Knight(Piece):
+    symbol = "n"
+
     def __init__(self, position, colour, square_size):
         sprite_path = get_piece_asset_path(colour, "Knight")
         super().__init__(position, colour, sprite_path, square_size)
@@ -5,6 +5,8 @@ from app.game import Colour, is_in_bounds
 
 
 class Pawn(Piece):
+    symbol = "p"
+
     def __init__(self, position: tuple[int, int], colour: Colour, square_size: int):
         """
         Initializes the Pawn piece with position, colour, and sprite.
@@ -32,8 +34,8 @@ class Pawn(Piece):
         if is_in_bounds(next_ROW, COL) and (next_ROW, COL) not in board.keys():
             moves.append((next_ROW, COL))
 
-        # First move: Move two squares forward if empty
-        if not self.has_moved:
+        # First move: Move two squares forward if both squares are empty
+        if not self.has_moved and moves:
             next_2_ROW = next_ROW + self.direction
             if is_in_bounds(next_2_ROW, COL) and (next_2_ROW, COL) not in board.keys():
                 moves.append((next_2_ROW, COL))
@@ -4,6 +4,8 @@ from app.game.pieces.pieces import Piece
 
 
 class Rook(Piece):
+    symbol = "r"
+
     def __init__(self, position, colour, square_size):
         """
         Initializes the Rook piece with its position, color, and sprite image.
@@ -1,7 +1,5 @@
 from typing import Union, List, Tuple
-from app import get_piece_asset_path
 from abc import ABC, abstractmethod
-import pygame
 from app.game import Colour
 
 
@@ -10,6 +8,13 @@ class Piece(ABC):
     Abstract base class representing a generic chess piece.
     """
 
+    # Lower-case FEN letter of the piece, set by each subclass
+    symbol = None
+
+    # Scaled sprites shared by every piece using the same image and size, loaded on first use so that pygame is
+    # only imported when a piece is drawn
+    _sprite_cache = {}
+
     def __init__(self, position: Tuple[int, int], colour: Colour, sprite_path: str, square_size: int):
         """
         Initializes the Piece with a position, color, sprite, and size.
@@ -27,14 +32,23 @@ class Piece(ABC):
         self.actual_y = None  # The actual pixel position on the screen (y-coordinate)
         self.move_list: List = []
 
-        # Load the piece's sprite
-        try:
-            self.sprite = pygame.transform.scale(
-                pygame.image.load(sprite_path), (int(0.5 * square_size), square_size)
-            )
-        except pygame.error as e:
-            print(f"Error loading sprite: {e}")
-            self.sprite = None
+        self._sprite_key = (sprite_path, square_size)
+
+    @property
+    def sprite(self):
+        """The piece's scaled image, loaded the first time any piece with the same image and size needs it."""
+        if self._sprite_key not in Piece._sprite_cache:
+            import pygame
+
+            sprite_path, square_size = self._sprite_key
+            try:
+                Piece._sprite_cache[self._sprite_key] = pygame.transform.scale(
+                    pygame.image.load(sprite_path), (int(0.5 * square_size), square_size)
+                )
+            except pygame.error as e:
+                print(f"Error loading sprite: {e}")
+                Piece._sprite_cache[self._sprite_key] = None
+        return Piece._sprite_cache[self._sprite_key]
 
     def render(self, screen, position: Tuple[int, int]):
         """
@@ -0,0 +1,205 @@
+"""
+Material and piece-square scores.
+
+Every piece on a square is worth a middlegame and an endgame score: its material value plus a bonus from its
+piece-square table. Both are packed into one integer, middlegame + (endgame << 20), so a move updates the two
+sums with a single addition; see pack_score() and unpack_score(). White scores count positive and black scores
+negative. The game phase, 0 in a bare endgame and MAX_PHASE with all minor and major pieces on the board, is
+used to blend the two sums.
+
+Board keeps the packed sum and the phase up to date in make_move() and unmake_move(); psqt_scores() computes
+them from scratch.
+"""
+from app.game import Colour
+
+# Middlegame and endgame material values in centipawns
+MATERIAL = {
+    "p": (100, 120),
+    "n": (320, 300),
+    "b": (330, 320),
+    "r": (500, 540),
+    "q": (950, 980),
+    "k": (0, 0),
+}
+
+PHASE_WEIGHTS = {"p": 0, "n": 1, "b": 1, "r": 2, "q": 4, "k": 0}
+MAX_PHASE = 24
+
+# Piece-square bonuses from white's point of view, rank 8 first so a table is indexed by row * 8 + col
+PAWN_TABLE = (
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     50, 50, 50, 50, 50, 50, 50, 50,
+     10, 10, 20, 30, 30, 20, 10, 10,
+     5, 5, 10, 25, 25, 10, 5, 5,
+     0, 0, 0, 20, 20, 0, 0, 0,
+     5, -5, -10, 0, 0, -10, -5, 5,
+     5, 10, 10, -20, -20, 10, 10, 5,
+     0, 0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     80, 80, 80, 80, 80, 80, 80, 80,
+     50, 50, 50, 50, 50, 50, 50, 50,
+     30, 30, 30, 30, 30, 30, 30, 30,
+     15, 15, 15, 15, 15, 15, 15, 15,
+     5, 5, 5, 5, 5, 5, 5, 5,
+     0, 0, 0, 0, 0, 0, 0, 0,
+     0, 0, 0, 0, 0, 0, 0, 0],
+)
+KNIGHT_TABLE = (
+    [-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20, 0, 0, 0, 0, -20, -40,
+     -30, 0, 10, 15, 15, 10, 0, -30,
+     -30, 5, 15, 20, 20, 15, 5, -30,
+     -30, 0, 15, 20, 20, 15, 0, -30,
+     -30, 5, 10, 15, 15, 10, 5, -30,
+     -40, -20, 0, 5, 5, 0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50],
+    [-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20, 0, 0, 0, 0, -20, -40,
+     -30, 0, 10, 15, 15, 10, 0, -30,
+     -30, 5, 15, 20, 20, 15, 5, -30,
+     -30, 0, 15, 20, 20, 15, 0, -30,
+     -30, 5, 10, 15, 15, 10, 5, -30,
+     -40, -20, 0, 5, 5, 0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50],
+)
+BISHOP_TABLE = (
+    [-20, -10, -10, -10, -10, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 10, 10, 5, 0, -10,
+     -10, 5, 5, 10, 10, 5, 5, -10,
+     -10, 0, 10, 10, 10, 10, 0, -10,
+     -10, 10, 10, 10, 10, 10, 10, -10,
+     -10, 5, 0, 0, 0, 0, 5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20],
+    [-20, -10, -10, -10, -10, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 10, 10, 5, 0, -10,
+     -10, 5, 10, 10, 10, 10, 5, -10,
+     -10, 5, 10, 10, 10, 10, 5, -10,
+     -10, 0, 5, 10, 10, 5, 0, -10,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20],
+)
+ROOK_TABLE = (
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     5, 10, 10, 10, 10, 10, 10, 5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     0, 0, 0, 5, 5, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     10, 10, 10, 10, 10, 10, 10, 10,
+     0, 0, 0, 0, 0, 0, 0, 0,
+     0, 0, 0, 0, 0, 0, 0, 0,
+     0, 0, 0, 0, 0, 0, 0, 0,
+     0, 0, 0, 0, 0, 0, 0, 0,
+     0, 0, 0, 0, 0, 0, 0, 0,
+     0, 0, 0, 0, 0, 0, 0, 0],
+)
+QUEEN_TABLE = (
+    [-20, -10, -10, -5, -5, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 5, 5, 5, 0, -10,
+     -5, 0, 5, 5, 5, 5, 0, -5,
+     0, 0, 5, 5, 5, 5, 0, -5,
+     -10, 5, 5, 5, 5, 5, 0, -10,
+     -10, 0, 5, 0, 0, 0, 0, -10,
+     -20, -10, -10, -5, -5, -10, -10, -20],
+    [-20, -10, -10, -5, -5, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 5, 5, 5, 0, -10,
+     -5, 0, 5, 10, 10, 5, 0, -5,
+     -5, 0, 5, 10, 10, 5, 0, -5,
+     -10, 0, 5, 5, 5, 5, 0, -10,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -20, -10, -10, -5, -5, -10, -10, -20],
+)
+KING_TABLE = (
+    [-30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+     20, 20, 0, 0, 0, 0, 20, 20,
+     20, 30, 10, 0, 0, 10, 30, 20],
+    [-50, -40, -30, -20, -20, -30, -40, -50,
+     -30, -20, -10, 0, 0, -10, -20, -30,
+     -30, -10, 20, 30, 30, 20, -10, -30,
+     -30, -10, 30, 40, 40, 30, -10, -30,
+     -30, -10, 30, 40, 40, 30, -10, -30,
+     -30, -10, 20, 30, 30, 20, -10, -30,
+     -30, -30, 0, 0, 0, 0, -30, -30,
+     -50, -30, -30, -30, -30, -30, -30, -50],
+)
+TABLES = {"p": PAWN_TABLE, "n": KNIGHT_TABLE, "b": BISHOP_TABLE, "r": ROOK_TABLE, "q": QUEEN_TABLE, "k": KING_TABLE}
+
+
+def pack_score(middlegame: int, endgame: int) -> int:
+    """Packs a middlegame and an endgame score into one integer."""
+    return middlegame + (endgame << 20)
+
+
+def unpack_score(score: int) -> tuple[int, int]:
+    """Splits a packed score into its middlegame and endgame parts."""
+    endgame = (score + (1 << 19)) >> 20
+    return score - (endgame << 20), endgame
+
+
+def _square_scores(colour: Colour, symbol: str) -> list:
+    """Packed scores of a piece on each of the 64 squares, negated for black."""
+    middlegame_table, endgame_table = TABLES[symbol]
+    middlegame_value, endgame_value = MATERIAL[symbol]
+    scores = []
+    for square in range(64):
+        # Black reads the white table upside down
+        table_square = square if colour == Colour.WHITE else square ^ 56
+        score = pack_score(middlegame_value + middlegame_table[table_square],
+                           endgame_value + endgame_table[table_square])
+        scores.append(score if colour == Colour.WHITE else -score)
+    return scores
+
+
+SQUARE_SCORES = {
+    (colour, symbol): _square_scores(colour, symbol)
+    for colour in (Colour.WHITE, Colour.BLACK) for symbol in "kqrbnp"
+}
+
+
+def set_tables(material: dict, tables: dict):
+    """
+    Replaces the material values and piece-square tables. Boards keep the sums they were set up with, so
+    positions should be set up again afterwards.
+
+    :param material: (middlegame, endgame) value of each piece symbol.
+    :param tables: (middlegame table, endgame table) of each piece symbol, 64 values each, rank 8 first.
+    """
+    for symbol in "kqrbnp":
+        middlegame_table, endgame_table = tables[symbol]
+        if len(middlegame_table) != 64 or len(endgame_table) != 64:
+            raise ValueError(f"The piece-square tables of '{symbol}' need 64 values each")
+        MATERIAL[symbol] = tuple(material[symbol])
+        TABLES[symbol] = (list(middlegame_table), list(endgame_table))
+    for colour, symbol in SQUARE_SCORES:
+        SQUARE_SCORES[colour, symbol] = _square_scores(colour, symbol)
+
+
+def piece_square_score(piece, position: tuple[int, int]) -> int:
+    """Returns the packed score of a piece standing on a board position."""
+    return SQUARE_SCORES[piece.colour, piece.symbol][position[0] * 8 + position[1]]
+
+
+def psqt_scores(board) -> tuple[int, int]:
+    """
+    Computes the packed material and piece-square sum and the game phase of a position from scratch.
+
+    :param board: The board.
+    :return: Packed score from white's point of view and the phase, which exceeds MAX_PHASE after promotions.
+    """
+    score = phase = 0
+    for position, piece in board.board.items():
+        score += piece_square_score(piece, position)
+        phase += PHASE_WEIGHTS[piece.symbol]
+    return score, phase
@@ -14,12 +14,16 @@ class TitleState(GameState):
         self.title_text = self.font.render("Chess", True, WHITE)
         self.new_game_text = self.font.render("New Game", True, WHITE)
         self.button_rect = pygame.Rect(WIDTH // 2 - 150, HEIGHT // 2, 400, 75)
+        self.engine_game_text = self.font.render("Play Engine", True, WHITE)
+        self.engine_button_rect = pygame.Rect(WIDTH // 2 - 150, HEIGHT // 2 + 100, 400, 75)
 
     def handle_events(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
             mouse_x, mouse_y = pygame.mouse.get_pos()
             if self.button_rect.collidepoint(mouse_x, mouse_y):
                 return "SINGLEGAME"  # Switch to game state
+            if self.engine_button_rect.collidepoint(mouse_x, mouse_y):
+                return "ENGINEGAME"  # Switch to game state against the engine
         return None
 
     def render(self):
@@ -27,3 +31,5 @@ class TitleState(GameState):
         self.screen.blit(self.title_text, (WIDTH // 2 - 100, HEIGHT // 3))
         pygame.draw.rect(self.screen, (100, 100, 100), self.button_rect)
         self.screen.blit(self.new_game_text, (WIDTH // 2 - 100, HEIGHT // 2 + 10))
+        pygame.draw.rect(self.screen, (100, 100, 100), self.engine_button_rect)
+        self.screen.blit(self.engine_game_text, (WIDTH // 2 - 100, HEIGHT // 2 + 110))
@@ -0,0 +1,83 @@
+"""
+Zobrist hashing of board positions.
+
+A position's key is the XOR of a random 64-bit number for every piece on its square, one for each castling
+right, one for the en passant file when the capture is actually possible and one when black is to move.
+Board keeps the key up to date in make_move() and unmake_move(); zobrist_hash() computes it from scratch.
+
+The pawn key is the XOR of the piece keys of the pawns alone. It only changes on pawn moves, promotions and
+pawn captures, so it indexes evaluation terms that depend on the pawn structure only; see pawn_hash().
+"""
+import random
+
+from app.game import Colour
+
+# Fixed seed so keys, and any index files built from them, are the same in every run
+_random = random.Random(0x5EED_C0DE)
+
+PIECE_KEYS = {
+    (colour, symbol): [_random.getrandbits(64) for _ in range(64)]
+    for colour in (Colour.WHITE, Colour.BLACK) for symbol in "kqrbnp"
+}
+CASTLING_KEYS = {right: _random.getrandbits(64) for right in "KQkq"}
+EN_PASSANT_KEYS = [_random.getrandbits(64) for _ in range(8)]
+BLACK_TO_MOVE_KEY = _random.getrandbits(64)
+
+
+def piece_key(piece, position: tuple[int, int]) -> int:
+    """Returns the key of a piece standing on a board position."""
+    return PIECE_KEYS[piece.colour, piece.symbol][position[0] * 8 + position[1]]
+
+
+def castling_key(castling_rights: str) -> int:
+    """Returns the combined key of a castling rights string such as 'KQk'."""
+    key = 0
+    for right in castling_rights:
+        key ^= CASTLING_KEYS[right]
+    return key
+
+
+def en_passant_file(board):
+    """
+    Returns the file of the en passant square when a pawn of the side to move stands next to the pawn that
+    just made a double step, otherwise None. Whether the capture would leave the king in check is not tested.
+    """
+    target = board.en_passant_target
+    if target is None:
+        return None
+    row = target[0] + (1 if board.turn == Colour.WHITE else -1)
+    for col in (target[1] - 1, target[1] + 1):
+        piece = board.board.get((row, col))
+        if piece is not None and piece.symbol == "p" and piece.colour == board.turn:
+            return target[1]
+    return None
+
+
+def en_passant_key(board) -> int:
+    """Returns the en passant key of a position, 0 unless en_passant_file() finds a possible capture."""
+    file = en_passant_file(board)
+    return 0 if file is None else EN_PASSANT_KEYS[file]
+
+
+def zobrist_hash(board) -> int:
+    """
+    Computes the key of a position from scratch.
+
+    :param board: The board.
+    :return: Unsigned 64-bit key.
+    """
+    key = castling_key(board.castling_rights) ^ en_passant_key(board)
+    for position, piece in board.board.items():
+        key ^= piece_key(piece, position)
+    if board.turn == Colour.BLACK:
+        key ^= BLACK_TO_MOVE_KEY
+    return key
+
+
+def pawn_hash(board) -> int:
+    """Computes the pawn key of a position from scratch: the key of its pawns alone."""
+    key = 0
+    for position, piece in board.board.items():
+        if piece.symbol == "p":
+            key ^= piece_key(piece, position)
+    return key
@@ -1,52 +1,195 @@
-import pygame
+import argparse
+import os
 import sys
+import time
+from contextlib import nullcontext
+
+import pygame
 
+from app.engine.timeman import GameClock
+from app.game import Colour
+from app.game.frame_stats import FrameStats
 from app.game.game_over_state import GameOverState
+from app.game.instrumentation import InstrumentStats, profiled
 from app.game.local_multiplayer_state import SingleGameState
 from app.game.title_state import TitleState
-from game.board import Board
-
-pygame.init()
 
 WIDTH, HEIGHT = 800, 800
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 
-# Initialize Pygame screen
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Chess")
+DEFAULT_FPS = 60
 
 
 class Game:
-    def __init__(self, screen):
+    def __init__(self, screen, fps: int = DEFAULT_FPS, stats: FrameStats = None, overlay: bool = False,
+                 idle_wait: bool = True, book_path: str = None, time_control: str = None, ponder: bool = True,
+                 board_stats: InstrumentStats = None):
+        """
+        :param screen: The Pygame display surface.
+        :param fps: Frame cap while a drag or animation is in progress, 0 for uncapped.
+        :param stats: Optional FrameStats collecting event, update and render times per state.
+        :param overlay: Draw the last frame's timings in the top left corner.
+        :param idle_wait: Block on pygame.event.wait() while the state is idle.
+        :param book_path: Polyglot opening book for the engine.
+        :param time_control: Clock for engine games as ``minutes+increment``, None for untimed games.
+        :param ponder: Let the engine think on the player's time.
+        :param board_stats: Optional InstrumentStats recording the hot paths of every game's Board.
+        """
         self.screen = screen
+        self.fps = fps
+        self.stats = stats
+        self.overlay = overlay
+        self.idle_wait = idle_wait
+        self.book_path = book_path
+        self.time_control = time_control
+        self.ponder = ponder
+        self.board_stats = board_stats
+        self.clock = pygame.time.Clock()
         self.state = TitleState(screen)
+        self._state_changed = True
+        self._overlay_font = pygame.font.Font(None, 24) if overlay else None
+        self._overlay_rect = None
 
     def change_state(self, new_state):
+        self.state.close()
         if new_state == "TITLE":
             self.state = TitleState(self.screen)
         elif new_state == "SINGLEGAME":
             self.state = SingleGameState(self.screen)
+        elif new_state == "ENGINEGAME":
+            clock = GameClock.parse(self.time_control) if self.time_control else None
+            self.state = SingleGameState(self.screen, engine_colour=Colour.BLACK, book_path=self.book_path,
+                                         clock=clock, ponder=self.ponder)
         elif new_state == "GAMEOVER":
             self.state = GameOverState(self.screen)
+        if self.board_stats is not None and isinstance(self.state, SingleGameState):
+            self.state.board.enable_stats(self.board_stats)
+        self._state_changed = True
+
+    def _get_events(self):
+        """Returns pending events, blocking until one arrives if nothing needs to be drawn."""
+        if self.idle_wait and self.state.is_idle() and not self._state_changed:
+            return [pygame.event.wait()] + pygame.event.get()
+        return pygame.event.get()
 
-    def run(self):
-        while True:
-            for event in pygame.event.get():
+    def _render_overlay(self, dirty_rects):
+        """Draws the frame timings over the top left corner of the screen."""
+        text = self._overlay_font.render(self.stats.format_last(), True, WHITE, BLACK)
+        rect = self.screen.blit(text, (0, 0))
+        if dirty_rects is not None:
+            dirty_rects.append(rect.union(self._overlay_rect) if self._overlay_rect else rect)
+        self._overlay_rect = rect
+        return dirty_rects
+
+    def run(self, max_frames: int = None):
+        """
+        Runs the main loop.
+
+        :param max_frames: Stop after this many frames instead of waiting for the window to close.
+        """
+        frames = 0
+        while max_frames is None or frames < max_frames:
+            # The frame is credited to the state it starts in, and starts once the events are in: the time spent
+            # blocked waiting for them is the user's, not the frame's
+            state_name = type(self.state).__name__
+            events = self._get_events()
+            frame_start = time.perf_counter()
+            for event in events:
                 if event.type == pygame.QUIT:
+                    self.state.close()
                     pygame.quit()
                     sys.exit()
 
                 new_state = self.state.handle_events(event)
                 if new_state:
                     self.change_state(new_state)
+            events_end = time.perf_counter()
+
+            new_state = self.state.update()
+            if new_state:
+                self.change_state(new_state)
+            update_end = time.perf_counter()
+
+            self._state_changed = False
+            dirty_rects = self.state.render()
+            if self._overlay_font is not None and self.stats is not None:
+                dirty_rects = self._render_overlay(dirty_rects)
+
+            if dirty_rects is None:
+                pygame.display.flip()
+            elif dirty_rects:
+                pygame.display.update(dirty_rects)
+            render_end = time.perf_counter()
+
+            if self.stats is not None:
+                self.stats.record(state_name, render_end, events=events_end - frame_start,
+                                  update=update_end - events_end, render=render_end - update_end,
+                                  frame=render_end - frame_start)
+
+            if not self.state.is_idle() or not self.idle_wait:
+                self.clock.tick(self.fps)
+            frames += 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Play chess.")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS,
+                        help="frame cap while dragging or animating, 0 for uncapped")
+    parser.add_argument("--frame-stats", action="store_true",
+                        help="log frame, event and render times per game state every second")
+    parser.add_argument("--overlay", action="store_true", help="draw frame timings on screen")
+    parser.add_argument("--headless", action="store_true", help="use the SDL dummy video driver")
+    parser.add_argument("--state", choices=["TITLE", "SINGLEGAME", "ENGINEGAME", "GAMEOVER"], default="TITLE",
+                        help="game state to start in")
+    parser.add_argument("--benchmark", type=int, metavar="FRAMES",
+                        help="render FRAMES frames without waiting for input, then print frame stats and exit")
+    parser.add_argument("--book", help="Polyglot opening book for the engine")
+    parser.add_argument("--time-control", metavar="MINUTES+INCREMENT",
+                        help="play engine games on a clock, e.g. 5+3; the engine manages its own time")
+    parser.add_argument("--no-ponder", dest="ponder", action="store_false",
+                        help="stop the engine thinking while it is the player's turn")
+    parser.add_argument("--board-stats", action="store_true",
+                        help="count and time move generation, check detection and rendering, printed on exit")
+    parser.add_argument("--board-stats-json", metavar="PATH", help="write the board stats to this JSON file")
+    parser.add_argument("--profile", metavar="PATH", help="run under cProfile and write pstats output here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Chess")
+
+    stats = None
+    if args.frame_stats or args.overlay or args.benchmark:
+        stats = FrameStats(log_interval=1.0 if args.frame_stats else 0.0)
 
-            self.state.update()
-            self.state.render()
+    board_stats = InstrumentStats() if args.board_stats or args.board_stats_json else None
 
-            pygame.display.flip()
+    game = Game(screen, fps=args.fps, stats=stats, overlay=args.overlay, idle_wait=not args.benchmark,
+                book_path=args.book, time_control=args.time_control, ponder=args.ponder, board_stats=board_stats)
+    if args.state != "TITLE":
+        game.change_state(args.state)
+    try:
+        with profiled(args.profile) if args.profile else nullcontext():
+            game.run(max_frames=args.benchmark)
+    finally:
+        # Closing the window exits from inside run()
+        if board_stats is not None:
+            if args.board_stats:
+                print(board_stats.format_summary())
+            if args.board_stats_json:
+                board_stats.dump(args.board_stats_json)
+    game.state.close()
+    if stats is not None:
+        print(stats.format_summary())
+    pygame.quit()
 
 
 if __name__ == "__main__":
-    game = Game(screen)
-    game.run()
+    main()
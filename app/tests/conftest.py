@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from app.game.board import Board, START_FEN
+
+# Start positions of random walks: the opening, and a middlegame with promotions, castling rights and en passant
+WALK_FENS = (START_FEN, "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1")
+
+
+def walk(seed: int, plies: int, extra_fens=(), branch: float = 0.0):
+    """
+    Plays a random line from each of WALK_FENS and extra_fens, then takes every move back.
+
+    Yields (board, move) for the start of each line, after every move made (move) and after every move taken back
+    (None), so an incrementally updated value can be compared with a recomputation in every state visited.
+
+    :param seed: Seed of the move choices.
+    :param plies: Moves played from each start position, fewer if the game ends.
+    :param extra_fens: Start positions walked after WALK_FENS.
+    :param branch: Chance after each move of taking it back and continuing with another choice.
+    """
+    rng = random.Random(seed)
+    for fen in WALK_FENS + tuple(extra_fens):
+        board = Board(fen=fen)
+        yield board, None
+        for _ in range(plies):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            move = rng.choice(moves)
+            board.make_move(move)
+            yield board, move
+            if board.ply > 1 and rng.random() < branch:
+                board.unmake_move()
+                yield board, None
+        while board.move_history:
+            board.unmake_move()
+            yield board, None
+
+
+@pytest.fixture
+def random_walk():
+    """Fixture returning walk(), which yields the boards along random lines"""
+    return walk
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from app.engine.analysis import Analysis, AnalysisInfo
+from app.engine.search import Search, SearchLimits
+from app.game.board import Board
+
+FEN = "r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3"
+
+
+def test_multipv_lines_are_ranked_and_distinct():
+    """Test that every depth reports three lines with different first moves, best first"""
+    records = list(Analysis(FEN, SearchLimits(depth=2), multipv=3))
+    assert [(record.depth, record.multipv) for record in records] == [(1, 1), (1, 2), (1, 3),
+                                                                      (2, 1), (2, 2), (2, 3)]
+    for depth in (1, 2):
+        lines = [record for record in records if record.depth == depth]
+        assert len({record.pv[0] for record in lines}) == 3
+        assert [record.score for record in lines] == sorted((record.score for record in lines), reverse=True)
+
+    # The first line is what a single-line search finds
+    move, score = Search(Board(fen=FEN), SearchLimits(depth=2)).run()
+    assert (records[3].pv[0], records[3].score) == (move.uci(), score)
+
+
+def test_multipv_is_capped_by_legal_moves():
+    """Test that asking for more lines than there are moves reports each move once"""
+    records = list(Analysis("7k/8/8/8/8/8/8/K7 w - - 0 1", SearchLimits(depth=1), multipv=10))
+    assert sorted(record.pv[0] for record in records) == ["a1a2", "a1b1", "a1b2"]
+
+
+def test_breaking_out_stops_the_search():
+    """Test that leaving the loop of an unlimited analysis ends its search thread"""
+    analysis = Analysis(FEN, multipv=2)
+    start = time.perf_counter()
+    for record in analysis:
+        assert isinstance(record, AnalysisInfo)
+        break
+    assert time.perf_counter() - start < 30
+    assert analysis.best_move is not None
+
+
+def test_async_iteration_and_uci_lines():
+    """Test the async iterator and the conversion of records to UCI info lines"""
+    async def collect():
+        return [record async for record in Analysis(FEN, SearchLimits(depth=1), multipv=2)]
+
+    records = asyncio.run(collect())
+    assert [record.multipv for record in records] == [1, 2]
+    line = records[1].uci()
+    assert line.startswith("info depth 1 multipv 2 score cp ")
+    assert line.endswith(" pv " + " ".join(records[1].pv))
@@ -0,0 +1,160 @@
+import io
+
+import pytest
+
+from app.archive.gamefile import GameArchive, GameWriter, convert_pgn
+from app.archive.opening_tree import OpeningTree, build_tree
+from app.archive.position_index import PositionIndex, build_index
+from app.game.board import Board, START_FEN
+from app.game.move import Move
+from app.game.pgn import read_games, parse_san, move_to_san
+
+OPERA_GAME = """[Event "Paris"]
+[White "Paul Morphy"]
+[Black "Duke Karl / Count Isouard"]
+[Result "1-0"]
+[WhiteElo "2690"]
+
+1.e4 e5 2.Nf3 d6 3.d4 Bg4 {This is a weak move} 4.dxe5 Bxf3 5.Qxf3 dxe5 6.Bc4 Nf6 7.Qb3 Qe7
+8.Nc3 c6 9.Bg5 b5 (9...Qb4+ 10.Qxb4) 10.Nxb5 cxb5 11.Bxb5+ Nbd7 12.O-O-O Rd8
+13.Rxd7 Rxd7 14.Rd1 Qe6 15.Bxd7+ Nxd7 16.Qb8+ $1 Nxb8 17.Rd8# 1-0
+
+[Event "Promotion"]
+[SetUp "1"]
+[FEN "8/P6k/8/8/8/8/8/K7 w - - 0 1"]
+[Result "*"]
+
+1. a8=Q *
+"""
+
+
+@pytest.fixture
+def pgn_file(tmp_path):
+    """Fixture to write the test games to a PGN file"""
+    path = tmp_path / "games.pgn"
+    path.write_text(OPERA_GAME)
+    return path
+
+
+def test_read_games_skips_comments_and_variations():
+    """Test PGN parsing of tags and mainline moves"""
+    games = list(read_games(io.StringIO(OPERA_GAME)))
+    assert len(games) == 2
+    assert games[0].headers["White"] == "Paul Morphy"
+    assert games[0].moves[:4] == ["e4", "e5", "Nf3", "d6"]
+    assert games[0].moves[-1] == "Rd8#"
+    assert len(games[0].moves) == 33
+    assert games[1].fen == "8/P6k/8/8/8/8/8/K7 w - - 0 1"
+
+
+def test_san_round_trip():
+    """Test that SAN parsing and writing agree over a whole game"""
+    board = Board()
+    for san in next(read_games(io.StringIO(OPERA_GAME))).moves:
+        move = parse_san(board, san)
+        assert move_to_san(board, move) == san.rstrip("!?")
+        board.make_move(move)
+    assert board.outcome() == ("1-0", "checkmate")
+
+
+def test_move_encoding_round_trip():
+    """Test the 16-bit move encoding"""
+    for move in [Move((6, 4), (4, 4)), Move((1, 0), (0, 0), "q"), Move((6, 7), (7, 7), "n")]:
+        assert Move.decode(move.encode()) == move
+        assert move.encode() < 1 << 16
+
+
+def test_convert_and_read_archive(pgn_file, tmp_path):
+    """Test converting PGN to the binary archive and seeking to each game"""
+    archive_path = tmp_path / "games.bin"
+    assert convert_pgn(str(pgn_file), str(archive_path)) == (2, 0)
+
+    with GameArchive(str(archive_path)) as archive:
+        assert len(archive) == 2
+        promotion = archive[1]
+        assert promotion.fen == "8/P6k/8/8/8/8/8/K7 w - - 0 1"
+        assert list(promotion.iter_moves()) == [Move((1, 0), (0, 0), "q")]
+
+        opera = archive[0]
+        assert (opera.result, opera.white_elo, opera.black_elo) == ("1-0", 2690, 0)
+        assert opera.headers["White"] == "Paul Morphy"
+        board = None
+        for board in opera.replay():
+            pass
+        assert board.outcome() == ("1-0", "checkmate")
+
+
+def test_append_to_archive(tmp_path):
+    """Test adding games to an existing archive keeps the earlier ones"""
+    path = str(tmp_path / "games.bin")
+    with GameWriter(path) as writer:
+        writer.add_game([Move((6, 4), (4, 4))], "1-0", {"White": "Morphy", "Event": "Paris"})
+    with GameWriter(path, append=True) as writer:
+        writer.add_game([Move((6, 3), (4, 3))], "0-1", {"Black": "Morphy"}, fen=START_FEN)
+
+    with GameArchive(path) as archive:
+        assert [game.result for game in archive] == ["1-0", "0-1"]
+        assert archive[1].fen == START_FEN
+        assert [move.uci() for move in archive[0].iter_moves()] == ["e2e4"]
+        assert archive[0].headers == {"White": "Morphy", "Event": "Paris"}
+        assert archive[1].headers == {"Black": "Morphy"}
+
+
+def test_position_index_finds_games(pgn_file, tmp_path):
+    """Test that the index lists every game and ply reaching a position"""
+    archive_path, index_path = str(tmp_path / "games.bin"), str(tmp_path / "games.idx")
+    convert_pgn(str(pgn_file), archive_path)
+    assert build_index(archive_path, index_path, chunk_size=10) == 34 + 2
+
+    board = Board()
+    for san in ("e4", "e5", "Nf3"):
+        board.make_move(parse_san(board, san))
+    with PositionIndex(index_path) as index:
+        assert index.find(board) == [(0, 3)]
+        assert index.lookup(Board(fen=START_FEN).zobrist_key) == [(0, 0)]
+        assert index.find(Board(fen="8/8/8/8/8/8/8/K6k w - - 0 1")) == []
+
+
+def test_position_index_append(pgn_file, tmp_path):
+    """Test that appending indexes only the games added to the archive since the last build"""
+    archive_path, index_path = str(tmp_path / "games.bin"), str(tmp_path / "games.idx")
+    with GameWriter(archive_path) as writer:
+        writer.add_game([Move((6, 4), (4, 4))])
+    build_index(archive_path, index_path, max_ply=1)
+    with GameWriter(archive_path, append=True) as writer:
+        writer.add_game([Move((6, 4), (4, 4)), Move((1, 4), (3, 4))])
+    assert build_index(archive_path, index_path, append=True) == 2
+
+    board = Board()
+    board.make_move(Move((6, 4), (4, 4)))
+    with PositionIndex(index_path) as index:
+        assert index.games == 2 and index.max_ply == 1
+        assert index.find(board) == [(0, 1), (1, 1)]
+        assert index.count(Board().zobrist_key) == 2
+
+
+def test_opening_tree_statistics(pgn_file, tmp_path):
+    """Test that the tree counts moves, results and ratings, and that Board.book_moves() reads it"""
+    tree_path = str(tmp_path / "tree.bin")
+    pgn_file.write_text(OPERA_GAME + '\n[Result "0-1"]\n[WhiteElo "2500"]\n\n1. e4 c5 0-1\n')
+    assert build_tree(str(pgn_file), tree_path, max_ply=4, concurrency=1) == (3, 6)
+
+    board = Board()
+    with OpeningTree(tree_path) as tree:
+        assert tree.games == 3
+        (e4,) = board.book_moves(tree)
+        assert e4.move.uci() == "e2e4"
+        assert (e4.games, e4.white_wins, e4.draws, e4.black_wins) == (2, 1, 0, 1)
+        assert e4.average_rating == pytest.approx(2595)
+        board.opening_book = tree
+        board.make_move(e4.move)
+        assert {book_move.move.uci() for book_move in board.book_moves()} == {"e7e5", "c7c5"}
+
+
+def test_opening_tree_from_archive_in_parallel(pgn_file, tmp_path):
+    """Test that batches counted by worker processes merge into the same tree as a PGN build"""
+    archive_path = str(tmp_path / "games.bin")
+    convert_pgn(str(pgn_file), archive_path)
+    build_tree(str(pgn_file), str(tmp_path / "from_pgn.bin"), concurrency=1)
+    build_tree(archive_path, str(tmp_path / "from_archive.bin"), concurrency=2, batch_size=1)
+    assert (tmp_path / "from_pgn.bin").read_bytes() == (tmp_path / "from_archive.bin").read_bytes()
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.engine.batch_eval import encode_boards, encode_fens, evaluate_batch, evaluate_fens, to_planes
+from app.engine.evaluation import evaluate
+from app.game.board import Board, START_FEN
+
+
+@pytest.fixture(scope="module")
+def positions():
+    """Fixture to play random games and collect the positions reached, with either side to move"""
+    rng = random.Random(3)
+    fens = []
+    for _ in range(12):
+        board = Board()
+        for _ in range(rng.randrange(20, 120)):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+            fens.append(board.fen())
+    return fens
+
+
+def test_batch_scores_match_scalar_evaluation(positions):
+    """Test that every batch score equals evaluate() on the same position, across several blocks"""
+    squares, turns = encode_fens(positions)
+    expected = [evaluate(Board(fen=fen)) for fen in positions]
+    assert evaluate_batch(squares, turns, block_size=97).tolist() == expected
+
+
+def test_encode_fens_matches_encode_boards(positions):
+    """Test that packing FEN strings and packing boards give the same arrays"""
+    fen_squares, fen_turns = encode_fens(positions[:50])
+    board_squares, board_turns = encode_boards(Board(fen=fen) for fen in positions[:50])
+    assert np.array_equal(fen_squares, board_squares)
+    assert np.array_equal(fen_turns, board_turns)
+
+
+def test_encoding_and_planes():
+    """Test the piece codes of the start position and their expansion to one-hot planes"""
+    squares, turns = encode_fens([START_FEN])
+    assert squares.dtype == np.int8 and squares.shape == (1, 64)
+    assert squares[0, :8].tolist() == [10, 8, 9, 11, 12, 9, 8, 10]
+    assert squares[0, 56:].tolist() == [4, 2, 3, 5, 6, 3, 2, 4]
+    assert turns.tolist() == [0]
+    planes = to_planes(squares)
+    assert planes.shape == (1, 12, 64)
+    assert planes.sum() == 32
+    assert planes[0, 0, 48:56].tolist() == [1] * 8
+    assert evaluate_fens([START_FEN]).tolist() == [0]
+
+
+@pytest.mark.parametrize("fen", ["8/8/8/8 w - - 0 1", "rnbqkbnr/ppppxppp/8/8/8/8/PPPPPPPP/RNBQKBNR w", "8/8/8/8/8/8/8/8"])
+def test_encode_fens_rejects_invalid_positions(fen):
+    """Test that malformed placements raise ValueError"""
+    with pytest.raises(ValueError):
+        encode_fens([fen])
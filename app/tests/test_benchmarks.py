@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from app.benchmarks import BENCHMARKS, check_imports, compare, import_time, main, run_benchmarks, time_call
+
+
+def test_time_call_grows_the_loop():
+    """Test that a fast function is called enough times to fill the minimum time"""
+    seconds, loops = time_call(lambda: None, min_time=0.01, repeat=2)
+    assert loops > 1000
+    assert 0 < seconds < 1e-3
+
+
+@pytest.mark.parametrize("name", list(BENCHMARKS))
+def test_every_benchmark_runs(name):
+    """Test that each benchmark can be set up and timed, including rendering on the dummy driver"""
+    report = run_benchmarks([name], min_time=0.0, repeat=1)
+    assert report["benchmarks"][name]["seconds"] > 0
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    """Test that only benchmarks slower than the threshold allows are reported"""
+    baseline = {"benchmarks": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "gone": {"seconds": 1.0}}}
+    report = {"benchmarks": {"a": {"seconds": 1.1}, "b": {"seconds": 1.5}, "new": {"seconds": 9.0}}}
+    regressions = compare(report, baseline, threshold=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("b slowed")
+
+
+def test_main_saves_baseline_and_fails_on_regression(tmp_path):
+    """Test the saved baseline and the exit status when a run is slower than it"""
+    path = tmp_path / "baseline.json"
+    main(["is_check", "--min-time", "0.01", "--repeat", "1", "--save", str(path)])
+    baseline = json.loads(path.read_text())
+    assert list(baseline["benchmarks"]) == ["is_check"]
+
+    baseline["benchmarks"]["is_check"]["seconds"] /= 100
+    path.write_text(json.dumps(baseline))
+    with pytest.raises(SystemExit) as exit_info:
+        main(["is_check", "--min-time", "0.01", "--repeat", "1", "--baseline", str(path)])
+    assert exit_info.value.code == 1
+    with pytest.raises(SystemExit):
+        main(["no_such_benchmark"])
+
+
+def test_engine_modules_import_without_pygame():
+    """Test that the board and search can be imported in a fresh interpreter without loading pygame"""
+    result = import_time("app.engine.search", repeat=1)
+    assert not result["pygame"]
+    assert result["seconds"] > 0
+    assert import_time("app.main", repeat=1)["pygame"]
+
+
+def test_check_imports_reports_budget_and_pygame_failures():
+    """Test that an import over its budget or pulling in pygame is reported"""
+    imports = {"fast": {"seconds": 0.1, "budget": 0.2, "pygame": False},
+               "slow": {"seconds": 0.3, "budget": 0.2, "pygame": False},
+               "gui": {"seconds": 0.1, "budget": 0.2, "pygame": True}}
+    failures = check_imports(imports)
+    assert len(failures) == 2
+    assert "slow" in failures[0] and "pygame" in failures[1]
+    assert compare({"imports": {"slow": {"seconds": 0.3}}}, {"imports": {"slow": {"seconds": 0.1}}})
@@ -8,7 +8,9 @@ from app.game.pieces.Knight import Knight
 from app.game.pieces.Pawn import Pawn
 from app.game.pieces.Queen import Queen
 from app.game.pieces.Rook import Rook
-from app.game.board import Board
+from app.game.board import Board, START_FEN
+from app.game.move import Move
+from app.game.zobrist import zobrist_hash
 
 
 @pytest.fixture
@@ -249,4 +251,118 @@ def test_get_positions_between_reverse_vertical(mock_scale, mock_load, board):
 
     result = board.get_positions_between(start, end)
 
-    assert result == expected_positions, f"Expected {expected_positions}, but got {result}"
\ No newline at end of file
+    assert result == expected_positions, f"Expected {expected_positions}, but got {result}"
+
+
+def perft(board, depth):
+    """Counts the leaf nodes of the legal move tree to the given depth"""
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in board.legal_moves():
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def test_fen_round_trip():
+    """Test setting up a position from FEN and writing it back"""
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    assert Board(fen=fen).fen() == fen
+    assert Board().fen() == START_FEN
+
+
+@pytest.mark.parametrize("fen, depth, nodes", [
+    (START_FEN, 3, 8902),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", 2, 2039),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 3, 2812),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", 2, 1486),
+])
+def test_perft(fen, depth, nodes):
+    """Test legal move generation against known perft counts, including castling, en passant and promotion"""
+    assert perft(Board(fen=fen), depth) == nodes
+
+
+def test_make_unmake_restores_position():
+    """Test that unmaking every move restores the original position"""
+    board = Board(fen="r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1")
+    fen = board.fen()
+    for move in board.legal_moves():
+        board.make_move(move)
+        board.unmake_move()
+        assert board.fen() == fen
+
+
+def test_zobrist_key_is_updated_incrementally():
+    """Test that make/unmake keep the Zobrist key equal to a full recomputation"""
+    board = Board(fen="r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1")
+    key = board.zobrist_key
+    for move in board.legal_moves():
+        board.make_move(move)
+        assert board.zobrist_key == zobrist_hash(board) == Board(fen=board.fen()).zobrist_key
+        board.unmake_move()
+        assert board.zobrist_key == key
+
+
+def test_zobrist_key_ignores_impossible_en_passant():
+    """Test that the en passant square only changes the key when the capture is possible"""
+    after_double_step = Board(fen=START_FEN)
+    after_double_step.make_move(Move.from_uci("e2e4"))
+    assert after_double_step.zobrist_key == Board(
+        fen="rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1").zobrist_key
+
+    capturable = Board(fen="rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 3")
+    assert capturable.zobrist_key != Board(
+        fen="rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq - 0 3").zobrist_key
+
+
+def test_en_passant_capture_removes_pawn():
+    """Test that an en passant capture removes the pawn that moved two squares"""
+    board = Board(fen="rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 3")
+    board.make_move(Move.from_uci("e5d6"))
+    assert (3, 3) not in board.board
+    assert isinstance(board.board[(2, 3)], Pawn)
+
+
+def test_checkmate_and_stalemate_detection():
+    """Test terminal detection from the legal move generator"""
+    mated = Board(fen="rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3")
+    mated.is_checkmate()
+    assert mated.checkmate and not mated.stalemate
+
+    stalemated = Board(fen="7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+    stalemated.is_checkmate()
+    assert stalemated.stalemate and not stalemated.checkmate
+
+
+@pytest.mark.parametrize("fen, outcome", [
+    ("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3", ("0-1", "checkmate")),
+    ("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", ("1/2-1/2", "stalemate")),
+    ("8/8/4k3/8/8/2B5/4K3/8 w - - 0 1", ("1/2-1/2", "insufficient material")),
+    ("8/8/4k3/8/8/8/4K2R/8 w - - 100 80", ("1/2-1/2", "fifty moves")),
+    ("8/8/4k3/8/8/8/4K2R/8 w - - 0 1", None),
+])
+def test_outcome(fen, outcome):
+    """Test game termination by the rules"""
+    assert Board(fen=fen).outcome() == outcome
+
+
+def test_illegal_promotion_is_rejected_without_prompting():
+    """Test that a pinned pawn's promotion is refused before asking for the promotion piece"""
+    board = Board(fen="4k3/KP5r/8/8/8/8/8/8 w - - 0 1")
+    pawn = board.board[(1, 1)]
+    with patch("builtins.input", side_effect=AssertionError("prompted")):
+        board.move_piece(pawn, (0, 1))
+    assert board.move_history == []
+    assert board.board[(1, 1)] is pawn
+
+
+def test_legal_promotion_prompts_for_the_piece():
+    """Test that a legal promotion asks for the piece and promotes to it"""
+    board = Board(fen="4k3/1P6/8/8/8/8/8/K7 w - - 0 1")
+    with patch("builtins.input", return_value="k") as prompt:
+        board.move_piece(board.board[(1, 1)], (0, 1))
+    prompt.assert_called_once()
+    assert board.move_history == [Move.from_uci("b7b8n")]
+    assert isinstance(board.board[(0, 1)], Knight)
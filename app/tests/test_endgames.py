@@ -0,0 +1,70 @@
+import pytest
+
+from app.engine.endgames import KNOWN_WIN, handlers, is_known_draw
+from app.engine.evaluation import evaluate
+from app.engine.search import Search, SearchLimits
+from app.game.board import Board
+from app.game.material import material_hash, material_key_of, material_signature
+from app.game.move import Move
+
+
+def test_material_key_follows_captures_and_promotions(random_walk):
+    """Test that make/unmake keep the material key equal to a count of the pieces"""
+    for board, _ in random_walk(13, 80):
+        assert board.material_key == material_hash(board)
+
+    board = Board(fen="8/P3k3/8/8/8/8/8/4K3 w - - 0 1")
+    board.make_move(Move.from_uci("a7a8q"))
+    assert material_signature(board.material_key) == "KQvK"
+
+
+def test_material_signature():
+    """Test the signature of material keys built from pieces and from boards"""
+    assert material_signature(material_hash(Board())) == "KQRRBBNNPPPPPPPPvKQRRBBNNPPPPPPPP"
+    assert material_signature(material_key_of("krp", "kr")) == "KRPvKR"
+    assert material_key_of("kb", "k") == material_hash(Board(fen="8/8/4k3/8/8/2B5/4K3/8 w - - 0 1"))
+
+
+@pytest.mark.parametrize("fen", [
+    "8/8/4k3/8/8/8/4K3/8 w - - 0 1",
+    "8/8/4k3/8/8/2B5/4K3/8 w - - 0 1",
+    "8/8/4k3/3n4/8/8/4K3/8 b - - 0 1",
+])
+def test_known_draws_score_zero(fen):
+    """Test that lone kings and a single minor piece are recognised as draws and cut short by the search"""
+    board = Board(fen=fen)
+    assert is_known_draw(board.material_key)
+    assert evaluate(board) == 0
+    search = Search(board, SearchLimits(depth=4))
+    _, score = search.run()
+    assert score == 0
+    # Only the root and its children are visited
+    assert search.nodes <= 4 * (len(board.legal_moves()) + 1)
+
+
+def test_mating_net_drives_the_king_to_the_edge():
+    """Test that KQvK and KRvK score as won and prefer the defending king near the edge and the kings close"""
+    centre = evaluate(Board(fen="8/8/8/3k4/8/8/8/R3K3 w - - 0 1"))
+    edge = evaluate(Board(fen="3k4/8/8/8/8/8/8/R3K3 w - - 0 1"))
+    close = evaluate(Board(fen="3k4/8/3K4/8/8/8/8/R7 w - - 0 1"))
+    assert KNOWN_WIN < centre < edge < close
+    assert evaluate(Board(fen="3k4/8/3K4/8/8/8/8/R7 b - - 0 1")) == -close
+    assert evaluate(Board(fen="8/8/8/3K4/8/8/8/q3k3 b - - 0 1")) > KNOWN_WIN
+
+
+def test_opposite_bishops_are_scaled():
+    """Test that bishops of opposite colours halve the evaluation and bishops of the same colour do not"""
+    evaluator, scaler = handlers(material_key_of("kbppp", "kbpp"))
+    assert evaluator is None and scaler is not None
+    opposite = Board(fen="4k3/4b3/8/8/8/8/PPP1B3/4K3 w - - 0 1")
+    same = Board(fen="4k3/5b2/8/8/8/8/PPP1B3/4K3 w - - 0 1")
+    assert scaler(opposite) == 32 and scaler(same) == 64
+    assert 0 < evaluate(opposite) < evaluate(same)
+    assert handlers(material_hash(Board())) == (None, None)
+
+
+def test_search_mates_with_the_rook():
+    """Test that the mating-net evaluation lets a shallow search finish a rook mate"""
+    board = Board(fen="3k4/8/3K4/8/8/8/8/7R w - - 0 1")
+    move, score = Search(board, SearchLimits(depth=2)).run()
+    assert move.uci() == "h1h8"
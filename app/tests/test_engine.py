@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from app.engine.search import Search, SearchLimits, MATE_SCORE
+from app.engine.worker import EngineWorker
+from app.game.board import Board
+
+CHECK_NODES = 512
+
+
+def test_search_finds_mate_in_one():
+    """Test that the search finds a back rank mate"""
+    board = Board(fen="6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    move, score = Search(board, SearchLimits(depth=2)).run()
+    assert move.uci() == "a1a8"
+    assert score >= MATE_SCORE - 10
+
+
+def test_search_captures_hanging_queen():
+    """Test that the search takes a free queen"""
+    board = Board(fen="4k3/8/8/3q4/8/4N3/8/4K3 w - - 0 1")
+    move, _ = Search(board, SearchLimits(depth=2)).run()
+    assert move.uci() == "e3d5"
+
+
+def test_search_restores_board_and_reports_progress():
+    """Test that the board is unchanged after a search and one info record is sent per depth"""
+    board = Board()
+    fen = board.fen()
+    infos = []
+    Search(board, SearchLimits(depth=2), on_info=infos.append).run()
+    assert board.fen() == fen
+    assert [info["depth"] for info in infos] == [1, 2]
+    assert infos[-1]["pv"]
+
+
+def test_search_stops_on_node_limit():
+    """Test that a node limit stops the search early and still returns a move"""
+    board = Board()
+    search = Search(board, SearchLimits(nodes=CHECK_NODES))
+    move, _ = search.run()
+    assert move is not None
+    assert search.nodes <= CHECK_NODES + 1
+
+
+@pytest.fixture
+def worker():
+    """Fixture to create an engine worker process and shut it down afterwards"""
+    engine = EngineWorker()
+    yield engine
+    engine.close()
+
+
+def poll_until_done(engine, timeout=60):
+    """Collects the worker's messages until the current search finishes"""
+    messages = []
+    deadline = time.time() + timeout
+    while engine.busy and time.time() < deadline:
+        messages += engine.poll()
+        time.sleep(0.01)
+    return messages
+
+
+def test_worker_streams_progress_and_best_move(worker):
+    """Test that the worker process sends info records and then the best move"""
+    worker.submit("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1", SearchLimits(depth=2))
+    messages = poll_until_done(worker)
+    kinds = [kind for kind, _ in messages]
+    assert "info" in kinds
+    assert messages[-1] == ("bestmove", messages[-1][1])
+    assert messages[-1][1]["move"] == "a1a8"
+
+
+def test_worker_cancel_discards_results(worker):
+    """Test that a cancelled search produces no messages and a new search can be started"""
+    worker.submit(Board().fen(), SearchLimits(depth=20))
+    worker.cancel()
+    assert not worker.busy
+    assert worker.poll() == []
+
+    worker.submit("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1", SearchLimits(depth=1))
+    messages = poll_until_done(worker)
+    assert messages[-1][1]["move"] == "a1a8"
@@ -0,0 +1,61 @@
+import pytest
+
+from app.engine.evaluation import evaluate
+from app.game.board import Board, START_FEN
+from app.game.psqt import psqt_scores, pack_score, unpack_score
+
+
+@pytest.mark.parametrize("middlegame, endgame", [(0, 0), (35, -12), (-950, 980), (-4000, -3999), (12345, 54321)])
+def test_pack_score_round_trip(middlegame, endgame):
+    """Test that packed middlegame and endgame scores are recovered, including sums and negative parts"""
+    assert unpack_score(pack_score(middlegame, endgame)) == (middlegame, endgame)
+    assert unpack_score(pack_score(middlegame, endgame) + pack_score(7, -9)) == (middlegame + 7, endgame - 9)
+
+
+def test_start_position_is_balanced():
+    """Test that the symmetrical start position evaluates to zero for either side"""
+    assert evaluate(Board()) == 0
+    assert evaluate(Board(fen=START_FEN.replace(" w ", " b "))) == 0
+
+
+def test_evaluation_is_colour_symmetric():
+    """Test that mirroring a position and swapping the colours keeps the score for the side to move"""
+    board = Board(fen="r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP1B1PPP/R2QKB1R w KQ - 0 8")
+    mirrored = Board(fen="r2qkb1r/pp1b1ppp/2n1pn2/2pp4/3P4/2N1PN2/PP2BPPP/R1BQ1RK1 b kq - 0 8")
+    assert evaluate(board) == evaluate(mirrored)
+
+
+def test_evaluation_prefers_extra_material_and_active_pieces():
+    """Test that a piece up scores well ahead and a centralised knight beats one in the corner"""
+    assert evaluate(Board(fen="4k3/8/8/8/8/8/8/3QK3 w - - 0 1")) > 800
+    assert evaluate(Board(fen="4k3/8/8/8/8/8/8/3QK3 b - - 0 1")) < -800
+    # Pawns keep these out of the drawn knight-against-king ending
+    centre = evaluate(Board(fen="4k3/p7/8/3N4/8/8/P7/4K3 w - - 0 1"))
+    corner = evaluate(Board(fen="4k3/p7/8/8/8/8/P7/N3K3 w - - 0 1"))
+    assert centre > corner
+
+
+def test_king_table_tapers_to_the_endgame():
+    """Test that a central king is penalised with queens on the board and rewarded without"""
+    pieces = "rnbqkbnr/8/8/8/{}/8/8/RNBQ{}BNR w - - 0 1"
+    assert evaluate(Board(fen=pieces.format("3K4", "1"))) < evaluate(Board(fen=pieces.format("8", "K")))
+    assert evaluate(Board(fen="4k3/p7/8/8/3K4/8/P7/8 w - - 0 1")) > evaluate(Board(fen="4k3/p7/8/8/8/8/P7/3K4 w - - 0 1"))
+
+
+def test_incremental_scores_match_full_recomputation(random_walk):
+    """Test that make/unmake keep the material and piece-square sums equal to a full recomputation"""
+    for board, move in random_walk(7, 60, extra_fens=("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",)):
+        assert (board.psqt_score, board.phase) == psqt_scores(board)
+        if move is not None:
+            assert evaluate(board) == evaluate(board, incremental=False) == evaluate(Board(fen=board.fen()))
+
+
+def test_promotion_updates_scores():
+    """Test that promoting replaces the pawn's score with the new piece's and raises the phase"""
+    board = Board(fen="8/P3k3/8/8/8/8/8/4K3 w - - 0 1")
+    before = evaluate(board)
+    board.make_move(board.legal_moves()[0].__class__.from_uci("a7a8q"))
+    assert (board.psqt_score, board.phase) == psqt_scores(board)
+    assert board.phase == 4
+    # The pawn was already worth a passed pawn bonus on the seventh rank
+    assert -evaluate(board) > before + 650
@@ -0,0 +1,63 @@
+import json
+import pstats
+
+from app.game.board import Board
+from app.game.instrumentation import HOT_PATHS, InstrumentStats, profiled
+from app.game.move import Move
+
+
+def test_board_is_not_wrapped_until_stats_are_enabled():
+    """Test that a board without stats runs the plain class methods"""
+    board = Board()
+    assert board.stats is None
+    assert not any(name in vars(board) for names in HOT_PATHS.values() for name in names)
+
+
+def test_stats_count_and_time_hot_paths():
+    """Test that calls made through the board, including nested ones, are recorded per method"""
+    board = Board()
+    stats = board.enable_stats()
+    board.play_move(Move.from_uci("e2e4"))
+    board.undo_move()
+
+    summary = stats.summary()
+    assert summary["make_move"]["calls"] > 1
+    assert summary["legal_moves"]["calls"] == 2
+    assert summary["legal_moves"]["section"] == "move_generation"
+    assert summary["legal_moves"]["total_ms"] > 0
+    assert "is_checkmate" in stats.format_summary()
+
+
+def test_disabling_stats_keeps_the_record():
+    """Test that disable_stats() stops recording without clearing what was recorded"""
+    board = Board()
+    stats = board.enable_stats()
+    board.legal_moves()
+    board.disable_stats()
+    board.legal_moves()
+    assert stats.calls["legal_moves"] == 1
+    assert "legal_moves" not in vars(board)
+
+
+def test_stats_can_be_shared_and_dumped(tmp_path):
+    """Test that two boards record into one stats object and the summary is written as JSON"""
+    stats = InstrumentStats()
+    for _ in range(2):
+        board = Board()
+        board.enable_stats(stats)
+        board.legal_moves()
+    path = tmp_path / "stats.json"
+    stats.dump(str(path))
+    assert json.loads(path.read_text())["legal_moves"]["calls"] == 2
+
+    stats.reset()
+    assert stats.summary() == {}
+
+
+def test_profiled_writes_pstats_file(tmp_path):
+    """Test that the profile of the with body is written in the pstats format"""
+    path = tmp_path / "run.prof"
+    with profiled(str(path)):
+        Board().legal_moves()
+    functions = {function for _, _, function in pstats.Stats(str(path)).stats}
+    assert "legal_moves" in functions
@@ -0,0 +1,180 @@
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from app.engine.polyglot import encode_move, polyglot_key, write_book
+from app.engine.search import SearchLimits
+from app.game import Colour
+from app.game.board import Board
+from app.game.frame_stats import FrameStats
+from app.engine.timeman import GameClock
+from app.game.instrumentation import InstrumentStats
+from app.game.local_multiplayer_state import SingleGameState
+from app.game.move import Move
+from app.main import Game, WIDTH, HEIGHT
+
+
+@pytest.fixture
+def screen():
+    """Fixture to create a display surface on the SDL dummy driver"""
+    pygame.init()
+    yield pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.quit()
+
+
+def test_benchmark_run_records_stats_per_state(screen):
+    """A fixed number of frames is rendered and timed per game state"""
+    stats = FrameStats()
+    game = Game(screen, fps=0, stats=stats, idle_wait=False)
+    game.change_state("SINGLEGAME")
+    game.run(max_frames=5)
+
+    summary = stats.summary()
+    assert list(summary) == ["SingleGameState"]
+    assert summary["SingleGameState"]["frames"] == 5
+    assert summary["SingleGameState"]["frame_avg_ms"] >= summary["SingleGameState"]["render_avg_ms"]
+
+
+def test_idle_state_waits_for_events(screen):
+    """An idle state blocks on the event queue once its first frame is drawn"""
+    game = Game(screen)
+    game.run(max_frames=1)
+
+    pygame.event.post(pygame.event.Event(pygame.USEREVENT))
+    assert [event.type for event in game._get_events()] == [pygame.USEREVENT]
+
+
+def test_overlay_adds_dirty_rect(screen):
+    """The timing overlay is included in the rects passed to display.update"""
+    stats = FrameStats()
+    game = Game(screen, fps=0, stats=stats, overlay=True, idle_wait=False)
+    game.change_state("SINGLEGAME")
+    game.run(max_frames=2)
+
+    assert game._overlay_rect is not None
+    assert "render" in stats.format_last()
+
+
+def test_engine_plays_book_moves_without_searching(screen, tmp_path):
+    """The engine answers from its opening book at once instead of starting a search"""
+    board = Board()
+    book_path = str(tmp_path / "book.bin")
+    write_book(book_path, [(polyglot_key(board), encode_move(board, Move.from_uci("e2e4")), 1, 0)])
+    state = SingleGameState(screen, engine_colour=Colour.WHITE, book_path=book_path)
+    try:
+        state.update()
+        assert state.board.move_history == [Move.from_uci("e2e4")]
+        assert not state.engine.busy
+    finally:
+        state.close()
+
+
+def run_until(state, condition, timeout=60):
+    """Updates a game state until a condition holds"""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        state.update()
+        time.sleep(0.01)
+    assert condition()
+
+
+@pytest.mark.parametrize("predicted", [True, False])
+def test_engine_ponders_on_the_expected_reply(screen, predicted):
+    """The engine searches the reply it predicts while the player thinks, and keeps the search on a hit"""
+    state = SingleGameState(screen, engine_colour=Colour.WHITE, engine_limits=SearchLimits(depth=2))
+    try:
+        run_until(state, lambda: state._ponder_move is not None)
+        expected = state._ponder_move
+        assert state.engine.busy
+        if predicted:
+            reply = expected
+        else:
+            reply = next(move for move in state.board.legal_moves() if move != expected)
+        state.board.play_move(reply)
+        run_until(state, lambda: len(state.board.move_history) == 3)
+        assert (state.ponder_hits, state.ponder_misses) == ((1, 0) if predicted else (0, 1))
+    finally:
+        state.close()
+
+
+def test_board_stats_record_the_game_board(screen):
+    """The game's board records its hot paths in the stats passed to Game"""
+    board_stats = InstrumentStats()
+    game = Game(screen, fps=0, idle_wait=False, board_stats=board_stats)
+    game.change_state("SINGLEGAME")
+    game.run(max_frames=2)
+
+    assert game.state.board.stats is board_stats
+    assert board_stats.calls["render"] == 2
+
+
+def test_engine_pieces_cannot_be_picked_up_while_it_thinks(screen, monkeypatch):
+    """Clicking a piece is ignored while it is the engine's turn"""
+    state = SingleGameState(screen, engine_colour=Colour.BLACK)
+    try:
+        state.board.play_move(Move.from_uci("e2e4"))
+        # Screen coordinates of e7, see Board.get_piece_at()
+        board = state.board
+        e7 = (board.board_start_y + 4.5 * board.square_size_y, board.board_start_x + 1.5 * board.square_size_x)
+        monkeypatch.setattr(pygame.mouse, "get_pos", lambda: e7)
+        state.handle_events(pygame.event.Event(pygame.MOUSEBUTTONDOWN))
+        assert board.selected_piece is None
+    finally:
+        state.close()
+
+
+def test_stale_engine_moves_are_dropped(screen):
+    """An engine move that is not legal in the current position is not played, searched or pondered"""
+    state = SingleGameState(screen, engine_colour=Colour.BLACK)
+    try:
+        state._play_engine_move(Move.from_uci("e7e5"))
+        assert state.board.move_history == []
+
+        # A ponder hit whose finished search answered a different position
+        state._ponder_move, state._ponder_result = Move.from_uci("e2e4"), {"move": "d7d4"}
+        state.board.play_move(Move.from_uci("e2e4"))
+        state._resolve_ponder()
+        assert state.ponder_hits == 1
+        assert state.board.move_history == [Move.from_uci("e2e4")]
+    finally:
+        state.close()
+
+
+def test_frame_stats_exclude_the_wait_for_events(screen, monkeypatch):
+    """Time blocked waiting for input is not counted, and a frame is credited to the state it started in"""
+    stats = FrameStats()
+    game = Game(screen, fps=0, stats=stats)
+    game.change_state("SINGLEGAME")
+
+    def wait_for_events():
+        time.sleep(0.2)
+        return []
+
+    monkeypatch.setattr(game, "_get_events", wait_for_events)
+    monkeypatch.setattr(game.state, "update", lambda: "GAMEOVER")
+    game.run(max_frames=1)
+
+    summary = stats.summary()
+    assert list(summary) == ["SingleGameState"]
+    assert summary["SingleGameState"]["frame_max_ms"] < 150
+
+
+def test_takeback_while_engine_thinks_gives_no_increment(screen):
+    """Taking back the player's move while the engine thinks stops the engine's clock without an increment"""
+    clock = GameClock(60, 5)
+    state = SingleGameState(screen, engine_colour=Colour.BLACK, clock=clock, ponder=False)
+    try:
+        state.update()
+        state.board.play_move(Move.from_uci("e2e4"))
+        state.update()
+        assert clock.running == Colour.BLACK and state.engine.busy
+        state.take_back()
+        state.update()
+        assert state.board.move_history == [] and clock.running == Colour.WHITE
+        assert clock.remaining[Colour.BLACK] <= 60
+    finally:
+        state.close()
@@ -0,0 +1,67 @@
+import pytest
+
+from app.engine.mate import MateSolver, ProofTable, make_tasks, run_puzzles
+from app.game.board import Board
+from app.game.epd import parse_epd
+from app.game.move import Move
+
+LEGAL_MATE = "r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 1"
+
+
+def play_line(fen, line):
+    """Plays a line and returns the final board"""
+    board = Board(fen=fen)
+    for move in line:
+        assert move in board.legal_moves()
+        board.make_move(move)
+    return board
+
+
+@pytest.mark.parametrize("fen, moves, expected", [
+    ("6k1/5ppp/8/8/8/8/5PPP/2R3K1 w - - 0 1", 1, ["c1c8"]),
+    (LEGAL_MATE, 2, ["d5f6", "g7f6", "c4f7"]),
+    ("6k1/pp4p1/2p5/2bp4/8/P5Pb/1P3rrP/2BRRN1K b - - 0 1", 2, ["g2g1", "h1g1", "f2f1"]),
+])
+def test_solver_returns_mating_line(fen, moves, expected):
+    """Test that the solver finds the shortest mate, returns the whole line and restores the board"""
+    board = Board(fen=fen)
+    line = MateSolver(board).solve(moves)
+    assert [move.uci() for move in line] == expected
+    assert board.fen() == fen
+    final = play_line(fen, line)
+    assert not final.legal_moves() and final.in_check()
+
+
+def test_stalemate_and_missing_mates_are_not_proven():
+    """Test that a position with no mate in the bound, and a stalemating move, do not count as mates"""
+    # Kc7 leaves black without a move, but not in check
+    fen = "k7/8/1PK5/8/8/8/8/8 w - - 0 1"
+    assert not play_line(fen, [Move.from_uci("c6c7")]).legal_moves()
+    assert MateSolver(Board(fen=fen)).solve(1) is None
+    assert MateSolver(Board()).solve(1) is None
+
+
+def test_node_budget_and_bounded_table():
+    """Test that running out of nodes stops the solver cleanly, and that the table size is checked"""
+    board = Board(fen=LEGAL_MATE)
+    solver = MateSolver(board, max_nodes=50)
+    assert solver.solve(2) is None
+    assert solver.exhausted and solver.nodes == 51
+    assert board.fen() == LEGAL_MATE
+    assert MateSolver(Board(fen=LEGAL_MATE), table_size=16).solve(2) is not None
+    with pytest.raises(ValueError):
+        ProofTable(size=1000)
+
+
+def test_puzzle_runner_reports_solve_rate():
+    """Test that EPD puzzles are checked against their dm and bm operations"""
+    positions = [parse_epd(line) for line in [
+        '6k1/5ppp/8/8/8/8/5PPP/2R3K1 w - - dm 1; bm Rc8#; id "back rank";',
+        '6k1/5ppp/8/8/8/8/5PPP/2R3K1 w - - dm 1; bm Rc7; id "wrong bm";',
+        '6k1/5ppp/8/8/8/8/5PP1/6K1 w - - id "no mate";',
+    ]]
+    records = run_puzzles(make_tasks(positions, 1, 10000, 1 << 10), concurrency=1)
+    assert [record["id"] for record in records] == ["back rank", "wrong bm", "no mate"]
+    assert [record["solved"] for record in records] == [True, False, False]
+    assert records[0]["line"] == ["c1c8"] and records[0]["mate"] == 1
+    assert records[2]["line"] is None and not records[2]["exhausted"]
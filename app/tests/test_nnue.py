@@ -0,0 +1,82 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.engine.nnue import INPUTS, QA, SCALE, NNUEEvaluator, Network, feature
+from app.engine.search import Search, SearchLimits
+from app.game import Colour
+from app.game.board import Board, START_FEN
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+@pytest.fixture(scope="module")
+def network():
+    """Fixture to create a small random network"""
+    return Network.random(hidden_size=32, seed=1)
+
+
+def test_incremental_updates_match_full_evaluation(network, random_walk):
+    """Test that lazily updated accumulators agree with a recomputation along branching random lines"""
+    evaluator = NNUEEvaluator(network)
+    for board, _ in random_walk(11, 40, extra_fens=(KIWIPETE,), branch=0.3):
+        assert evaluator(board) == evaluator.evaluate_full(board)
+    assert evaluator.updates > evaluator.refreshes
+
+
+def test_evaluation_is_colour_symmetric(network):
+    """Test that mirroring a position and swapping the colours keeps the score for the side to move"""
+    evaluator = NNUEEvaluator(network)
+    board = Board(fen="r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP1B1PPP/R2QKB1R w KQ - 0 8")
+    mirrored = Board(fen="r2qkb1r/pp1b1ppp/2n1pn2/2pp4/3P4/2N1PN2/PP2BPPP/R1BQ1RK1 b kq - 0 8")
+    assert evaluator(board) == evaluator(mirrored)
+
+
+def test_quantised_output_follows_float_network():
+    """Test that the quantised network stays close to the same network computed in floating point"""
+    rng = np.random.default_rng(5)
+    feature_weights = rng.normal(0, 0.05, (INPUTS, 16))
+    feature_bias = rng.uniform(0, 0.5, 16)
+    output_weights = rng.normal(0, 1.0, 32)
+    evaluator = NNUEEvaluator(Network.from_float(feature_weights, feature_bias, output_weights, 0.25))
+
+    board = Board(fen=KIWIPETE)
+    hidden = []
+    for perspective in (Colour.WHITE, Colour.BLACK):
+        features = [feature(perspective, piece.colour, piece.symbol, position)
+                    for position, piece in board.board.items()]
+        hidden.append(np.clip(feature_bias + feature_weights[features].sum(axis=0), 0, 1))
+    expected = (np.concatenate(hidden) @ output_weights + 0.25) * SCALE
+    assert abs(evaluator(board) - expected) < 0.1 * abs(expected) + 10
+
+
+def test_save_and_load_round_trip(network, tmp_path):
+    """Test that a saved network loads back with identical weights and evaluations"""
+    path = tmp_path / "net.nnue"
+    network.save(str(path))
+    loaded = Network.load(str(path))
+    assert np.array_equal(loaded.feature_weights, network.feature_weights)
+    assert np.array_equal(loaded.output_weights, network.output_weights)
+    assert loaded.output_bias == network.output_bias
+    board = Board(fen=KIWIPETE)
+    assert NNUEEvaluator(loaded)(board) == NNUEEvaluator(network)(board)
+
+    path.write_bytes(path.read_bytes()[:100])
+    with pytest.raises(ValueError):
+        Network.load(str(path))
+
+
+def test_accumulator_clipping_bounds(network):
+    """Test that the output stays within what the clipped hidden layer allows"""
+    limit = QA * int(np.abs(network.output_weights.astype(np.int64)).sum()) + abs(network.output_bias)
+    assert abs(NNUEEvaluator(network)(Board())) <= limit * SCALE // (QA * 64) + 1
+
+
+def test_search_uses_network_evaluator(network):
+    """Test that a search runs with the network at its leaves and restores the board"""
+    board = Board()
+    evaluator = NNUEEvaluator(network)
+    move, _ = Search(board, SearchLimits(depth=2, nodes=4096), evaluator=evaluator).run()
+    assert move is not None
+    assert board.fen() == START_FEN
+    assert evaluator.updates > 0
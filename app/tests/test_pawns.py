@@ -0,0 +1,62 @@
+import pytest
+
+from app.engine.pawns import PAWN_WEIGHTS, PawnHashTable, pawn_structure
+from app.engine.search import Search, SearchLimits
+from app.game.board import Board
+from app.game.zobrist import pawn_hash
+
+
+def test_pawn_key_follows_pawn_moves_only(random_walk):
+    """Test that the pawn key changes on pawn moves, captures and promotions, and is restored by unmake"""
+    before = None
+    for board, move in random_walk(11, 80):
+        assert board.pawn_key == pawn_hash(board)
+        if move is not None:
+            removed, added = board.piece_changes(board.ply - 1)
+            if all(symbol != "p" for _, symbol, _ in removed + added):
+                assert board.pawn_key == before
+        before = board.pawn_key
+
+
+@pytest.mark.parametrize("fen, doubled, isolated, passed", [
+    ("4k3/8/8/8/8/8/PPPPPPPP/4K3 w - - 0 1", 0, 0, [1] * 8),
+    ("4k3/8/8/8/8/P7/P7/4K3 w - - 0 1", 1, 2, [1, 2]),
+    ("4k3/8/8/8/8/8/2P1P3/4K3 w - - 0 1", 0, 2, [1, 1]),
+    ("4k3/8/P7/8/8/8/1P6/4K3 w - - 0 1", 0, 0, [1, 5]),
+])
+def test_pawn_structure_terms(fen, doubled, isolated, passed):
+    """Test the doubled, isolated and passed pawn terms of white structures, and that black's mirror them"""
+    expected = (doubled * PAWN_WEIGHTS["doubled"] + isolated * PAWN_WEIGHTS["isolated"]
+                + sum(PAWN_WEIGHTS["passed"][rank] for rank in passed))
+    assert pawn_structure(Board(fen=fen)) == expected
+    mirrored = "/".join(row.swapcase() for row in reversed(fen.split()[0].split("/")))
+    assert pawn_structure(Board(fen=mirrored + " w - - 0 1")) == -expected
+    assert pawn_structure(Board()) == 0
+
+
+def test_passed_pawn_blocked_by_enemy_ahead():
+    """Test that an enemy pawn ahead on a neighbouring file stops a pawn being passed, but one behind does not"""
+    # Both pawns are isolated and neither is passed
+    assert pawn_structure(Board(fen="4k3/1p6/8/8/8/8/P7/4K3 w - - 0 1")) == 0
+    # Side by side, both are passed: white's on its second rank, black's on its seventh
+    passed = PAWN_WEIGHTS["passed"]
+    assert pawn_structure(Board(fen="4k3/8/8/8/8/8/Pp6/4K3 w - - 0 1")) == passed[1] - passed[6]
+
+
+def test_pawn_hash_table_caches_scores():
+    """Test that the table returns the computed score, counts hits and reaches a high hit rate in a search"""
+    table = PawnHashTable(size=64)
+    board = Board(fen="4k3/2p5/8/8/8/8/P7/4K3 w - - 0 1")
+    assert table.score(board) == pawn_structure(board)
+    assert table.score(board) == pawn_structure(board)
+    assert (table.probes, table.hits) == (2, 1)
+    table.clear()
+    assert table.hit_rate == 0.0
+    with pytest.raises(ValueError):
+        PawnHashTable(size=100)
+
+    from app.engine.pawns import PAWN_HASH
+    PAWN_HASH.clear()
+    Search(Board(fen="8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"), SearchLimits(depth=3)).run()
+    # Only the first visit to each pawn structure misses
+    assert PAWN_HASH.hit_rate > 0.8
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from app.engine.polyglot import (PolyglotBook, build_book, choose_book_move, decode_move, encode_move,
+                                 polyglot_key, write_book)
+from app.game.board import Board
+from app.game.move import Move
+
+
+def play(board, *moves):
+    for move in moves:
+        board.make_move(Move.from_uci(move))
+    return board
+
+
+@pytest.mark.parametrize("moves, key", [
+    ((), 0x463B96181691FC9C),
+    (("e2e4",), 0x823C9B50FD114196),
+    (("e2e4", "d7d5"), 0x0756B94461C50FB0),
+    (("e2e4", "d7d5", "e4e5", "f7f5"), 0x22A48B5A8E47FF78),
+    (("a2a4", "b7b5", "h2h4", "b5b4", "c2c4"), 0x3C8123EA7B067637),
+])
+def test_polyglot_key_matches_reference_values(moves, key):
+    """Test the keys against the values published with the Polyglot book format"""
+    assert polyglot_key(play(Board(), *moves)) == key
+
+
+def test_castling_is_stored_as_king_takes_rook():
+    """Test that castling moves are converted to and from the book encoding"""
+    board = Board(fen="r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    castle = Move.from_uci("e1g1")
+    assert encode_move(board, castle) == encode_move(board, Move.from_uci("e1h1"))
+    assert decode_move(board, encode_move(board, castle)) == castle
+    promotion = Move.from_uci("a7a8q")
+    assert decode_move(Board(fen="8/P6k/8/8/8/8/8/K7 w - - 0 1"), encode_move(board, promotion)) == promotion
+
+
+def test_probe_and_choose(tmp_path):
+    """Test the binary search over a written book and weighted or best move selection"""
+    board = Board()
+    path = str(tmp_path / "book.bin")
+    key = polyglot_key(board)
+    e4, d4 = Move.from_uci("e2e4"), Move.from_uci("d2d4")
+    write_book(path, [
+        (key, encode_move(board, d4), 1, 0),
+        (key + 1, 0, 5, 0),
+        (key - 1, 0, 5, 0),
+        (key, encode_move(board, e4), 3, 0),
+    ])
+    with PolyglotBook(path) as book:
+        entries = board.book_moves(book)
+        assert [(entry.move, entry.weight) for entry in entries] == [(e4, 3), (d4, 1)]
+        assert choose_book_move(entries, best=True) == e4
+        rng = random.Random(1)
+        picks = [choose_book_move(entries, rng=rng) for _ in range(400)]
+        assert 0.65 < picks.count(e4) / len(picks) < 0.85
+        assert board.book_moves(book) and not play(board, "e2e4").book_moves(book)
+    assert choose_book_move([]) is None
+
+
+def test_build_book_from_pgn(tmp_path):
+    """Test that built books weight moves by the mover's results"""
+    pgn = tmp_path / "games.pgn"
+    pgn.write_text('[Result "1-0"]\n\n1. e4 e5 1-0\n\n[Result "1/2-1/2"]\n\n1. e4 c5 1/2-1/2\n\n'
+                   '[Result "0-1"]\n\n1. d4 d5 0-1\n')
+    path = str(tmp_path / "book.bin")
+    assert build_book(str(pgn), path) == 5
+    with PolyglotBook(path) as book:
+        board = Board()
+        assert [(entry.move.uci(), entry.weight) for entry in board.book_moves(book)] == [("e2e4", 3), ("d2d4", 0)]
+        play(board, "d2d4")
+        assert [(entry.move.uci(), entry.weight) for entry in board.book_moves(book)] == [("d7d5", 2)]
+
+
+def test_empty_book_is_not_replaced_by_the_board_book(tmp_path):
+    """Test that an explicitly passed empty book is used rather than the board's own book"""
+    board = Board()
+    full, empty = str(tmp_path / "full.bin"), str(tmp_path / "empty.bin")
+    write_book(full, [(polyglot_key(board), encode_move(board, Move.from_uci("e2e4")), 1, 0)])
+    write_book(empty, [])
+    with PolyglotBook(full) as board.opening_book, PolyglotBook(empty) as book:
+        assert len(book) == 0
+        assert board.book_moves(book) == []
+        assert [entry.move.uci() for entry in board.book_moves()] == ["e2e4"]
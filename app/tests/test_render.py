@@ -0,0 +1,62 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from app.game.board import Board
+
+
+@pytest.fixture
+def board():
+    """Fixture to create a default Board object"""
+    return Board(screen_width=800, screen_height=800)
+
+
+@pytest.fixture
+def screen():
+    """Fixture to create an off-screen surface the size of the window"""
+    return pygame.Surface((800, 800))
+
+
+def assert_same_pixels(surface, other):
+    assert pygame.image.tobytes(surface, "RGB") == pygame.image.tobytes(other, "RGB")
+
+
+def test_first_render_is_full_screen(board, screen):
+    """The first render builds the cached layer and updates the whole screen"""
+    assert board.render(screen) == [screen.get_rect()]
+
+
+def test_idle_render_is_empty(board, screen):
+    """Nothing is redrawn when the board has not changed"""
+    board.render(screen)
+    assert board.render(screen) == []
+
+
+def test_move_redraws_only_touched_squares(board, screen):
+    """A move repaints the squares it touched and matches a full redraw"""
+    board.render(screen)
+    board.move_piece(board.board[(6, 4)], (4, 4))
+
+    dirty_rects = board.render(screen)
+    assert len(dirty_rects) == 2
+
+    expected = pygame.Surface((800, 800))
+    board.render_full(expected)
+    assert_same_pixels(screen, expected)
+
+
+def test_selected_piece_is_removed_from_layer(board, screen):
+    """Selecting a piece takes it out of the cached layer until it is released"""
+    board.render(screen)
+    board.selected_piece = board.board[(7, 1)]
+    assert len(board.render(screen)) == 1
+
+    expected = pygame.Surface((800, 800))
+    board.render_full(expected)
+    assert_same_pixels(screen, expected)
+
+    board.selected_piece = None
+    assert len(board.render(screen)) == 1
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from app.engine.search import Search, SearchLimits, SearchOptions, benchmark
+from app.engine.tournament import EngineSpec
+from app.game.board import Board, START_FEN
+from app.game.material import material_hash
+from app.game.zobrist import zobrist_hash
+
+ENDGAME = "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+
+
+def test_null_move_round_trip():
+    """Test that a null move passes the turn, clears en passant and is undone exactly"""
+    rng = random.Random(3)
+    board = Board(fen="rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3")
+    for _ in range(30):
+        fen, key = board.fen(), board.zobrist_key
+        board.make_null_move()
+        assert board.fen().split()[1] != fen.split()[1]
+        assert board.fen().split()[3] == "-"
+        assert board.zobrist_key == zobrist_hash(board)
+        assert board.material_key == material_hash(board)
+        assert board.unmake_move() is None
+        assert (board.fen(), board.zobrist_key) == (fen, key)
+        board.make_move(rng.choice(board.legal_moves()))
+
+
+def test_search_options_round_trip():
+    """Test the dict round trip of search options and parsing them from a tournament engine setting"""
+    options = SearchOptions(lmr=False, razoring=False)
+    assert SearchOptions.from_dict(options.to_dict()).to_dict() == options.to_dict()
+    assert not any(SearchOptions.none().to_dict().values())
+
+    spec = EngineSpec.parse("nolmr:depth=3,lmr=0,pvs=1")
+    assert spec.limits.depth == 3
+    assert not spec.options.lmr and spec.options.pvs and spec.options.null_move
+    assert EngineSpec.from_dict(spec.to_dict()).options.to_dict() == spec.options.to_dict()
+    with pytest.raises(ValueError):
+        EngineSpec.parse("bad:quiescence=0")
+
+
+@pytest.mark.parametrize("fen", [START_FEN, ENDGAME])
+def test_pruning_searches_fewer_nodes(fen):
+    """Test that the selective search visits fewer nodes than plain alpha-beta and leaves the board unchanged"""
+    board = Board(fen=fen)
+    pruned = Search(board, SearchLimits(depth=3))
+    pruned.run()
+    assert board.fen() == fen
+    plain = Search(Board(fen=fen), SearchLimits(depth=3), options=SearchOptions.none())
+    plain.run()
+    assert pruned.nodes < plain.nodes
+
+
+@pytest.mark.parametrize("name", SearchOptions.NAMES)
+def test_each_technique_still_finds_mate(name):
+    """Test that with any one technique switched off, or only it on, the search still finds a mate in two"""
+    fen = "6k1/5ppp/8/8/8/8/5PPP/2R3K1 w - - 0 1"
+    for options in (SearchOptions(**{name: False}), SearchOptions.from_dict({other: other == name
+                                                                            for other in SearchOptions.NAMES})):
+        move, score = Search(Board(fen=fen), SearchLimits(depth=3), options=options).run()
+        assert move.uci() == "c1c8"
+        assert score > 90000
+
+
+def test_null_move_skipped_without_pieces():
+    """Test that a king and pawn ending, where passing could be best, is searched the same without null moves"""
+    fen = "8/8/8/3k4/8/3K4/3P4/8 w - - 0 1"
+    with_null = Search(Board(fen=fen), SearchLimits(depth=4),
+                       options=SearchOptions(lmr=False, futility=False, razoring=False))
+    without = Search(Board(fen=fen), SearchLimits(depth=4),
+                     options=SearchOptions(null_move=False, lmr=False, futility=False, razoring=False))
+    assert with_null.run() == without.run()
+    assert with_null.nodes == without.nodes
+
+
+def test_benchmark_reports_every_configuration():
+    """Test that the benchmark covers all on, all off and each technique toggled"""
+    results = benchmark(["6k1/5ppp/8/8/8/8/5PPP/2R3K1 w - - 0 1"], 2)
+    assert {"all on", "all off", "only lmr", "without null_move"} <= set(results)
+    assert len(results) == 2 + 2 * len(SearchOptions.NAMES)
+    assert all(result["nodes"] > 0 for result in results.values())
+
+
+def test_razoring_does_not_hide_mate_at_the_horizon():
+    """Test that a mate in two whose last move is a capture is found with every technique on"""
+    fen = "r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 1"
+    move, score = Search(Board(fen=fen), SearchLimits(depth=3)).run()
+    assert move.uci() == "d5f6"
+    assert score == 100000 - 3
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from app.game.board import Board, START_FEN
+from app.game.move import Move
+
+
+@pytest.mark.parametrize("fen, move, expected", [
+    ("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1", "e1e5", 100),
+    ("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1", "d3e5", -220),
+    ("4k3/8/2p5/3p4/4P3/8/8/4K3 w - - 0 1", "e4d5", 0),
+    ("4k3/8/2p5/3p4/4P3/8/8/3QK3 w - - 0 1", "d1d5", -700),
+    ("4k3/3r4/3r4/3p4/8/8/3R4/3RK3 w - - 0 1", "d2d5", -400),
+    ("4k3/4q3/8/3p4/8/8/3Q4/K2R4 w - - 0 1", "d2d5", 100),
+    ("7k/8/8/3pP3/8/8/8/K7 w - d6 0 1", "e5d6", 100),
+    ("3rk3/2P5/8/8/8/8/8/4K3 w - - 0 1", "c7c8q", -100),
+    ("4k3/8/8/3p4/2K5/8/8/8 w - - 0 1", "c4d5", 100),
+    ("4k3/8/8/8/8/4p3/8/3NK3 w - - 0 1", "d1c3", 0),
+    ("4k3/8/8/1p6/8/8/8/3NK3 w - - 0 1", "d1c3", 0),
+    ("4k3/8/8/3p4/8/8/8/3NK3 w - - 0 1", "d1c3", 0),
+    ("4k3/8/8/1p6/8/8/8/3NK3 w - - 0 1", "d1b2", 0),
+    ("4k3/8/8/8/1p6/8/8/3NK3 w - - 0 1", "d1c3", -320),
+])
+def test_see_values(fen, move, expected):
+    """Test exchanges with x-rays, en passant, promotion, king recaptures and quiet moves onto attacked squares"""
+    board = Board(fen=fen)
+    assert board.see(Move.from_uci(move)) == expected
+    assert board.fen() == fen
+
+
+def test_king_does_not_recapture_into_defended_square():
+    """Test that the king only recaptures when the other side has no attacker left"""
+    # The queen behind the bishop still guards d5 once the bishop has recaptured
+    defended = Board(fen="4k3/1q6/2b5/3p4/4K3/8/8/3Q4 w - - 0 1")
+    assert defended.see(Move.from_uci("d1d5")) == 100 - 900
+    undefended = Board(fen="4k3/8/2b5/3p4/4K3/8/8/3Q4 w - - 0 1")
+    assert undefended.see(Move.from_uci("d1d5")) == 100 - 900 + 330
+
+
+def test_see_leaves_board_unchanged():
+    """Test that evaluating every capture of random positions changes nothing on the board"""
+    rng = random.Random(17)
+    board = Board(fen=START_FEN)
+    for _ in range(60):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        fen, key = board.fen(), board.zobrist_key
+        for move in moves:
+            board.see(move)
+        assert (board.fen(), board.zobrist_key) == (fen, key)
+        board.make_move(rng.choice(moves))
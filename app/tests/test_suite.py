@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from app.engine.search import SearchLimits
+from app.engine.suite import compare, main, make_tasks, run_suite, solves, summarise
+from app.game.epd import parse_epd
+
+SUITE = [
+    '6k1/5ppp/8/8/8/8/5PPP/2R3K1 w - - bm Rc8#; id "back rank";',
+    '6k1/5ppp/8/8/8/8/5PPP/2R3K1 w - - am Rc8#; id "avoid mate";',
+    '6k1/5ppp/8/8/8/8/5PPP/2R3K1 w - - bm Kf1 Rc7; id "two bm";',
+]
+
+
+def test_solves_checks_best_and_avoid_moves():
+    """Test that a move must be a best move when there are any, and must not be an avoid move"""
+    assert solves("c1c8", ["c1c8"], [])
+    assert not solves("c1c7", ["c1c8"], [])
+    assert solves("c1c7", [], ["c1c8"])
+    assert not solves("c1c8", [], ["c1c8"])
+
+
+def test_suite_records_and_summary():
+    """Test the per-position records and the summary of a run"""
+    tasks = make_tasks([parse_epd(line) for line in SUITE], SearchLimits(depth=2))
+    records = run_suite(tasks, concurrency=1)
+    assert [record["id"] for record in records] == ["back rank", "avoid mate", "two bm"]
+    assert [record["solved"] for record in records] == [True, False, False]
+    assert records[0]["move"] == "c1c8" and records[2]["bm"] == ["g1f1", "c1c7"]
+    assert 0 <= records[0]["solution_time"] <= records[0]["time"]
+
+    summary = summarise(records)
+    assert (summary["positions"], summary["solved"]) == (3, 1)
+    assert summary["nodes"] == sum(record["nodes"] for record in records)
+    assert summary["average_solution_time"] == records[0]["solution_time"]
+
+
+def test_positions_without_id_are_numbered():
+    """Test that a position without an id operation is named by its 1-based number in the file"""
+    positions = [parse_epd(SUITE[0]), parse_epd("6k1/5ppp/8/8/8/8/5PPP/2R3K1 w - - bm Rc8#;")]
+    assert [task["id"] for task in make_tasks(positions, SearchLimits(depth=1))] == ["back rank", "2"]
+
+
+def test_compare_flags_regressions():
+    """Test that a fall in nps beyond the tolerance, or fewer solved positions, count as regressions"""
+    baseline = {"nps": 1000, "solved": 10}
+    assert compare({"nps": 950, "solved": 10}, baseline) == []
+    regressions = compare({"nps": 800, "solved": 9}, baseline)
+    assert len(regressions) == 2 and regressions[0].startswith("nps fell from 1000 to 800")
+
+
+def test_main_writes_json_and_exits_on_regression(tmp_path):
+    """Test the JSON report and the exit status against a baseline that is faster than possible"""
+    suite = tmp_path / "suite.epd"
+    suite.write_text(SUITE[0] + "\n")
+    output = tmp_path / "report.json"
+    main([str(suite), "--depth", "1", "--concurrency", "1", "--output", str(output)])
+    report = json.loads(output.read_text())
+    assert report["summary"]["solved"] == 1 and report["positions"][0]["id"] == "back rank"
+
+    report["summary"]["nps"] *= 1000
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(suite), "--depth", "1", "--concurrency", "1", "--output", str(output), "--baseline",
+              str(baseline)])
+    assert exit_info.value.code == 1
+    assert json.loads(output.read_text())["regressions"]
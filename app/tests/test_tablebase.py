@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from app.engine.search import MATE_SCORE, Search, SearchLimits
+from app.engine.tablebase import (INVALID, TableLayout, Tablebase, canonical_signature, dependencies, generate,
+                                  score_of, _backed_up)
+from app.game.board import Board
+
+
+@pytest.fixture(scope="module")
+def tablebase(tmp_path_factory):
+    """Fixture to generate the KQvK and KRvK tables once for the module"""
+    pytest.importorskip("numpy")
+    directory = str(tmp_path_factory.mktemp("tablebases"))
+    generate("KQvK", directory, concurrency=1)
+    generate("KvKR", directory, concurrency=1)
+    with Tablebase(directory) as tablebase:
+        yield tablebase
+
+
+def test_layout_round_trip_and_symmetry():
+    """Test that indexes decode back and that mirrored positions share an index"""
+    layout = TableLayout("KRvK")
+    squares = [60, 0, 27]
+    index = layout.index(squares, 1)
+    assert layout.decode(index) == (layout.canonical(squares), 1)
+    mirrored = [square ^ 7 for square in squares]
+    flipped = [square ^ 56 for square in squares]
+    assert layout.index(mirrored, 1) == layout.index(flipped, 1) == index
+    assert TableLayout("KPvK").size == 2 * 32 * 64 * 64
+
+
+def test_signatures_and_dependencies():
+    """Test that the stronger side is white and that pawn tables depend on their promotions"""
+    assert canonical_signature("KvKR") == "KRvK"
+    assert dependencies("KPvK") == ["KQvK", "KRvK"]
+    assert dependencies("KQvKR") == ["KQvK", "KRvK"]
+
+
+@pytest.mark.parametrize("fen, wdl, dtm", [
+    ("8/8/8/8/8/1Q6/2K5/k7 w - - 0 1", 1, 1),
+    ("8/8/8/8/8/8/8/kQK5 b - - 0 1", -1, 0),
+    ("8/8/8/8/8/1Q6/2K5/k7 b - - 0 1", 0, 0),
+    ("8/8/8/8/8/8/2K5/k1q5 w - - 0 1", 0, 0),
+    ("K7/2k5/1q6/8/8/8/8/8 b - - 0 1", 1, 1),
+    ("k6R/8/8/8/8/8/8/2K5 w - - 0 1", None, None),
+])
+def test_probe_known_positions(tablebase, fen, wdl, dtm):
+    """Test mates, checkmate, stalemate, a capture of the queen, colour swapping and an illegal position"""
+    board = Board(fen=fen)
+    assert tablebase.probe_wdl(board) == wdl
+    assert tablebase.probe_dtm(board) == dtm
+
+
+def test_longest_mates(tablebase):
+    """Test the well-known longest mates: 10 moves with the queen, 16 with the rook"""
+    assert tablebase.probe_dtm(Board(fen="8/8/8/3k4/8/8/8/KQ6 w - - 0 1")) <= 19
+    assert tablebase.probe_dtm(Board(fen="8/8/8/8/4k3/8/8/KR6 w - - 0 1")) <= 31
+    for signature, longest in (("KQvK", 19), ("KRvK", 31)):
+        table = tablebase._table(signature)
+        values = [table.value(index) for index in range(table.size)]
+        assert max(values) == longest
+        assert INVALID in values
+
+
+def test_tables_agree_with_the_rules(tablebase):
+    """Test that every probed value follows from the values after each legal move of Board"""
+    rng = random.Random(3)
+    checked = 0
+    while checked < 60:
+        squares = rng.sample(range(64), 3)
+        placement = {square: piece for square, piece in zip(squares, "KRk")}
+        rows = ["".join(placement.get(row * 8 + col, "1") for col in range(8)) for row in range(8)]
+        board = Board(fen="/".join(rows) + rng.choice([" w", " b"]) + " - - 0 1")
+        value = tablebase._probe_board(board)
+        moves = board.legal_moves()
+        if value is None or not moves:
+            continue
+        children = []
+        for move in moves:
+            board.make_move(move)
+            children.append(_backed_up(score_of(tablebase._probe_board(board))))
+            board.unmake_move()
+        assert score_of(value) == max(children)
+        checked += 1
+
+
+def test_search_uses_tablebase(tablebase):
+    """Test that the search scores tablebase positions as exact mates"""
+    board = Board(fen="8/8/8/4k3/8/8/8/4K2R w - - 0 1")
+    search = Search(board, SearchLimits(depth=2), tablebase=tablebase)
+    move, score = search.run()
+    assert search.tablebase_hits > 0
+    assert score == MATE_SCORE - tablebase.probe_dtm(board)
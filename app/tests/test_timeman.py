@@ -0,0 +1,63 @@
+import pytest
+
+from app.engine.search import Search, SearchLimits
+from app.engine.timeman import (FAIL_LOW_EXTENSION, STABLE_ITERATIONS, STABLE_SCALE, GameClock, TimeManager,
+                                deadlines)
+from app.game import Colour
+from app.game.board import Board
+
+
+def test_deadlines_keep_a_reserve():
+    """Test that the hard deadline is a multiple of the soft one but never more than half the clock"""
+    soft, hard = deadlines(60, 0)
+    assert soft == pytest.approx(2) and hard == pytest.approx(8)
+    soft, hard = deadlines(4, 0, moves_to_go=1)
+    assert soft == pytest.approx(2) and hard == pytest.approx(2)
+
+
+def test_time_manager_extends_on_fail_low_and_shrinks_when_stable():
+    """Test the scaling of the soft deadline by score drops and best move stability"""
+    manager = TimeManager(1.0, hard_time=1.5)
+    manager.update("e2e4", 20)
+    assert manager.scale == 1.0 and not manager.should_stop(0.9)
+    manager.update("e2e4", -40)
+    assert manager.scale == FAIL_LOW_EXTENSION
+    # Extended, but not past the hard deadline
+    assert not manager.should_stop(1.2) and manager.should_stop(1.5)
+
+    for _ in range(STABLE_ITERATIONS):
+        manager.update("e2e4", -40)
+    assert manager.scale == STABLE_SCALE and manager.should_stop(0.6)
+    manager.update("d2d4", -40)
+    assert manager.scale == 1.0
+
+
+def test_game_clock_runs_one_side_and_adds_increment():
+    """Test that only the running side's time is used and the increment is credited on pressing"""
+    clock = GameClock.parse("1+2")
+    assert clock.remaining[Colour.WHITE] == 60 and clock.increment == 2
+    clock.press(Colour.WHITE, now=0.0)
+    assert clock.time_left(Colour.WHITE, now=10.0) == 50
+    assert clock.time_left(Colour.BLACK, now=10.0) == 60
+    clock.press(Colour.BLACK, now=10.0)
+    assert clock.remaining[Colour.WHITE] == 52
+    assert clock.flagged(now=69.0) is None
+    assert clock.flagged(now=71.0) == Colour.BLACK
+
+
+def test_game_clock_press_without_credit():
+    """Test that a press made for a takeback charges the time used but adds no increment"""
+    clock = GameClock(60, 5)
+    clock.press(Colour.WHITE, now=0.0)
+    clock.press(Colour.BLACK, now=2.0, credit=False)
+    assert clock.remaining[Colour.WHITE] == pytest.approx(58)
+
+
+def test_search_stops_at_soft_deadline():
+    """Test that a search with a soft deadline of zero stops after its first iteration"""
+    infos = []
+    search = Search(Board(), SearchLimits(depth=5, soft_time=0.0), on_info=infos.append)
+    move, _ = search.run()
+    assert move is not None
+    assert [info["depth"] for info in infos] == [1]
+    assert SearchLimits.from_dict(SearchLimits(soft_time=1.5).to_dict()).soft_time == 1.5
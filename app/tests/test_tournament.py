@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from app.engine.polyglot import encode_move, polyglot_key, write_book
+from app.engine.search import SearchLimits
+from app.engine.tournament import EngineSpec, make_tasks, play_game, run_tournament, summarise
+from app.game.board import Board, START_FEN
+from app.game.epd import parse_epd
+from app.game.move import Move
+
+
+def record(white, black, result):
+    return {"white": white, "black": black, "result": result, "plies": 10,
+            "nodes": {white: 100, black: 100}, "nps": {white: 1000, black: 1000}}
+
+
+def test_engine_spec_parse():
+    """Test parsing of engine configurations from the command line"""
+    spec = EngineSpec.parse("fast:nodes=500,movetime=0.1")
+    assert spec.name == "fast"
+    assert (spec.limits.nodes, spec.limits.movetime, spec.limits.depth) == (500, 0.1, None)
+    with pytest.raises(ValueError):
+        EngineSpec.parse("bad:speed=3")
+
+
+def test_parse_epd_and_fen():
+    """Test that EPD operations are parsed and plain FEN lines keep their clocks"""
+    fen, operations = parse_epd('4k3/8/8/8/8/8/8/4K2R w K - bm Rh8+; id "test; one";')
+    assert fen == "4k3/8/8/8/8/8/8/4K2R w K - 0 1"
+    assert operations == {"bm": ["Rh8+"], "id": ["test; one"]}
+    assert parse_epd(START_FEN) == (START_FEN, {})
+
+
+def test_make_tasks_alternates_colours():
+    """Test that each opening is played once with either engine as white"""
+    a, b = EngineSpec("a", SearchLimits(depth=1)), EngineSpec("b", SearchLimits(depth=1))
+    tasks = make_tasks(["fen1", "fen2"], a, b, 4)
+    assert [task["fen"] for task in tasks] == ["fen1", "fen1", "fen2", "fen2"]
+    assert [task["white"]["name"] for task in tasks] == ["a", "b", "a", "b"]
+
+
+def test_summarise_counts_and_sprt():
+    """Test the score, Elo and SPRT summary from one engine's point of view"""
+    records = [record("a", "b", "1-0"), record("b", "a", "1-0"), record("a", "b", "1/2-1/2"),
+               record("b", "a", "0-1")]
+    summary = summarise(records, "a")
+    assert (summary["wins"], summary["draws"], summary["losses"]) == (2, 1, 1)
+    assert summary["score"] == pytest.approx(0.625)
+    assert summary["elo"] > 0
+    assert summary["elo_low"] < summary["elo"] < summary["elo_high"]
+    assert summary["sprt"]["decision"] == "continue"
+    assert summary["nps"] == {"a": 1000, "b": 1000}
+
+
+def test_play_game_adjudicates_checkmate():
+    """Test that a game from a mate-in-one position ends by checkmate"""
+    a, b = EngineSpec("a", SearchLimits(depth=2)), EngineSpec("b", SearchLimits(depth=1))
+    task = make_tasks(["6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"], a, b, 1)[0]
+    result = play_game(task)
+    assert (result["result"], result["reason"], result["plies"]) == ("1-0", "checkmate", 1)
+    assert result["moves"] == ["a1a8"]
+
+
+def test_run_tournament_streams_jsonl(tmp_path):
+    """Test that games played in worker processes are written to the JSONL file"""
+    a, b = EngineSpec("a", SearchLimits(depth=1)), EngineSpec("b", SearchLimits(depth=1))
+    tasks = make_tasks([START_FEN], a, b, 2, max_plies=4)
+    output = tmp_path / "games.jsonl"
+    records = run_tournament(tasks, str(output), concurrency=2)
+
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(line["game"] for line in lines) == [0, 1]
+    assert all(line["reason"] == "max plies" and line["plies"] == 4 for line in lines)
+    assert len(records) == 2
+
+
+def test_play_game_follows_book(tmp_path):
+    """Test that book moves are played without searching and both games of a pair get the same line"""
+    board = Board()
+    path = str(tmp_path / "book.bin")
+    write_book(path, [(polyglot_key(board), encode_move(board, Move.from_uci(move)), 1, 0)
+                      for move in ("e2e4", "d2d4", "c2c4")])
+    a, b = EngineSpec("a", SearchLimits(depth=1)), EngineSpec("b", SearchLimits(depth=1))
+    first, second = (play_game(task) for task in make_tasks([START_FEN], a, b, 2, max_plies=2, book=path))
+    assert first["book_plies"] == second["book_plies"] == 1
+    assert first["moves"][0] == second["moves"][0]
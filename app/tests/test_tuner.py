@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.engine import evaluation
+from app.engine.batch_eval import evaluate_fens
+from app.engine.evaluation import DEFAULT_WEIGHTS, current_weights, evaluate, load_weights, save_weights, set_weights
+from app.engine.tuner import (FEATURES, Tuner, extract_features, parse_labelled_line, read_labelled_positions,
+                              vector_to_weights, weights_to_vector)
+from app.game.board import Board, START_FEN
+
+
+@pytest.fixture(scope="module")
+def positions():
+    """Fixture to play random games and collect the positions reached"""
+    rng = random.Random(5)
+    fens = []
+    for _ in range(30):
+        board = Board()
+        for _ in range(rng.randrange(10, 100)):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+            fens.append(board.fen())
+    return fens
+
+
+@pytest.fixture
+def restore_weights():
+    """Fixture to put the default evaluation weights back after a test changes them"""
+    yield
+    set_weights(DEFAULT_WEIGHTS)
+
+
+@pytest.mark.parametrize("line, result", [
+    (f'{START_FEN[:-4]} c9 "1-0";', 1.0),
+    (f"{START_FEN} 0-1", 0.0),
+    (f"{START_FEN} [0.5]", 0.5),
+    (f"{START_FEN} 1/2-1/2", 0.5),
+])
+def test_parse_labelled_line(line, result):
+    """Test reading the result of EPD and FEN lines"""
+    fen, value = parse_labelled_line(line)
+    assert value == result
+    assert fen.split()[:4] == START_FEN.split()[:4]
+
+
+def test_read_labelled_positions(tmp_path):
+    """Test that blank lines and comments are skipped and bad results are rejected"""
+    path = tmp_path / "positions.epd"
+    path.write_text(f"# comment\n{START_FEN} 1-0\n\n{START_FEN} 0.5\n")
+    fens, results = read_labelled_positions(str(path))
+    assert len(fens) == 2 and results.tolist() == [1.0, 0.5]
+    with pytest.raises(ValueError):
+        parse_labelled_line(f"{START_FEN} 0.7")
+
+
+def test_weights_round_trip(tmp_path, restore_weights):
+    """Test that saved weights load back unchanged and that the weight vector converts back to the same scores"""
+    path = str(tmp_path / "weights.json")
+    weights = current_weights()
+    weights["material"]["n"] = [333, 311]
+    weights["mobility"]["r"] = [3, 5, 7]
+    save_weights(path, weights)
+    set_weights(DEFAULT_WEIGHTS)
+    load_weights(path)
+    assert current_weights() == weights
+    converted = vector_to_weights(weights_to_vector(weights), weights)
+    # Pawn entries on the first and last ranks can never score
+    reachable = np.ones(len(weights_to_vector(weights)), dtype=bool)
+    reachable[[stage * FEATURES + square for stage in (0, 1) for square in (*range(8), *range(56, 64))]] = False
+    assert np.array_equal(weights_to_vector(converted)[reachable], weights_to_vector(weights)[reachable])
+    assert converted["mobility"] == weights["mobility"]
+    assert converted["material"]["k"] == [0, 0]
+
+
+def test_set_weights_updates_both_evaluators(positions, restore_weights):
+    """Test that new weights reach the scalar evaluation and the batch evaluation alike"""
+    revision = evaluation.weights_revision
+    weights = current_weights()
+    weights["material"]["q"] = [1200, 1250]
+    weights["mobility"]["b"] = [9, 2, 6]
+    set_weights(weights)
+    assert evaluation.weights_revision == revision + 1
+    expected = [evaluate(Board(fen=fen)) for fen in positions[:200]]
+    assert evaluate_fens(positions[:200]).tolist() == expected
+
+
+def test_features_reproduce_evaluation(positions):
+    """Test that the linear model of the starting weights scores like the evaluation, up to rounding"""
+    features = extract_features(positions, concurrency=1, chunk_size=150)
+    assert len(features) == len(positions)
+    tuner = Tuner(features, np.zeros(len(positions)))
+    white_scores = [evaluate(Board(fen=fen)) * (1 if fen.split()[1] == "w" else -1) for fen in positions]
+    assert np.allclose(tuner.scores(), white_scores, atol=1)
+
+
+def test_tuning_recovers_weights(positions, restore_weights):
+    """Test that tuning on results drawn from stronger knights lowers the loss and raises the knight value"""
+    target = current_weights()
+    target["material"]["n"] = [420, 400]
+    set_weights(target)
+    scores = [evaluate(Board(fen=fen)) * (1 if fen.split()[1] == "w" else -1) for fen in positions]
+    set_weights(DEFAULT_WEIGHTS)
+    rng = np.random.default_rng(0)
+    # Several noisy results per position, drawn from the target model
+    probabilities = 1 / (1 + 10 ** (-np.array(scores) / 400))
+    fens = positions * 8
+    results = (rng.random(len(fens)) < np.tile(probabilities, 8)).astype(np.float32)
+
+    tuner = Tuner(extract_features(fens, concurrency=1), results)
+    tuner.scaling = 1.0
+    start = tuner.loss()
+    for _ in range(30):
+        loss = tuner.epoch(batch_size=512, learning_rate=2.0)
+    assert loss < start
+    assert tuner.weights()["material"]["n"][0] > DEFAULT_WEIGHTS["material"]["n"][0]
@@ -0,0 +1,129 @@
+import asyncio
+import io
+
+import pytest
+
+from app.engine.search import MATE_SCORE
+from app.engine.timeman import allocate_time
+from app.game import Colour
+from app.uci import UciEngine, format_score
+
+
+@pytest.fixture
+def engine():
+    """Fixture to create a UCI engine that records its output"""
+    lines = []
+    uci = UciEngine(output=lines.append)
+    uci.lines = lines
+    yield uci
+    uci.worker.close()
+
+
+def run_commands(engine, commands):
+    """Feeds the commands to the engine's stdin loop and waits for it to exit"""
+    asyncio.run(asyncio.wait_for(engine.run(io.StringIO("\n".join(commands) + "\n")), timeout=60))
+
+
+def test_format_score():
+    """Test centipawn and mate score formatting"""
+    assert format_score(35) == "cp 35"
+    assert format_score(MATE_SCORE - 1) == "mate 1"
+    assert format_score(-(MATE_SCORE - 2)) == "mate -1"
+
+
+def test_allocate_time_never_exceeds_half_the_clock():
+    """Test that the time allocation keeps a reserve on the clock"""
+    assert allocate_time(60, 0) == pytest.approx(2)
+    assert allocate_time(1, 5) == pytest.approx(0.5)
+
+
+def test_handshake_and_options(engine):
+    """Test the uci handshake, isready and setoption"""
+    run_commands(engine, ["uci", "setoption name Hash value 64", "isready", "quit"])
+    assert engine.lines[0] == "id name Chess"
+    assert "uciok" in engine.lines
+    assert engine.lines[-1] == "readyok"
+    assert engine.options["Hash"] == 64
+
+
+def test_position_with_moves(engine):
+    """Test that position applies the move list to the start position or a FEN"""
+    asyncio.run(engine.handle("position startpos moves e2e4 e7e5"))
+    assert engine._board().fen() == "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2"
+
+    asyncio.run(engine.handle("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"))
+    assert engine._board().fen() == "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+
+
+def test_illegal_position_input_is_reported(engine):
+    """Test that illegal moves and bad FENs are reported instead of corrupting the position"""
+    asyncio.run(engine.handle("position startpos moves e2e4 e2e5 e7e5"))
+    assert engine.moves == ["e2e4"]
+    assert engine.lines[-1].startswith("info string illegal move e2e5")
+
+    asyncio.run(engine.handle("position startpos moves e2e4 zz"))
+    assert engine.moves == ["e2e4"]
+    asyncio.run(engine.handle("position fen not a fen"))
+    assert engine.lines[-1].startswith("info string")
+    assert engine._board().fen() == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+
+
+def test_bad_go_values_are_reported(engine):
+    """Test that a bad number in go is reported and the engine keeps running"""
+    limits = engine._limits(["depth", "x", "nodes", "500"], Colour.WHITE)
+    assert (limits.depth, limits.nodes) == (None, 500)
+    assert engine.lines[-1] == "info string invalid value for depth: x"
+
+    run_commands(engine, ["position startpos", "go depth x nodes 50", "isready", "quit"])
+    assert "readyok" in engine.lines
+
+
+def test_go_limits(engine):
+    """Test conversion of go arguments to search limits"""
+    limits = engine._limits(["wtime", "30000", "btime", "1000", "winc", "1000"], Colour.WHITE)
+    # The clock's share of the time is now the soft deadline, with the hard deadline four times further
+    assert limits.soft_time == pytest.approx(1.8)
+    assert limits.movetime == pytest.approx(7.2)
+    limits = engine._limits(["depth", "3", "nodes", "500"], Colour.BLACK)
+    assert (limits.depth, limits.nodes, limits.movetime) == (3, 500, None)
+
+
+def test_go_reports_info_and_bestmove(engine):
+    """Test a full search through the worker process"""
+    async def session():
+        await engine.handle("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        await engine.handle("go depth 2")
+        await engine.handle("isready")
+        await asyncio.wait_for(engine._poller, timeout=60)
+
+    asyncio.run(session())
+    assert "readyok" in engine.lines
+    assert engine.lines[-1] == "bestmove a1a8"
+    assert any(line.startswith("info depth 1 score mate 1") for line in engine.lines)
+
+
+def test_multipv_reports_ranked_lines(engine):
+    """Test that the MultiPV option tags each info line with its rank"""
+    async def session():
+        await engine.handle("setoption name MultiPV value 2")
+        await engine.handle("position startpos")
+        await engine.handle("go depth 1")
+        await asyncio.wait_for(engine._poller, timeout=60)
+
+    asyncio.run(session())
+    assert [line.split()[4] for line in engine.lines if line.startswith("info depth 1 multipv")] == ["1", "2"]
+    assert engine.lines[-1].startswith("bestmove")
+
+
+def test_infinite_search_waits_for_stop(engine):
+    """Test that go infinite only sends bestmove after stop"""
+    async def session():
+        await engine.handle("position startpos")
+        await engine.handle("go infinite")
+        await asyncio.sleep(0.5)
+        assert not any(line.startswith("bestmove") for line in engine.lines)
+        await engine.handle("stop")
+        await asyncio.wait_for(engine._poller, timeout=60)
+
+    asyncio.run(session())
+    assert engine.lines[-1].startswith("bestmove")
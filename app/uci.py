@@ -0,0 +1,265 @@
+"""
+Universal Chess Interface front end, run with ``python -m app.uci``.
+
+Commands are read from stdin on an asyncio loop while searches run in an EngineWorker process,
+so ``stop`` and ``isready`` are answered while the engine is thinking.
+"""
+import asyncio
+import sys
+
+from app.engine.search import SearchLimits, SearchOptions, MATE_SCORE
+from app.engine.timeman import deadlines
+from app.engine.worker import EngineWorker
+from app.game import Colour
+from app.game.board import START_FEN
+from app.game.move import Move
+
+ENGINE_NAME = "Chess"
+ENGINE_AUTHOR = "JaredTPonting"
+
+# Seconds between checks of the worker's result queue while a search is running
+POLL_INTERVAL = 0.005
+
+OPTIONS = {
+    "Hash": {"type": "spin", "default": 16, "min": 1, "max": 1024},
+    "Threads": {"type": "spin", "default": 1, "min": 1, "max": 1},
+    "MultiPV": {"type": "spin", "default": 1, "min": 1, "max": 64},
+    "TablebasePath": {"type": "string", "default": "<empty>"},
+    "EvalFile": {"type": "string", "default": "<empty>"},
+    "EvalWeights": {"type": "string", "default": "<empty>"},
+    "PVS": {"type": "check", "default": "true"},
+    "AspirationWindows": {"type": "check", "default": "true"},
+    "NullMove": {"type": "check", "default": "true"},
+    "LMR": {"type": "check", "default": "true"},
+    "Futility": {"type": "check", "default": "true"},
+    "Razoring": {"type": "check", "default": "true"},
+}
+
+# Check options switching the search techniques, by SearchOptions name
+SEARCH_OPTIONS = {"pvs": "PVS", "aspiration": "AspirationWindows", "null_move": "NullMove", "lmr": "LMR",
+                  "futility": "Futility", "razoring": "Razoring"}
+
+
+def format_score(score: int) -> str:
+    """Formats a score in centipawns as a UCI 'score' field, converting mate scores to moves to mate."""
+    if abs(score) >= MATE_SCORE - 1000:
+        plies = MATE_SCORE - abs(score)
+        moves = (plies + 1) // 2
+        return f"mate {moves if score > 0 else -moves}"
+    return f"cp {score}"
+
+
+def format_info(info: dict) -> str:
+    """Formats a search progress record as a UCI 'info' line."""
+    tbhits = f"tbhits {info['tbhits']} " if info.get("tbhits") else ""
+    multipv = f"multipv {info['multipv']} " if "multipv" in info else ""
+    return (f"info depth {info['depth']} {multipv}score {format_score(info['score'])} nodes {info['nodes']} "
+            f"nps {info['nps']} {tbhits}time {int(1000 * info['time'])} pv {' '.join(info['pv'])}")
+
+
+class UciEngine:
+    def __init__(self, output=print, worker: EngineWorker = None):
+        """
+        :param output: Called with each line sent to the GUI.
+        :param worker: Engine worker running the searches, a new one is created if not given.
+        """
+        self.output = output
+        self.worker = worker or EngineWorker()
+        self.fen = START_FEN
+        self.moves = []
+        self.options = {name: option["default"] for name, option in OPTIONS.items()}
+        self.infinite = False
+        self._stop_requested = False
+        self._pending_bestmove = None
+        self._poller = None
+
+    def send(self, line: str):
+        self.output(line)
+
+    async def handle(self, line: str) -> bool:
+        """
+        Handles one command from the GUI.
+
+        :param line: The command line.
+        :return: False when the engine should exit.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == "quit":
+            self.worker.close()
+            return False
+        handler = getattr(self, f"cmd_{command}", None)
+        if handler is not None:
+            handler(args)
+        return True
+
+    def cmd_uci(self, args):
+        self.send(f"id name {ENGINE_NAME}")
+        self.send(f"id author {ENGINE_AUTHOR}")
+        for name, option in OPTIONS.items():
+            line = f"option name {name} type {option['type']} default {option['default']}"
+            if option["type"] == "spin":
+                line += f" min {option['min']} max {option['max']}"
+            self.send(line)
+        self.send("uciok")
+
+    def cmd_isready(self, args):
+        self.worker.start()
+        self.send("readyok")
+
+    def cmd_ucinewgame(self, args):
+        self.worker.cancel()
+        self.fen, self.moves = START_FEN, []
+
+    def cmd_setoption(self, args):
+        # setoption name <name> [value <value>]
+        if "name" not in args:
+            return
+        value_index = args.index("value") if "value" in args else len(args)
+        name = " ".join(args[args.index("name") + 1:value_index])
+        value = " ".join(args[value_index + 1:])
+        for option_name, option in OPTIONS.items():
+            if option_name.lower() == name.lower() and option["type"] == "string":
+                self.options[option_name] = value
+            elif option_name.lower() == name.lower() and option["type"] == "check":
+                if value.lower() in ("true", "false"):
+                    self.options[option_name] = value.lower()
+                else:
+                    self.send(f"info string invalid value for {option_name}: {value}")
+            elif option_name.lower() == name.lower():
+                try:
+                    self.options[option_name] = min(option["max"], max(option["min"], int(value)))
+                except ValueError:
+                    self.send(f"info string invalid value for {option_name}: {value}")
+
+    def cmd_position(self, args):
+        from app.game.board import Board
+
+        if not args:
+            return
+        moves_index = args.index("moves") if "moves" in args else len(args)
+        if args[0] == "startpos":
+            fen = START_FEN
+        elif args[0] == "fen":
+            fen = " ".join(args[1:moves_index])
+        else:
+            self.send(f"info string invalid position: {' '.join(args)}")
+            return
+        try:
+            board = Board(fen=fen)
+        except ValueError as error:
+            self.send(f"info string {error}")
+            return
+
+        # The moves are played up to the first one that is not legal
+        moves = []
+        for text in args[moves_index + 1:]:
+            try:
+                move = Move.from_uci(text)
+            except ValueError:
+                move = None
+            if move is None or move not in board.legal_moves():
+                self.send(f"info string illegal move {text}, ignoring it and the moves after it")
+                break
+            board.make_move(move)
+            moves.append(text)
+        self.fen, self.moves = fen, moves
+
+    def _board(self):
+        from app.game.board import Board
+
+        board = Board(fen=self.fen)
+        for text in self.moves:
+            board.make_move(Move.from_uci(text))
+        return board
+
+    def _limits(self, args, turn: Colour) -> SearchLimits:
+        """Converts the arguments of a 'go' command to search limits."""
+        values = {}
+        for index, token in enumerate(args[:-1]):
+            if token in ("depth", "nodes", "movetime", "wtime", "btime", "winc", "binc", "movestogo"):
+                try:
+                    values[token] = int(args[index + 1])
+                except ValueError:
+                    self.send(f"info string invalid value for {token}: {args[index + 1]}")
+
+        limits = SearchLimits(depth=values.get("depth"), nodes=values.get("nodes"))
+        if "movetime" in values:
+            limits.movetime = values["movetime"] / 1000
+        clock, increment = ("wtime", "winc") if turn == Colour.WHITE else ("btime", "binc")
+        if clock in values:
+            soft, hard = deadlines(values[clock] / 1000, values.get(increment, 0) / 1000, values.get("movestogo"))
+            limits.movetime = min(limits.movetime or hard, hard)
+            limits.soft_time = min(soft, limits.movetime)
+        return limits
+
+    def _path_option(self, name: str):
+        """Returns the value of a file or directory option, None when it is not set."""
+        value = self.options[name]
+        return value if value not in ("", "<empty>") else None
+
+    def _search_options(self) -> SearchOptions:
+        """Returns the search techniques switched on by the check options."""
+        return SearchOptions(**{name: self.options[option] == "true" for name, option in SEARCH_OPTIONS.items()})
+
+    def cmd_go(self, args):
+        board = self._board()
+        self.infinite = "infinite" in args
+        self._stop_requested = False
+        self._pending_bestmove = None
+        self.worker.submit(board.fen(), self._limits(args, board.turn), self._path_option("TablebasePath"),
+                           self._path_option("EvalFile"), self._path_option("EvalWeights"), self._search_options(),
+                           self.options["MultiPV"])
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll_worker())
+
+    def cmd_stop(self, args):
+        self._stop_requested = True
+        self.worker.stop()
+        if self._pending_bestmove is not None:
+            self.send(self._pending_bestmove)
+            self._pending_bestmove = None
+
+    async def _poll_worker(self):
+        """Forwards the worker's progress to the GUI until the search finishes."""
+        while self.worker.busy:
+            for kind, payload in self.worker.poll():
+                if kind == "info":
+                    self.send(format_info(payload))
+                elif kind == "bestmove":
+                    line = f"bestmove {payload['move'] or '0000'}"
+                    # In infinite mode the best move is only sent once the GUI says stop
+                    if self.infinite and not self._stop_requested:
+                        self._pending_bestmove = line
+                    else:
+                        self.send(line)
+                elif kind == "error":
+                    self.send(f"info string engine error {payload.splitlines()[-1]}")
+                    self.send("bestmove 0000")
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def run(self, stream=sys.stdin):
+        """Reads commands from the stream until 'quit' or end of input."""
+        loop = asyncio.get_running_loop()
+        while True:
+            line = await loop.run_in_executor(None, stream.readline)
+            if not line:
+                self.worker.close()
+                break
+            if not await self.handle(line.strip()):
+                break
+
+
+def main():
+    def output(line):
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+    asyncio.run(UciEngine(output=output).run())
+
+
+if __name__ == "__main__":
+    main()